@@ -4,26 +4,30 @@ YOLOv12 Object Detection API Server
 A lightweight Flask-based API for serving YOLOv12 model predictions
 """
 
-from flask import Flask, jsonify
+import os
+from flask import Flask, jsonify, request, g
 from flask_cors import CORS
 from pyngrok import ngrok, conf
 from werkzeug.exceptions import RequestEntityTooLarge
 from config import Config
+from services.stage_timer import StageTimer
+from services.metrics import Metrics
+from services.model_warmup import ModelWarmup
 from routes.general_routes import general_bp
 from routes.detection_routes import detection_bp
 
 app = Flask(__name__)
 
-# Set maximum upload size (10MB)
-app.config['MAX_CONTENT_LENGTH'] = 10 * 1024 * 1024  # 10MB
+# Set maximum upload size (default 10MB)
+app.config['MAX_CONTENT_LENGTH'] = int(Config.MAX_UPLOAD_MB * 1024 * 1024)
 
 # Enable CORS for all routes and origins (needed for browser extensions)
 CORS(app, resources={
     r"/*": {
         "origins": "*",
         "methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"],
-        "expose_headers": ["Content-Type"],
+        "allow_headers": ["Content-Type", "Authorization", "Accept", "X-Priority", "X-API-Key", "X-Request-Timeout"],
+        "expose_headers": ["Content-Type", "Server-Timing", "X-Cache", "Retry-After"],
         "supports_credentials": False
     }
 })
@@ -32,13 +36,39 @@ CORS(app, resources={
 app.register_blueprint(general_bp)
 app.register_blueprint(detection_bp)
 
+# Per-stage timings, recorded for /metrics and reported in a
+# Server-Timing header when enabled
+@app.before_request
+def start_stage_timer():
+    StageTimer.start()
+
+
+@app.after_request
+def record_stage_timings(response):
+    endpoint = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+    if response.is_streamed:
+        # /detect/batch produces its body after this hook returns: record it
+        # once the server has sent (or the client dropped) the whole stream
+        state, method, status = g._get_current_object(), request.method, response.status_code
+        response.call_on_close(lambda: Metrics.get_instance().observe_request(
+            endpoint, method, status, StageTimer.timings(state)))
+        return response
+
+    timings = StageTimer.timings()
+    Metrics.get_instance().observe_request(endpoint, request.method, response.status_code, timings)
+
+    if Config.SERVER_TIMING and timings:
+        response.headers['Server-Timing'] = StageTimer.server_timing_header(timings)
+        response.headers['Timing-Allow-Origin'] = '*'
+    return response
+
 # Error handler for file too large
 @app.errorhandler(RequestEntityTooLarge)
 def handle_file_too_large(e):
     return jsonify({
         'success': False,
         'error': 'File too large',
-        'message': 'Image file exceeds 10MB limit. Please use a smaller image or lower resolution.'
+        'message': f'Upload exceeds {Config.MAX_UPLOAD_MB:g}MB limit. Please use a smaller image or lower resolution.'
     }), 413
 
 # Validate and display configuration
@@ -106,6 +136,11 @@ if __name__ == '__main__':
             print(f"Public URL: {ngrok_tunnel}")
         print(f"{'='*60}\n")
         
+        # Load and warm the models in the background while the port binds;
+        # with the debug reloader only the serving child process does this
+        if not Config.DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            ModelWarmup.get_instance().start()
+        
         # Run Flask app
         app.run(host=Config.HOST, port=Config.PORT, debug=Config.DEBUG, threaded=True)
         
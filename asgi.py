@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Async serving mode for the YOLO API
+
+Serves the same Flask app through AsyncGateway: uploads are received on an
+event loop, so hundreds of slow clients don't each hold a server thread,
+and at most ASYNC_WORKERS requests run at once with ASYNC_QUEUE_SIZE more
+waiting (503 + Retry-After beyond that). Detection requests wait for their
+priority lane before taking one of those threads. Requires uvicorn:
+
+    pip install uvicorn
+    python asgi.py
+    uvicorn asgi:application --host 127.0.0.1 --port 5000
+"""
+
+from config import Config
+from app import app, start_ngrok, shutdown_ngrok
+from services.async_gateway import AsyncGateway
+from services.model_warmup import ModelWarmup
+from services.admission import AdmissionController
+
+application = AsyncGateway(
+    app,
+    workers=Config.ASYNC_WORKERS,
+    queue_size=Config.ASYNC_QUEUE_SIZE,
+    body_timeout=Config.ASYNC_BODY_TIMEOUT,
+    retry_after=Config.ASYNC_RETRY_AFTER,
+    max_body_bytes=app.config['MAX_CONTENT_LENGTH'],
+    # Load and warm the models in the background once the server is up
+    on_startup=[lambda: ModelWarmup.get_instance().start()],
+    # Lane queues wait on the event loop, not in pool threads
+    admission=AdmissionController.get_instance()
+)
+
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        print("❌ Async serving needs uvicorn: pip install uvicorn")
+        raise SystemExit(1)
+
+    try:
+        if Config.USE_NGROK:
+            start_ngrok()
+
+        print(f"\n{'='*60}")
+        print(f"🚀 Starting YOLOv12 Object Detection API Server (async)")
+        print(f"{'='*60}")
+        print(f"Local URL: http://{Config.HOST}:{Config.PORT}")
+        print(f"{'='*60}\n")
+
+        uvicorn.run(
+            application,
+            host=Config.HOST,
+            port=Config.PORT,
+            limit_concurrency=Config.ASYNC_MAX_CONNECTIONS or None,
+            log_level='debug' if Config.DEBUG else 'info'
+        )
+    finally:
+        shutdown_ngrok()
+        print("Server stopped.")
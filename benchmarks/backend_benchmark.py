@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Inference backend benchmark: PyTorch vs ONNX Runtime vs OpenVINO
+
+Loads the configured weights through every backend (exporting and caching
+ONNX / OpenVINO artifacts like the server does), then times forward passes
+on the synthetic VR360 corpus at several batch sizes. Reports mean/p50/p95
+latency per batch and images per second, and writes a JSON report next to
+the load test results.
+
+Usage:
+    python benchmarks/backend_benchmark.py
+    python benchmarks/backend_benchmark.py --model yolov8s.pt --backends pytorch,openvino --batch-sizes 1,8
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from load_test import synthetic_image, parse_sizes, percentile_summary, git_commit
+
+
+def run_backend(backend, model_path, imgsz, frames, batch_sizes, runs, warmup, confidence):
+    from services.model_exporter import ModelExporter
+
+    started = time.perf_counter()
+    model, served_path = ModelExporter.load(model_path, backend=backend, imgsz=imgsz)
+    load_s = time.perf_counter() - started
+    if backend != 'pytorch' and served_path == model_path:
+        # Export failed and the loader fell back to PyTorch
+        return {'backend': backend, 'error': 'export failed'}
+
+    report = {'backend': backend, 'served_path': str(served_path), 'load_s': round(load_s, 2), 'batches': []}
+    for batch_size in batch_sizes:
+        batches = [[frames[(i * batch_size + j) % len(frames)] for j in range(batch_size)]
+                   for i in range(warmup + runs)]
+        for batch in batches[:warmup]:
+            model(batch, conf=confidence, imgsz=imgsz, verbose=False)
+
+        latencies = []
+        for batch in batches[warmup:]:
+            t0 = time.perf_counter()
+            model(batch, conf=confidence, imgsz=imgsz, verbose=False)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+        summary = percentile_summary(latencies)
+        report['batches'].append({
+            'batch_size': batch_size,
+            'latency_ms': summary,
+            'images_per_s': round(batch_size * 1000 / summary['mean'], 2)
+        })
+    return report
+
+
+def print_backend(report):
+    if 'error' in report:
+        print(f"{report['backend']:<9} {report['error']}")
+        return
+    print(f"{report['backend']:<9} load {report['load_s']}s  ({report['served_path']})")
+    for batch in report['batches']:
+        latency = batch['latency_ms']
+        print(f"{'':<9} batch={batch['batch_size']:<3} mean={latency['mean']}ms p50={latency['p50']}ms "
+              f"p95={latency['p95']}ms  {batch['images_per_s']} img/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare inference backends on the same weights')
+    parser.add_argument('--model', help='Weights (default: YOLO_MODEL_PATH)')
+    parser.add_argument('--backends', default='pytorch,onnx,openvino', help='Comma separated backends')
+    parser.add_argument('--imgsz', type=int, help='Inference / export size (default: EXPORT_IMGSZ)')
+    parser.add_argument('--batch-sizes', default='1,4', help='Comma separated batch sizes')
+    parser.add_argument('--runs', type=int, default=20, help='Timed batches per batch size')
+    parser.add_argument('--warmup', type=int, default=3, help='Untimed batches per batch size')
+    parser.add_argument('--sizes', default='1280x720,1920x1080', help='Image sizes of the synthetic corpus')
+    parser.add_argument('--images-per-size', type=int, default=4)
+    parser.add_argument('--confidence', type=float, default=0.25)
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/backends-<timestamp>.json)')
+    args = parser.parse_args()
+
+    from config import Config
+    from services.model_exporter import ModelExporter
+
+    backends = [b.strip().lower() for b in args.backends.split(',') if b.strip()]
+    unknown = [b for b in backends if b not in ModelExporter.BACKENDS]
+    if unknown:
+        parser.error(f"Unknown backend(s): {', '.join(unknown)}")
+    model_path = args.model or Config.YOLO_MODEL_PATH
+    imgsz = args.imgsz or Config.EXPORT_IMGSZ
+    batch_sizes = [int(b) for b in args.batch_sizes.split(',')]
+
+    frames = []
+    for width, height in parse_sizes(args.sizes):
+        for i in range(args.images_per_size):
+            encoded = np.frombuffer(synthetic_image(width, height, i), np.uint8)
+            frames.append(cv2.imdecode(encoded, cv2.IMREAD_COLOR))
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'model': model_path,
+            'imgsz': imgsz,
+            'runs': args.runs
+        },
+        'backends': []
+    }
+
+    print("\n" + "=" * 60)
+    print(f"Backends for {model_path} (imgsz {imgsz})")
+    print("=" * 60)
+    for backend in backends:
+        try:
+            result = run_backend(backend, model_path, imgsz, frames, batch_sizes,
+                                 args.runs, args.warmup, args.confidence)
+        except Exception as e:
+            result = {'backend': backend, 'error': str(e)}
+        report['backends'].append(result)
+        print_backend(result)
+
+    output = Path(args.output) if args.output else \
+        ROOT / 'benchmarks' / 'results' / f"backends-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Load test and latency benchmark for the YOLO API
+
+Starts the Flask app in-process on a local port and drives /detect,
+/detect/hybrid and /detect/segment at several concurrency levels with a
+synthetic corpus of VR360 viewport-sized images. Reports p50/p95/p99
+latency, requests per second and a per-stage breakdown taken from the
+server's Server-Timing header, and writes everything to a JSON file that
+later runs can be compared against.
+
+Usage:
+    # No weights needed: a stub model simulates inference latency
+    python benchmarks/load_test.py --stub-model
+
+    # Real model, more load
+    python benchmarks/load_test.py --model yolov8s.pt --concurrency 1,4,8,16 --requests 200
+
+    # Compare with an earlier run (exit code 1 on regression)
+    python benchmarks/load_test.py --stub-model --compare benchmarks/results/baseline.json
+
+    # Benchmark an already running server (stages need SERVER_TIMING=True there)
+    python benchmarks/load_test.py --url http://127.0.0.1:5000
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from services.stage_timer import StageTimer
+
+ENDPOINTS = {
+    'detect': '/detect',
+    'hybrid': '/detect/hybrid',
+    'segment': '/detect/segment',
+}
+
+# Stages reported by the server, in pipeline order
+STAGES = ('queue', 'read', 'decode', 'convert', 'inference', 'frames', 'grabcut', 'postprocess', 'serialize')
+
+
+class StubBoxes:
+    def __init__(self, data):
+        self.data = data
+
+    def __len__(self):
+        return len(self.data)
+
+
+class StubResult:
+    def __init__(self, data, names):
+        self.boxes = StubBoxes(data)
+        self.masks = None
+        self.names = names
+
+
+class StubModel:
+    """
+    Stand-in for an ultralytics YOLO model
+
+    Sleeps to simulate a forward pass (a batch costs `latency_ms` plus 25%
+    per extra image) and returns deterministic random boxes. The sleep
+    releases the GIL like a GPU/CPU forward pass does.
+    """
+
+    task = 'detect'
+    names = {0: 'person', 1: 'chair', 2: 'couch', 3: 'potted plant', 4: 'vase', 5: 'tv'}
+
+    def __init__(self, latency_ms=20.0, boxes_per_image=5):
+        self.latency_ms = latency_ms
+        self.boxes_per_image = boxes_per_image
+
+    def __call__(self, source, conf=0.25, verbose=False, **kwargs):
+        images = source if isinstance(source, list) else [source]
+        time.sleep(self.latency_ms * (1 + 0.25 * (len(images) - 1)) / 1000.0)
+        return [self._result(image, conf) for image in images]
+
+    def _result(self, image, conf):
+        if isinstance(image, np.ndarray):
+            height, width = image.shape[:2]
+        else:
+            width, height = image.size
+
+        rng = np.random.default_rng(width * 100003 + height)
+        n = self.boxes_per_image
+        size = rng.uniform(0.05, 0.3, (n, 2)) * [width, height]
+        origin = rng.uniform(0, 1, (n, 2)) * ([width, height] - size)
+        data = np.empty((n, 6), dtype=np.float32)
+        data[:, 0:2] = origin
+        data[:, 2:4] = origin + size
+        data[:, 4] = rng.uniform(conf, 1.0, n)
+        data[:, 5] = rng.integers(0, len(self.names), n)
+        return StubResult(data, self.names)
+
+
+def parse_sizes(value):
+    sizes = []
+    for item in value.split(','):
+        width, height = item.lower().split('x')
+        sizes.append((int(width), int(height)))
+    return sizes
+
+
+def synthetic_image(width, height, seed):
+    """
+    A viewport-like JPEG: shaded wall, a few framed pictures and noise, so
+    decode cost and frame detection behave like real captures
+    """
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(150, 210, height, dtype=np.float32)[:, None, None]
+    tint = rng.uniform(0.85, 1.0, 3).astype(np.float32)
+    image = np.broadcast_to(gradient * tint, (height, width, 3)).copy()
+    image += rng.normal(0, 6, (height, width, 3)).astype(np.float32)
+    image = np.clip(image, 0, 255).astype(np.uint8)
+
+    for _ in range(rng.integers(3, 7)):
+        w = int(rng.uniform(0.08, 0.25) * width)
+        h = int(rng.uniform(0.1, 0.3) * height)
+        x = int(rng.uniform(0, width - w))
+        y = int(rng.uniform(0, height - h))
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.rectangle(image, (x, y), (x + w, y + h), color, -1)
+        cv2.rectangle(image, (x, y), (x + w, y + h), (40, 30, 20), max(3, w // 30))
+
+    ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return encoded.tobytes()
+
+
+def build_corpus(sizes, per_size):
+    corpus = []
+    for width, height in sizes:
+        for i in range(per_size):
+            corpus.append({
+                'name': f'synthetic_{width}x{height}_{i}.jpg',
+                'width': width,
+                'height': height,
+                'data': synthetic_image(width, height, seed=width * 31 + height * 7 + i)
+            })
+    return corpus
+
+
+def start_server(args):
+    """Import the app with benchmark settings and serve it on a free local port"""
+    os.environ['USE_NGROK'] = 'False'
+    os.environ['SERVER_TIMING'] = 'True'
+    os.environ['DEBUG_CAPTURE_ENABLED'] = 'False'
+    if not args.cache:
+        os.environ['RESULT_CACHE_MAX_ENTRIES'] = '0'
+    if args.model:
+        os.environ['YOLO_MODEL_PATH'] = args.model
+    if args.stub_model:
+        # Worker processes and exports would need real weights
+        os.environ['INFERENCE_WORKERS'] = '0'
+        os.environ['YOLO_BACKEND'] = 'pytorch'
+
+    from werkzeug.serving import make_server
+    from services.model_exporter import ModelExporter
+    from services.yolo_service import YoloService
+
+    if args.stub_model:
+        # Every model path (detection and segmentation) loads the stub
+        stub = StubModel(args.stub_latency_ms, args.stub_boxes)
+        ModelExporter._yolo = staticmethod(lambda model_path, task=None: stub)
+
+    from app import app
+
+    # Load the model before timing anything
+    YoloService.get_instance()
+
+    # Per-request access log lines would dominate the output
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def send(session, base_url, endpoint, image, confidence):
+    files = {'image': (image['name'], image['data'], 'image/jpeg')}
+    data = None
+    if endpoint == 'segment':
+        # Centered ROI covering a third of the view, like a click-to-segment
+        w, h = image['width'] // 3, image['height'] // 3
+        data = {'roi': json.dumps({'x': w, 'y': h, 'width': w, 'height': h})}
+
+    started = time.perf_counter()
+    response = session.post(f'{base_url}{ENDPOINTS[endpoint]}', params={'confidence': confidence},
+                            files=files, data=data, timeout=120)
+    latency_ms = (time.perf_counter() - started) * 1000
+
+    return {
+        'ok': response.status_code == 200,
+        'latency_ms': latency_ms,
+        'stages': StageTimer.parse_server_timing(response.headers.get('Server-Timing'))
+    }
+
+
+def percentile_summary(values):
+    if not values:
+        return None
+    values = np.asarray(values, dtype=np.float64)
+    return {
+        'mean': round(float(values.mean()), 2),
+        'p50': round(float(np.percentile(values, 50)), 2),
+        'p95': round(float(np.percentile(values, 95)), 2),
+        'p99': round(float(np.percentile(values, 99)), 2),
+        'max': round(float(values.max()), 2)
+    }
+
+
+def run_level(base_url, endpoint, concurrency, total_requests, corpus, confidence, warmup):
+    """Send `total_requests` requests from `concurrency` threads and summarize them"""
+    sessions = threading.local()
+    counter = iter(range(total_requests))
+    counter_lock = threading.Lock()
+    samples = []
+
+    def session():
+        if not hasattr(sessions, 'session'):
+            sessions.session = requests.Session()
+        return sessions.session
+
+    for i in range(warmup):
+        send(session(), base_url, endpoint, corpus[i % len(corpus)], confidence)
+
+    def worker():
+        local = []
+        while True:
+            with counter_lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            try:
+                local.append(send(session(), base_url, endpoint, corpus[i % len(corpus)], confidence))
+            except requests.RequestException as e:
+                local.append({'ok': False, 'latency_ms': None, 'stages': {}, 'error': str(e)})
+        return local
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for local in executor.map(lambda _: worker(), range(concurrency)):
+            samples.extend(local)
+    elapsed = time.perf_counter() - started
+
+    ok = [s for s in samples if s['ok']]
+    stages = {}
+    for name in STAGES + ('total',):
+        values = [s['stages'][name] for s in ok if name in s['stages']]
+        if values:
+            stages[name] = percentile_summary(values)
+
+    # Server time outside the named stages (routing, cache lookup, debug capture)
+    # and client time outside the server (HTTP, socket, multipart encoding)
+    other = [s['stages']['total'] - sum(s['stages'].get(name, 0.0) for name in STAGES)
+             for s in ok if 'total' in s['stages']]
+    transport = [s['latency_ms'] - s['stages']['total'] for s in ok if 'total' in s['stages']]
+    if other:
+        stages['other'] = percentile_summary(other)
+        stages['transport'] = percentile_summary(transport)
+
+    return {
+        'endpoint': endpoint,
+        'concurrency': concurrency,
+        'requests': len(samples),
+        'errors': len(samples) - len(ok),
+        'duration_s': round(elapsed, 3),
+        'rps': round(len(ok) / elapsed, 2) if elapsed > 0 else 0.0,
+        'latency_ms': percentile_summary([s['latency_ms'] for s in ok]),
+        'stages_ms': stages
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def print_run(run):
+    latency = run['latency_ms'] or {}
+    print(f"{run['endpoint']:<8} c={run['concurrency']:<3} "
+          f"rps={run['rps']:<8} p50={latency.get('p50')}ms p95={latency.get('p95')}ms "
+          f"p99={latency.get('p99')}ms errors={run['errors']}")
+    stages = run['stages_ms']
+    if stages:
+        parts = [f"{name}={stages[name]['p50']}" for name in STAGES + ('other', 'transport') if name in stages]
+        print(f"{'':<14}stage p50 (ms): {' '.join(parts)}")
+
+
+def compare(current, baseline_path, threshold):
+    """
+    Print p50/p95/rps changes against a previous results file
+
+    Returns:
+        True if any run regressed by more than `threshold` (fraction)
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(run['endpoint'], run['concurrency']): run for run in baseline.get('runs', [])}
+
+    print("\n" + "=" * 60)
+    print(f"Comparison with {baseline_path} (threshold {threshold:.0%})")
+    print("=" * 60)
+
+    regressed = False
+    for run in current['runs']:
+        old = previous.get((run['endpoint'], run['concurrency']))
+        if old is None or not old.get('latency_ms') or not run.get('latency_ms'):
+            continue
+
+        def change(new_value, old_value):
+            return (new_value - old_value) / old_value if old_value else 0.0
+
+        p50 = change(run['latency_ms']['p50'], old['latency_ms']['p50'])
+        p95 = change(run['latency_ms']['p95'], old['latency_ms']['p95'])
+        rps = change(run['rps'], old['rps'])
+        flag = p95 > threshold or rps < -threshold
+        regressed = regressed or flag
+        print(f"{run['endpoint']:<8} c={run['concurrency']:<3} p50 {p50:+.1%}  p95 {p95:+.1%}  "
+              f"rps {rps:+.1%}{'  <-- REGRESSION' if flag else ''}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the YOLO API endpoints')
+    parser.add_argument('--endpoints', default='detect,hybrid,segment',
+                        help='Comma separated: ' + ', '.join(ENDPOINTS))
+    parser.add_argument('--concurrency', default='1,4,8', help='Comma separated concurrency levels')
+    parser.add_argument('--requests', type=int, default=50, help='Requests per endpoint and concurrency level')
+    parser.add_argument('--warmup', type=int, default=3, help='Untimed requests before each level')
+    parser.add_argument('--sizes', default='1280x720,1920x1080,2560x1440',
+                        help='Image sizes of the synthetic corpus (WxH, comma separated)')
+    parser.add_argument('--images-per-size', type=int, default=4)
+    parser.add_argument('--confidence', type=float, default=0.25)
+    parser.add_argument('--model', help='Model weights (default: YOLO_MODEL_PATH)')
+    parser.add_argument('--stub-model', action='store_true', help='Use a stub model instead of real weights')
+    parser.add_argument('--stub-latency-ms', type=float, default=20.0, help='Simulated forward pass time')
+    parser.add_argument('--stub-boxes', type=int, default=5, help='Boxes returned per image by the stub')
+    parser.add_argument('--cache', action='store_true', help='Keep the result cache enabled')
+    parser.add_argument('--url', help='Benchmark a running server instead of starting one')
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='Previous results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative p95/rps change counted as a regression (default: 0.10)')
+    args = parser.parse_args()
+
+    endpoints = [e.strip() for e in args.endpoints.split(',') if e.strip()]
+    unknown = [e for e in endpoints if e not in ENDPOINTS]
+    if unknown:
+        parser.error(f"Unknown endpoint(s): {', '.join(unknown)}")
+    levels = [int(c) for c in args.concurrency.split(',')]
+    sizes = parse_sizes(args.sizes)
+
+    print(f"Building synthetic corpus: {len(sizes) * args.images_per_size} images")
+    corpus = build_corpus(sizes, args.images_per_size)
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+    else:
+        server, base_url = start_server(args)
+    print(f"Target: {base_url}")
+
+    from config import Config
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'target': args.url or 'in-process',
+            'model': 'stub' if args.stub_model else (args.model or (None if args.url else Config.YOLO_MODEL_PATH)),
+            'stub_latency_ms': args.stub_latency_ms if args.stub_model else None,
+            'result_cache': args.cache,
+            'batch_max_size': None if args.url else Config.BATCH_MAX_SIZE,
+            'inference_workers': None if args.url else Config.INFERENCE_WORKERS,
+            'sizes': [f'{w}x{h}' for w, h in sizes],
+            'requests_per_level': args.requests,
+            'confidence': args.confidence
+        },
+        'runs': []
+    }
+
+    print("\n" + "=" * 60)
+    print("Results")
+    print("=" * 60)
+    try:
+        for endpoint in endpoints:
+            for concurrency in levels:
+                run = run_level(base_url, endpoint, concurrency, args.requests, corpus,
+                                args.confidence, args.warmup)
+                report['runs'].append(run)
+                print_run(run)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    output = Path(args.output) if args.output else \
+        ROOT / 'benchmarks' / 'results' / f"benchmark-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare and compare(report, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
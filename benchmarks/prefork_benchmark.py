@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Pre-fork benchmark: single-process server vs prefork.py workers
+
+Starts the Flask server (`app.run`, one process) and the pre-fork launcher
+(gunicorn master + PREFORK_WORKERS forked workers) one after the other on
+a local port, and reports for each:
+
+- startup: seconds from launch until /ready answers 200 (every worker warm)
+- memory: RSS and PSS of every process after load. PSS splits shared pages
+  between the processes sharing them, so the PSS total is the real
+  footprint of the copy-on-write shared weights; the RSS total counts them
+  once per process
+- throughput: requests per second and latency percentiles at a fixed
+  concurrency, using the load test's synthetic corpus
+
+Memory figures need Linux (/proc/<pid>/smaps_rollup).
+
+Usage:
+    # No weights needed: a stub model simulates inference latency
+    python benchmarks/prefork_benchmark.py --stub-model
+
+    python benchmarks/prefork_benchmark.py --workers 4 --concurrency 16 --requests 400
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from load_test import StubModel, build_corpus, parse_sizes, run_level, print_run, git_commit
+
+MODES = ('single', 'prefork')
+MEMORY_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+
+def serve(args):
+    """Child process: run one server mode (settings arrive through the environment)"""
+    if args.stub_model:
+        from services.model_exporter import ModelExporter
+        stub = StubModel(args.stub_latency_ms, args.stub_boxes)
+        ModelExporter._yolo = staticmethod(lambda model_path, task=None: stub)
+
+    if args.serve == 'prefork':
+        import prefork
+        prefork.main()
+        return
+
+    from app import app
+    from services.model_warmup import ModelWarmup
+    ModelWarmup.get_instance().start()
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app.run(host='127.0.0.1', port=int(os.environ['PORT']), threaded=True)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(base_url, process, probes, timeout):
+    """Seconds until /ready answers 200 `probes` times in a row (requests land on random workers)"""
+    started = time.perf_counter()
+    streak = 0
+    while time.perf_counter() - started < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f'Server exited with code {process.returncode}')
+        try:
+            ready = requests.get(f'{base_url}/ready', timeout=5).status_code == 200
+        except requests.RequestException:
+            ready = False
+        streak = streak + 1 if ready else 0
+        if streak >= probes:
+            return round(time.perf_counter() - started, 2)
+        time.sleep(0.05 if ready else 0.2)
+    raise TimeoutError(f'Server not ready after {timeout}s')
+
+
+def process_tree(pid):
+    pids = [pid]
+    for current in pids:
+        for task in Path(f'/proc/{current}/task').glob('*'):
+            try:
+                pids += [int(child) for child in (task / 'children').read_text().split()]
+            except OSError:
+                pass
+    return pids
+
+
+def process_memory(pid):
+    """{field: MB} from /proc/<pid>/smaps_rollup, None where unavailable"""
+    try:
+        lines = Path(f'/proc/{pid}/smaps_rollup').read_text().splitlines()
+    except OSError:
+        return None
+    memory = {}
+    for line in lines:
+        name, _, value = line.partition(':')
+        if name in MEMORY_FIELDS:
+            memory[name.lower()] = round(int(value.split()[0]) / 1024, 1)
+    return memory
+
+
+def memory_report(root_pid, mode):
+    processes = []
+    for pid in process_tree(root_pid):
+        memory = process_memory(pid)
+        if memory is None:
+            continue
+        role = 'server' if mode == 'single' else ('master' if pid == root_pid else 'worker')
+        processes.append({'pid': pid, 'role': role, **memory})
+    if not processes:
+        return None
+    return {
+        'processes': processes,
+        'rss_total_mb': round(sum(p['rss'] for p in processes), 1),
+        'pss_total_mb': round(sum(p['pss'] for p in processes), 1)
+    }
+
+
+def run_mode(mode, args, corpus):
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    env = dict(os.environ,
+               USE_NGROK='False',
+               HOST='127.0.0.1',
+               PORT=str(port),
+               SERVER_TIMING='True',
+               RESULT_CACHE_MAX_ENTRIES='0',
+               DEBUG_CAPTURE_ENABLED='False',
+               # Inference processes would hold private model copies in both modes
+               INFERENCE_WORKERS='0',
+               PREFORK_WORKERS=str(args.workers),
+               PREFORK_TORCH_THREADS=str(args.torch_threads))
+    if args.model:
+        env['YOLO_MODEL_PATH'] = args.model
+    if args.stub_model:
+        env['YOLO_BACKEND'] = 'pytorch'
+
+    command = [sys.executable, __file__, '--serve', mode]
+    if args.stub_model:
+        command += ['--stub-model', '--stub-latency-ms', str(args.stub_latency_ms),
+                    '--stub-boxes', str(args.stub_boxes)]
+
+    launched = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL if not args.verbose else None,
+                               stderr=subprocess.DEVNULL if not args.verbose else None)
+    try:
+        probes = 1 if mode == 'single' else 3 * args.workers
+        startup_s = wait_ready(base_url, process, probes, args.startup_timeout)
+        memory_idle = memory_report(process.pid, mode)
+        run = run_level(base_url, args.endpoint, args.concurrency, args.requests,
+                        corpus, args.confidence, args.warmup)
+        return {
+            'mode': mode,
+            'workers': 1 if mode == 'single' else args.workers,
+            'startup_s': startup_s,
+            'memory_idle': memory_idle,
+            'memory_loaded': memory_report(process.pid, mode),
+            'run': run,
+            'launch_to_done_s': round(time.perf_counter() - launched, 2)
+        }
+    finally:
+        # SIGTERM: gunicorn shuts its workers down gracefully
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def print_mode(result):
+    print(f"\n{result['mode']} ({result['workers']} worker{'s' if result['workers'] > 1 else ''})")
+    print(f"  startup: {result['startup_s']}s until /ready")
+    memory = result['memory_loaded']
+    if memory:
+        print(f"  memory after load: RSS total {memory['rss_total_mb']}MB, PSS total {memory['pss_total_mb']}MB")
+        for process in memory['processes']:
+            print(f"    {process['role']:<7} pid {process['pid']:<7} RSS {process['rss']}MB  PSS {process['pss']}MB  "
+                  f"shared {round(process['shared_clean'] + process['shared_dirty'], 1)}MB")
+    else:
+        print("  memory: unavailable (needs /proc/<pid>/smaps_rollup)")
+    print('  ', end='')
+    print_run(result['run'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the single-process server with prefork.py')
+    parser.add_argument('--workers', type=int, default=0, help='Pre-fork worker processes (default: PREFORK_WORKERS)')
+    parser.add_argument('--torch-threads', type=int, default=0, help='Torch threads per worker (0 = cores / workers)')
+    parser.add_argument('--endpoint', default='detect', choices=['detect', 'hybrid', 'segment'])
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=3, help='Untimed requests before timing')
+    parser.add_argument('--sizes', default='1280x720,1920x1080', help='Image sizes of the synthetic corpus')
+    parser.add_argument('--images-per-size', type=int, default=4)
+    parser.add_argument('--confidence', type=float, default=0.25)
+    parser.add_argument('--model', help='Model weights (default: YOLO_MODEL_PATH)')
+    parser.add_argument('--stub-model', action='store_true', help='Use a stub model instead of real weights')
+    parser.add_argument('--stub-latency-ms', type=float, default=20.0, help='Simulated forward pass time')
+    parser.add_argument('--stub-boxes', type=int, default=5, help='Boxes returned per image by the stub')
+    parser.add_argument('--startup-timeout', type=float, default=300.0)
+    parser.add_argument('--verbose', action='store_true', help='Show the servers\' output')
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/prefork-<timestamp>.json)')
+    parser.add_argument('--serve', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    from config import Config
+    args.workers = args.workers or Config.prefork_workers()
+    corpus = build_corpus(parse_sizes(args.sizes), args.images_per_size)
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'model': 'stub' if args.stub_model else (args.model or os.getenv('YOLO_MODEL_PATH', 'yolov8n.pt')),
+            'endpoint': args.endpoint,
+            'concurrency': args.concurrency,
+            'requests': args.requests
+        },
+        'modes': []
+    }
+
+    print("\n" + "=" * 60)
+    print(f"Single process vs pre-fork ({args.workers} workers), /{args.endpoint} at concurrency {args.concurrency}")
+    print("=" * 60)
+    for mode in MODES:
+        result = run_mode(mode, args, corpus)
+        report['modes'].append(result)
+        print_mode(result)
+
+    single, forked = report['modes']
+    if single['run']['rps'] and forked['run']['rps']:
+        print(f"\nThroughput: {round(forked['run']['rps'] / single['run']['rps'], 2)}x with pre-fork")
+    if single['memory_loaded'] and forked['memory_loaded']:
+        print(f"Memory (PSS): {forked['memory_loaded']['pss_total_mb']}MB for {args.workers} workers vs "
+              f"{single['memory_loaded']['pss_total_mb']}MB for one process")
+
+    output = Path(args.output) if args.output else \
+        ROOT / 'benchmarks' / 'results' / f"prefork-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == '__main__':
+    main()
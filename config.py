@@ -24,10 +24,218 @@ class Config:
     HOST = os.getenv('HOST', '127.0.0.1')
     PORT = int(os.getenv('PORT', '5000'))
     DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
+    # Maximum request body size; /detect/batch uploads several images at once
+    MAX_UPLOAD_MB = float(os.getenv('MAX_UPLOAD_MB', '10'))
+    # Send per-stage durations (decode, inference, ...) in a Server-Timing header
+    SERVER_TIMING = os.getenv('SERVER_TIMING', 'False').lower() == 'true'
+    # Collect per-endpoint latency histograms for /metrics
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+    
+    # Async Serving Configuration (python asgi.py)
+    # Uploads are received on the event loop and at most ASYNC_WORKERS requests
+    # run in the Flask app at once; with ASYNC_QUEUE_SIZE more waiting, further
+    # requests get 503 + Retry-After: ASYNC_RETRY_AFTER. Bodies not received
+    # within ASYNC_BODY_TIMEOUT seconds get 408. ASYNC_MAX_CONNECTIONS caps
+    # open connections (0 = no limit).
+    ASYNC_WORKERS = int(os.getenv('ASYNC_WORKERS', '8'))
+    ASYNC_QUEUE_SIZE = int(os.getenv('ASYNC_QUEUE_SIZE', '64'))
+    ASYNC_BODY_TIMEOUT = float(os.getenv('ASYNC_BODY_TIMEOUT', '60'))
+    ASYNC_RETRY_AFTER = int(os.getenv('ASYNC_RETRY_AFTER', '1'))
+    ASYNC_MAX_CONNECTIONS = int(os.getenv('ASYNC_MAX_CONNECTIONS', '1000'))
+    
+    # Pre-fork Serving Configuration (python prefork.py, Linux/macOS)
+    # The master loads the models once and forks PREFORK_WORKERS processes that
+    # share the weights copy-on-write (0 = cores / 2). Each worker runs
+    # PREFORK_THREADS request threads and PREFORK_TORCH_THREADS torch threads
+    # (0 = cores / workers) and is replaced gracefully after
+    # PREFORK_MAX_REQUESTS requests plus up to PREFORK_MAX_REQUESTS_JITTER (0 = never).
+    PREFORK_WORKERS = int(os.getenv('PREFORK_WORKERS', '0'))
+    PREFORK_THREADS = int(os.getenv('PREFORK_THREADS', '4'))
+    PREFORK_TORCH_THREADS = int(os.getenv('PREFORK_TORCH_THREADS', '0'))
+    PREFORK_MAX_REQUESTS = int(os.getenv('PREFORK_MAX_REQUESTS', '1000'))
+    PREFORK_MAX_REQUESTS_JITTER = int(os.getenv('PREFORK_MAX_REQUESTS_JITTER', '100'))
+    PREFORK_TIMEOUT = int(os.getenv('PREFORK_TIMEOUT', '120'))
+    
+    # Admission Control Configuration (detection endpoints)
+    # Requests run in the 'interactive' or 'bulk' lane, picked by API key
+    # (ADMISSION_API_KEYS="key=bulk,...", X-API-Key header), else by the
+    # X-Priority header, else ADMISSION_DEFAULT_LANE. Each lane runs at most
+    # LANE_*_CONCURRENCY requests with LANE_*_QUEUE more waiting (503 +
+    # Retry-After beyond that); bulk admits nothing while interactive requests
+    # wait. Requests still queued after LANE_*_TIMEOUT seconds (or the client's
+    # X-Request-Timeout) are dropped with 504.
+    ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', 'True').lower() == 'true'
+    ADMISSION_DEFAULT_LANE = os.getenv('ADMISSION_DEFAULT_LANE', 'interactive').lower()
+    ADMISSION_API_KEYS = os.getenv('ADMISSION_API_KEYS', '')
+    ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '1'))
+    LANE_INTERACTIVE_CONCURRENCY = int(os.getenv('LANE_INTERACTIVE_CONCURRENCY', '8'))
+    LANE_INTERACTIVE_QUEUE = int(os.getenv('LANE_INTERACTIVE_QUEUE', '64'))
+    LANE_INTERACTIVE_TIMEOUT = float(os.getenv('LANE_INTERACTIVE_TIMEOUT', '30'))
+    LANE_BULK_CONCURRENCY = int(os.getenv('LANE_BULK_CONCURRENCY', '2'))
+    LANE_BULK_QUEUE = int(os.getenv('LANE_BULK_QUEUE', '256'))
+    LANE_BULK_TIMEOUT = float(os.getenv('LANE_BULK_TIMEOUT', '300'))
+    # Lanes are per process: under prefork.py each worker admits up to
+    # LANE_*_CONCURRENCY requests, so the server runs PREFORK_WORKERS times as
+    # many. Waiting there blocks one of the worker's PREFORK_THREADS threads;
+    # ADMISSION_RESERVED_THREADS of them are kept for interactive requests and
+    # bulk requests that would need one get 503 + Retry-After instead
+    ADMISSION_RESERVED_THREADS = int(os.getenv('ADMISSION_RESERVED_THREADS', '2'))
     
     # YOLO Model Configuration
     YOLO_MODEL_PATH = os.getenv('YOLO_MODEL_PATH', 'yolov8n.pt')
+    # Optional segmentation model for /detect/segment (e.g. yolov8n-seg.pt); its
+    # masks become polygons in one forward pass. Empty (default) = use
+    # YOLO_MODEL_PATH, with its boxes refined by GrabCut
+    YOLO_SEG_MODEL_PATH = os.getenv('YOLO_SEG_MODEL_PATH', '')
+    # Inference backend: 'pytorch', or 'onnx' / 'openvino' for faster CPU
+    # inference. .pt weights are exported once at EXPORT_IMGSZ and cached in
+    # EXPORT_DIR, keyed by a hash of the weights (re-exported when they change)
+    YOLO_BACKEND = os.getenv('YOLO_BACKEND', 'pytorch').lower()
+    EXPORT_DIR = os.getenv('EXPORT_DIR', 'exported_models')
+    EXPORT_IMGSZ = int(os.getenv('EXPORT_IMGSZ', '640'))
+    # Extra models selectable per request with ?model=<name>, as
+    # "name=path,name=path" (e.g. "large=yolov8l.pt"). 'default' is
+    # YOLO_MODEL_PATH and 'seg' is YOLO_SEG_MODEL_PATH. Models load on first
+    # use; least recently used ones are unloaded above MODEL_MEMORY_MB (0 = no cap)
+    MODELS = os.getenv('MODELS', '')
+    MODEL_MEMORY_MB = float(os.getenv('MODEL_MEMORY_MB', '2048'))
+    # Startup warm-up: models loaded and run on dummy frames in the background
+    # before /ready reports ready. WARMUP_SIZES defaults to the model input
+    # size plus the panorama tile and cube face sizes
+    WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'True').lower() == 'true'
+    WARMUP_MODELS = os.getenv('WARMUP_MODELS', 'default')
+    WARMUP_SIZES = os.getenv('WARMUP_SIZES', '')
+    WARMUP_PASSES = int(os.getenv('WARMUP_PASSES', '2'))
+    # Mask outline simplification tolerance, as a fraction of the box diagonal
+    SEGMENT_SIMPLIFY_TOLERANCE = float(os.getenv('SEGMENT_SIMPLIFY_TOLERANCE', '0.005'))
     CONFIDENCE_THRESHOLD = float(os.getenv('CONFIDENCE_THRESHOLD', '0.25'))
+    # JPEG uploads to /detect, /detect/hybrid and /detect/batch are decoded at
+    # 1/2, 1/4 or 1/8 scale while the long side stays >= DECODE_TARGET_SIZE
+    # (the model input size). Boxes are reported in original pixels. 0 = full decode
+    DECODE_TARGET_SIZE = int(os.getenv('DECODE_TARGET_SIZE', '640'))
+    
+    # Inference Batching Configuration
+    # Concurrent requests are grouped into one forward pass of up to
+    # BATCH_MAX_SIZE images, waiting at most BATCH_MAX_WAIT_MS for the batch
+    # to fill. Set BATCH_MAX_SIZE=1 to disable batching.
+    BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', '8'))
+    BATCH_MAX_WAIT_MS = float(os.getenv('BATCH_MAX_WAIT_MS', '10'))
+    # Zip archives sent to /detect/batch may hold at most BATCH_ARCHIVE_MAX_IMAGES
+    # images and expand to at most BATCH_ARCHIVE_MAX_MB in total (MAX_UPLOAD_MB
+    # per image); larger archives are rejected before anything is decompressed
+    BATCH_ARCHIVE_MAX_IMAGES = int(os.getenv('BATCH_ARCHIVE_MAX_IMAGES', '500'))
+    BATCH_ARCHIVE_MAX_MB = float(os.getenv('BATCH_ARCHIVE_MAX_MB', '500'))
+    
+    # Inference Worker Pool Configuration
+    # INFERENCE_WORKERS > 0 runs detection in that many separate processes,
+    # each with its own model copy. 0 keeps inference in the server process.
+    INFERENCE_WORKERS = int(os.getenv('INFERENCE_WORKERS', '0'))
+    INFERENCE_WORKER_THREADS = int(os.getenv('INFERENCE_WORKER_THREADS', '0'))  # 0 = cores / workers
+    INFERENCE_TIMEOUT = float(os.getenv('INFERENCE_TIMEOUT', '60'))
+    
+    # Hybrid Detection Configuration
+    # Run OpenCV frame detection on a shared thread pool while YOLO infers
+    HYBRID_PARALLEL = os.getenv('HYBRID_PARALLEL', 'True').lower() == 'true'
+    # Threads in the shared CPU task pool (0 = min(8, CPU count))
+    TASK_POOL_WORKERS = int(os.getenv('TASK_POOL_WORKERS', '0'))
+    # Picture frame candidates are searched on a pyramid level whose long side
+    # is at most FRAME_DETECT_MAX_SIZE; only windows around them are traced at
+    # full resolution, with the same frames found as with 0 (full image)
+    FRAME_DETECT_MAX_SIZE = int(os.getenv('FRAME_DETECT_MAX_SIZE', '640'))
+    # Time budget for GrabCut refinement of mask-less boxes in /detect/segment;
+    # boxes not refined in time are returned as plain boxes (0 = no limit)
+    GRABCUT_BUDGET_MS = float(os.getenv('GRABCUT_BUDGET_MS', '1500'))
+    
+    # Result Cache Configuration
+    # Responses are cached by a hash of the image bytes and request parameters.
+    # RESULT_CACHE_MAX_ENTRIES=0 disables the cache; RESULT_CACHE_TTL=0 means no expiry.
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '256'))
+    RESULT_CACHE_MAX_MB = float(os.getenv('RESULT_CACHE_MAX_MB', '64'))
+    RESULT_CACHE_TTL = float(os.getenv('RESULT_CACHE_TTL', '300'))
+    # Concurrent requests with identical image bytes + parameters share one
+    # in-flight detection instead of each running it (works with the cache off)
+    COALESCE_ENABLED = os.getenv('COALESCE_ENABLED', 'True').lower() == 'true'
+    
+    # URL Fetching Configuration (/detect/url)
+    # Images are downloaded over a pooled session, abandoned past FETCH_MAX_MB,
+    # and cached on disk (revalidated with ETag/Last-Modified) up to
+    # FETCH_CACHE_MAX_MB (0 disables the cache). One request may list up to
+    # FETCH_MAX_URLS urls, fetched FETCH_POOL_SIZE at a time. FETCH_TIMEOUT
+    # bounds the whole download, not just each socket read.
+    FETCH_TIMEOUT = float(os.getenv('FETCH_TIMEOUT', '10'))
+    FETCH_MAX_MB = float(os.getenv('FETCH_MAX_MB', '20'))
+    FETCH_POOL_SIZE = int(os.getenv('FETCH_POOL_SIZE', '16'))
+    FETCH_CACHE_DIR = os.getenv('FETCH_CACHE_DIR', 'url_cache')
+    FETCH_CACHE_MAX_MB = float(os.getenv('FETCH_CACHE_MAX_MB', '256'))
+    FETCH_MAX_URLS = int(os.getenv('FETCH_MAX_URLS', '32'))
+    
+    # Debug Capture Configuration
+    # When enabled, a sampled fraction of uploads is written (original bytes)
+    # to DEBUG_CAPTURE_DIR by a background thread, keeping at most
+    # DEBUG_CAPTURE_MAX_FILES files / DEBUG_CAPTURE_MAX_MB megabytes. Retention
+    # only counts and deletes files named like captures (<time>_<endpoint>_<seq>.*).
+    DEBUG_CAPTURE_ENABLED = os.getenv('DEBUG_CAPTURE_ENABLED', 'False').lower() == 'true'
+    DEBUG_CAPTURE_DIR = os.getenv('DEBUG_CAPTURE_DIR', 'debug_images')
+    DEBUG_CAPTURE_SAMPLE_RATE = float(os.getenv('DEBUG_CAPTURE_SAMPLE_RATE', '0.1'))
+    DEBUG_CAPTURE_QUEUE_SIZE = int(os.getenv('DEBUG_CAPTURE_QUEUE_SIZE', '32'))
+    DEBUG_CAPTURE_MAX_FILES = int(os.getenv('DEBUG_CAPTURE_MAX_FILES', '200'))
+    DEBUG_CAPTURE_MAX_MB = float(os.getenv('DEBUG_CAPTURE_MAX_MB', '200'))
+    
+    # Panorama Configuration (/detect/panorama)
+    # Equirectangular images are cut into PANORAMA_TILE_SIZE tiles overlapping
+    # by PANORAMA_TILE_OVERLAP pixels, run PANORAMA_MAX_BATCH tiles per forward pass
+    PANORAMA_TILE_SIZE = int(os.getenv('PANORAMA_TILE_SIZE', '640'))
+    PANORAMA_TILE_OVERLAP = int(os.getenv('PANORAMA_TILE_OVERLAP', '128'))
+    PANORAMA_MAX_BATCH = int(os.getenv('PANORAMA_MAX_BATCH', '16'))
+    # Cube face size for /detect/panorama?method=cubemap
+    CUBEMAP_FACE_SIZE = int(os.getenv('CUBEMAP_FACE_SIZE', '640'))
+    
+    @classmethod
+    def model_paths(cls):
+        """Selectable models as {name: path}"""
+        models = {
+            'default': cls.YOLO_MODEL_PATH,
+            'seg': cls.YOLO_SEG_MODEL_PATH or cls.YOLO_MODEL_PATH
+        }
+        for entry in cls.MODELS.split(','):
+            if entry.strip():
+                name, _, path = entry.partition('=')
+                models[name.strip()] = path.strip()
+        return models
+    
+    @classmethod
+    def warmup_models(cls):
+        """Model names to load at startup (none when warm-up is disabled)"""
+        if not cls.WARMUP_ENABLED:
+            return []
+        return [name.strip() for name in cls.WARMUP_MODELS.split(',') if name.strip()]
+    
+    @classmethod
+    def warmup_sizes(cls):
+        """Input sizes to run dummy forward passes at"""
+        if cls.WARMUP_SIZES.strip():
+            return [int(size) for size in cls.WARMUP_SIZES.split(',') if size.strip()]
+        return sorted({cls.EXPORT_IMGSZ, cls.PANORAMA_TILE_SIZE, cls.CUBEMAP_FACE_SIZE})
+    
+    @classmethod
+    def admission_api_keys(cls):
+        """API keys pinned to a lane as {key: lane}"""
+        keys = {}
+        for entry in cls.ADMISSION_API_KEYS.split(','):
+            if entry.strip():
+                key, _, lane = entry.partition('=')
+                keys[key.strip()] = lane.strip().lower()
+        return keys
+    
+    @classmethod
+    def prefork_workers(cls):
+        """Worker processes for prefork.py"""
+        return cls.PREFORK_WORKERS or max(1, (os.cpu_count() or 1) // 2)
+    
+    @classmethod
+    def prefork_torch_threads(cls):
+        """Torch threads per prefork.py worker, so workers don't oversubscribe the cores"""
+        return cls.PREFORK_TORCH_THREADS or max(1, (os.cpu_count() or 1) // cls.prefork_workers())
     
     @classmethod
     def validate(cls):
@@ -38,8 +246,105 @@ class Config:
         if cls.PORT < 1 or cls.PORT > 65535:
             raise ValueError(f"Invalid PORT: {cls.PORT}. Must be between 1-65535")
         
+        for entry in cls.MODELS.split(','):
+            name, sep, path = entry.partition('=')
+            if entry.strip() and (not sep or not name.strip() or not path.strip()):
+                raise ValueError(f"Invalid MODELS entry: '{entry}'. Expected name=path")
+        
+        if cls.YOLO_BACKEND not in ('pytorch', 'onnx', 'openvino'):
+            raise ValueError(f"Invalid YOLO_BACKEND: {cls.YOLO_BACKEND}. Must be pytorch, onnx or openvino")
+        
+        if cls.EXPORT_IMGSZ < 32:
+            raise ValueError(f"Invalid EXPORT_IMGSZ: {cls.EXPORT_IMGSZ}. Must be at least 32")
+        
+        unknown = [name for name in cls.warmup_models() if name not in cls.model_paths()]
+        if unknown:
+            raise ValueError(f"Invalid WARMUP_MODELS: {', '.join(unknown)}. Must be names from MODELS, 'default' or 'seg'")
+        
+        if cls.WARMUP_PASSES < 0 or any(size < 32 for size in cls.warmup_sizes()):
+            raise ValueError("Invalid warm-up settings. WARMUP_PASSES must be >= 0 and WARMUP_SIZES >= 32")
+        
+        if cls.MODEL_MEMORY_MB < 0:
+            raise ValueError(f"Invalid MODEL_MEMORY_MB: {cls.MODEL_MEMORY_MB}. Must be >= 0")
+        
+        if cls.SEGMENT_SIMPLIFY_TOLERANCE < 0:
+            raise ValueError(f"Invalid SEGMENT_SIMPLIFY_TOLERANCE: {cls.SEGMENT_SIMPLIFY_TOLERANCE}. Must be >= 0")
+        
+        if cls.DECODE_TARGET_SIZE < 0:
+            raise ValueError(f"Invalid DECODE_TARGET_SIZE: {cls.DECODE_TARGET_SIZE}. Must be >= 0")
+        
+        if cls.MAX_UPLOAD_MB <= 0:
+            raise ValueError(f"Invalid MAX_UPLOAD_MB: {cls.MAX_UPLOAD_MB}. Must be > 0")
+        
+        if cls.ASYNC_WORKERS < 1 or cls.ASYNC_QUEUE_SIZE < 0 or cls.ASYNC_BODY_TIMEOUT <= 0:
+            raise ValueError("Invalid async settings. ASYNC_WORKERS must be >= 1, ASYNC_QUEUE_SIZE >= 0 and ASYNC_BODY_TIMEOUT > 0")
+        
+        if cls.ASYNC_RETRY_AFTER < 0 or cls.ASYNC_MAX_CONNECTIONS < 0:
+            raise ValueError("Invalid async settings. ASYNC_RETRY_AFTER and ASYNC_MAX_CONNECTIONS must be >= 0")
+        
+        if cls.PREFORK_WORKERS < 0 or cls.PREFORK_TORCH_THREADS < 0 or cls.PREFORK_THREADS < 1 or cls.PREFORK_TIMEOUT < 1:
+            raise ValueError("Invalid prefork settings. PREFORK_WORKERS and PREFORK_TORCH_THREADS must be >= 0, PREFORK_THREADS and PREFORK_TIMEOUT >= 1")
+        
+        if cls.PREFORK_MAX_REQUESTS < 0 or cls.PREFORK_MAX_REQUESTS_JITTER < 0:
+            raise ValueError("Invalid prefork settings. PREFORK_MAX_REQUESTS and PREFORK_MAX_REQUESTS_JITTER must be >= 0")
+        
+        lanes = ('interactive', 'bulk')
+        if cls.ADMISSION_DEFAULT_LANE not in lanes or any(lane not in lanes for lane in cls.admission_api_keys().values()):
+            raise ValueError("Invalid admission lane. ADMISSION_DEFAULT_LANE and ADMISSION_API_KEYS lanes must be interactive or bulk")
+        
+        if min(cls.LANE_INTERACTIVE_CONCURRENCY, cls.LANE_BULK_CONCURRENCY) < 1 or min(cls.LANE_INTERACTIVE_QUEUE, cls.LANE_BULK_QUEUE) < 0:
+            raise ValueError("Invalid lane settings. LANE_*_CONCURRENCY must be >= 1 and LANE_*_QUEUE >= 0")
+        
+        if min(cls.LANE_INTERACTIVE_TIMEOUT, cls.LANE_BULK_TIMEOUT) <= 0 or cls.ADMISSION_RETRY_AFTER < 0:
+            raise ValueError("Invalid lane settings. LANE_*_TIMEOUT must be > 0 and ADMISSION_RETRY_AFTER >= 0")
+        
+        if not 0 <= cls.ADMISSION_RESERVED_THREADS < cls.PREFORK_THREADS:
+            raise ValueError("Invalid ADMISSION_RESERVED_THREADS. Must be >= 0 and less than PREFORK_THREADS")
+        
         if cls.CONFIDENCE_THRESHOLD < 0 or cls.CONFIDENCE_THRESHOLD > 1:
             raise ValueError(f"Invalid CONFIDENCE_THRESHOLD: {cls.CONFIDENCE_THRESHOLD}. Must be between 0-1")
+        
+        if cls.BATCH_MAX_SIZE < 1:
+            raise ValueError(f"Invalid BATCH_MAX_SIZE: {cls.BATCH_MAX_SIZE}. Must be at least 1")
+        
+        if cls.BATCH_MAX_WAIT_MS < 0:
+            raise ValueError(f"Invalid BATCH_MAX_WAIT_MS: {cls.BATCH_MAX_WAIT_MS}. Must be >= 0")
+        
+        if cls.BATCH_ARCHIVE_MAX_IMAGES < 1 or cls.BATCH_ARCHIVE_MAX_MB <= 0:
+            raise ValueError("Invalid archive limits. BATCH_ARCHIVE_MAX_IMAGES must be >= 1 and BATCH_ARCHIVE_MAX_MB > 0")
+        
+        if cls.INFERENCE_WORKERS < 0:
+            raise ValueError(f"Invalid INFERENCE_WORKERS: {cls.INFERENCE_WORKERS}. Must be >= 0")
+        
+        if cls.FRAME_DETECT_MAX_SIZE < 0:
+            raise ValueError(f"Invalid FRAME_DETECT_MAX_SIZE: {cls.FRAME_DETECT_MAX_SIZE}. Must be >= 0")
+        
+        if cls.GRABCUT_BUDGET_MS < 0:
+            raise ValueError(f"Invalid GRABCUT_BUDGET_MS: {cls.GRABCUT_BUDGET_MS}. Must be >= 0")
+        
+        if cls.TASK_POOL_WORKERS < 0:
+            raise ValueError(f"Invalid TASK_POOL_WORKERS: {cls.TASK_POOL_WORKERS}. Must be >= 0")
+        
+        if cls.RESULT_CACHE_MAX_ENTRIES < 0 or cls.RESULT_CACHE_MAX_MB < 0 or cls.RESULT_CACHE_TTL < 0:
+            raise ValueError("Invalid result cache settings. RESULT_CACHE_* values must be >= 0")
+        
+        if cls.FETCH_TIMEOUT <= 0 or cls.FETCH_MAX_MB <= 0 or cls.FETCH_POOL_SIZE < 1 or cls.FETCH_MAX_URLS < 1:
+            raise ValueError("Invalid fetch settings. FETCH_TIMEOUT and FETCH_MAX_MB must be > 0, FETCH_POOL_SIZE and FETCH_MAX_URLS >= 1")
+        
+        if cls.FETCH_CACHE_MAX_MB < 0:
+            raise ValueError(f"Invalid FETCH_CACHE_MAX_MB: {cls.FETCH_CACHE_MAX_MB}. Must be >= 0")
+        
+        if cls.DEBUG_CAPTURE_SAMPLE_RATE < 0 or cls.DEBUG_CAPTURE_SAMPLE_RATE > 1:
+            raise ValueError(f"Invalid DEBUG_CAPTURE_SAMPLE_RATE: {cls.DEBUG_CAPTURE_SAMPLE_RATE}. Must be between 0-1")
+        
+        if cls.DEBUG_CAPTURE_QUEUE_SIZE < 1:
+            raise ValueError(f"Invalid DEBUG_CAPTURE_QUEUE_SIZE: {cls.DEBUG_CAPTURE_QUEUE_SIZE}. Must be at least 1")
+        
+        if cls.PANORAMA_TILE_OVERLAP < 0 or cls.PANORAMA_TILE_OVERLAP >= cls.PANORAMA_TILE_SIZE:
+            raise ValueError(f"Invalid PANORAMA_TILE_OVERLAP: {cls.PANORAMA_TILE_OVERLAP}. Must be between 0 and PANORAMA_TILE_SIZE")
+        
+        if cls.PANORAMA_MAX_BATCH < 1:
+            raise ValueError(f"Invalid PANORAMA_MAX_BATCH: {cls.PANORAMA_MAX_BATCH}. Must be at least 1")
     
     @classmethod
     def display(cls):
@@ -50,8 +355,36 @@ class Config:
         print(f"Host: {cls.HOST}")
         print(f"Port: {cls.PORT}")
         print(f"Debug: {cls.DEBUG}")
+        print(f"Max Upload: {cls.MAX_UPLOAD_MB:g}MB")
+        print(f"Server-Timing Header: {cls.SERVER_TIMING}")
+        print(f"Metrics: {'/metrics' if cls.METRICS_ENABLED else 'disabled'}")
+        print(f"Async Serving (asgi.py): {cls.ASYNC_WORKERS} workers, queue {cls.ASYNC_QUEUE_SIZE}, upload timeout {cls.ASYNC_BODY_TIMEOUT:g}s")
+        if cls.ADMISSION_ENABLED:
+            print(f"Admission: interactive {cls.LANE_INTERACTIVE_CONCURRENCY} running / {cls.LANE_INTERACTIVE_QUEUE} queued / {cls.LANE_INTERACTIVE_TIMEOUT:g}s, "
+                  f"bulk {cls.LANE_BULK_CONCURRENCY} / {cls.LANE_BULK_QUEUE} / {cls.LANE_BULK_TIMEOUT:g}s (default {cls.ADMISSION_DEFAULT_LANE})")
+        else:
+            print("Admission: disabled")
+        print(f"Pre-fork Serving (prefork.py): {cls.prefork_workers()} workers x {cls.PREFORK_THREADS} threads, {cls.prefork_torch_threads()} torch threads, restart after {cls.PREFORK_MAX_REQUESTS or 'unlimited'} requests")
         print(f"Model: {cls.YOLO_MODEL_PATH}")
+        print(f"Segmentation Model: {cls.YOLO_SEG_MODEL_PATH or cls.YOLO_MODEL_PATH + ' (GrabCut refinement)'}")
+        print(f"Backend: {cls.YOLO_BACKEND}" + (f" (exports in {cls.EXPORT_DIR}, imgsz {cls.EXPORT_IMGSZ})" if cls.YOLO_BACKEND != 'pytorch' else ''))
+        print(f"Selectable Models: {', '.join(f'{name}={path}' for name, path in cls.model_paths().items())}")
+        print(f"Model Memory Cap: {f'{cls.MODEL_MEMORY_MB:g}MB' if cls.MODEL_MEMORY_MB else 'unlimited'}")
         print(f"Confidence Threshold: {cls.CONFIDENCE_THRESHOLD}")
+        if cls.WARMUP_ENABLED:
+            print(f"Warm-up: {', '.join(cls.warmup_models())} at {', '.join(map(str, cls.warmup_sizes()))}px x{cls.WARMUP_PASSES}")
+        else:
+            print("Warm-up: disabled (models load on first request)")
+        print(f"Reduced JPEG Decode: {f'long side >= {cls.DECODE_TARGET_SIZE}px' if cls.DECODE_TARGET_SIZE else 'disabled'}")
+        print(f"Batching: max {cls.BATCH_MAX_SIZE} images / {cls.BATCH_MAX_WAIT_MS}ms")
+        print(f"Inference Workers: {cls.INFERENCE_WORKERS or 'in-process'}")
+        print(f"Hybrid Frame Detection: {'parallel' if cls.HYBRID_PARALLEL else 'sequential'} (task pool: {cls.TASK_POOL_WORKERS or 'auto'} threads)")
+        print(f"GrabCut Budget: {f'{cls.GRABCUT_BUDGET_MS:g}ms' if cls.GRABCUT_BUDGET_MS else 'unlimited'}")
+        print(f"Result Cache: {cls.RESULT_CACHE_MAX_ENTRIES} entries / {cls.RESULT_CACHE_MAX_MB}MB / TTL {cls.RESULT_CACHE_TTL}s")
+        print(f"Request Coalescing: {'enabled' if cls.COALESCE_ENABLED else 'disabled'}")
+        print(f"URL Fetch: {cls.FETCH_POOL_SIZE} connections, {cls.FETCH_MAX_MB:g}MB max, cache {f'{cls.FETCH_CACHE_MAX_MB:g}MB in {cls.FETCH_CACHE_DIR}' if cls.FETCH_CACHE_MAX_MB else 'disabled'}")
+        if cls.DEBUG_CAPTURE_ENABLED:
+            print(f"Debug Capture: {cls.DEBUG_CAPTURE_SAMPLE_RATE:.0%} of requests -> {cls.DEBUG_CAPTURE_DIR}")
         print(f"Use Ngrok: {cls.USE_NGROK}")
         if cls.USE_NGROK:
             masked_token = cls.NGROK_AUTH_TOKEN[:8] + "..." + cls.NGROK_AUTH_TOKEN[-8:] if len(cls.NGROK_AUTH_TOKEN) > 16 else "***"
@@ -1,5 +1,97 @@
 // YOLOv12 API Detection Module
 
+// Compact response formats (see ResultEncoder in services/result_encoder.py)
+const YOLO_BINARY_MIMETYPE = 'application/octet-stream';
+const YOLO_COLUMNAR_MIMETYPE = 'application/vnd.yolo.columnar+json';
+
+// Expand parallel columns into the regular per-detection response shape.
+// corners: { indices, points, stride } where each entry is the box index
+// followed by x, y of four corners (clockwise from top-left)
+function expandColumnarDetections(header, boxes, scores, classIds, stride, corners) {
+  const classes = header.classes || {};
+  const yoloCount = header.yolo_count;
+  const detections = new Array(scores.length);
+
+  for (let i = 0; i < scores.length; i++) {
+    const o = i * stride;
+    const x1 = boxes[o], y1 = boxes[o + 1], x2 = boxes[o + 2], y2 = boxes[o + 3];
+    const detection = {
+      class: classes[String(classIds[i])],
+      class_id: classIds[i],
+      confidence: scores[i],
+      bbox: { x1, y1, x2, y2, width: x2 - x1, height: y2 - y1 }
+    };
+    if (yoloCount !== undefined) {
+      detection.source = i < yoloCount ? 'yolo' : 'opencv';
+    }
+    detections[i] = detection;
+  }
+
+  if (corners) {
+    for (let k = 0; k < corners.indices.length; k++) {
+      const o = k * corners.stride;
+      const p = corners.points;
+      detections[corners.indices[k]].corners = [
+        { x: p[o], y: p[o + 1] }, { x: p[o + 2], y: p[o + 3] },
+        { x: p[o + 4], y: p[o + 5] }, { x: p[o + 6], y: p[o + 7] }
+      ];
+    }
+  }
+
+  return { ...header, detections_count: detections.length, detections };
+}
+
+// Decode a columnar JSON body: { boxes: [x1, y1, x2, y2, ...], scores, class_ids, classes }
+// plus, for picture frames, corners: { indices, points: [x, y] * 4 per entry }
+function decodeYOLOColumnarResponse(body) {
+  const { boxes, scores, class_ids: classIds, corners, ...header } = body;
+  return expandColumnarDetections(header, boxes, scores, classIds, 4,
+    corners && { indices: corners.indices, points: corners.points, stride: 8 });
+}
+
+// Decode a binary body: uint32 header length, JSON header, float32 rows of
+// [x1, y1, x2, y2, score, class_id], then float32 corner rows of
+// [box index, x, y * 4]
+function decodeYOLOBinaryResponse(buffer) {
+  const view = new DataView(buffer);
+  const headerLength = view.getUint32(0, true);
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 4, headerLength)));
+  const count = header.detections_count;
+  const rows = new Float32Array(buffer, 4 + headerLength, count * 6);
+
+  const scores = new Array(count);
+  const classIds = new Array(count);
+  for (let i = 0; i < count; i++) {
+    scores[i] = rows[i * 6 + 4];
+    classIds[i] = Math.round(rows[i * 6 + 5]);
+  }
+
+  let corners;
+  const cornersCount = header.corners_count || 0;
+  if (cornersCount) {
+    const cornerRows = new Float32Array(buffer, 4 + headerLength + count * 24, cornersCount * 9);
+    const indices = new Array(cornersCount);
+    for (let k = 0; k < cornersCount; k++) {
+      indices[k] = Math.round(cornerRows[k * 9]);
+    }
+    corners = { indices, points: cornerRows.subarray(1), stride: 9 };
+  }
+
+  return expandColumnarDetections(header, rows, scores, classIds, 6, corners);
+}
+
+// Parse a detection response in whichever format the server answered with
+async function parseYOLOResponse(response) {
+  const contentType = response.headers.get('Content-Type') || '';
+  if (contentType.includes(YOLO_BINARY_MIMETYPE)) {
+    return decodeYOLOBinaryResponse(await response.arrayBuffer());
+  }
+  if (contentType.includes(YOLO_COLUMNAR_MIMETYPE)) {
+    return decodeYOLOColumnarResponse(await response.json());
+  }
+  return response.json();
+}
+
 async function detectWithYOLO(base64Image, apiUrl) {
   // Require ngrok URL (localhost won't work due to CSP restrictions)
   if (!apiUrl || apiUrl.trim() === '') {
@@ -36,8 +128,10 @@ async function detectWithYOLO(base64Image, apiUrl) {
   formData.append('image', blob, 'screenshot.jpg');
   
   try {
+    // Ask for the packed binary format; servers without it still answer with JSON
     const response = await fetch(apiUrl, {
       method: 'POST',
+      headers: { 'Accept': YOLO_BINARY_MIMETYPE + ', application/json;q=0.9' },
       body: formData
     });
     
@@ -62,7 +156,7 @@ async function detectWithYOLO(base64Image, apiUrl) {
       }
     }
     
-    const result = await response.json();
+    const result = await parseYOLOResponse(response);
     
     if (!result.success) {
       throw new Error(result.error || 'Unknown error from YOLO API');
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Production launcher: pre-forked gunicorn workers sharing one model load
+
+The master process imports the app and loads the model weights once
+(YoloService.preload), then forks PREFORK_WORKERS workers. Forked workers
+share the weight pages copy-on-write, so N workers cost far less than N
+model copies and a replacement worker starts without reloading weights.
+Each worker pins its torch thread count so the workers together don't
+oversubscribe the cores, warms its models in the background, and is
+replaced gracefully after PREFORK_MAX_REQUESTS requests to limit memory
+creep. Admission lanes are per worker, with ADMISSION_RESERVED_THREADS of
+each worker's threads kept for interactive requests. Linux/macOS only (gunicorn):
+
+    pip install gunicorn
+    python prefork.py
+"""
+
+import gc
+import os
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:
+    print("❌ The pre-fork launcher needs gunicorn (Linux/macOS): pip install gunicorn")
+    raise SystemExit(1)
+
+from config import Config
+
+
+def _set_torch_threads(threads):
+    try:
+        import torch
+    except ImportError:
+        # Exported ONNX/OpenVINO serving without torch installed
+        return
+    torch.set_num_threads(threads)
+
+
+def load_app():
+    """Import the app and preload the models in the master, before any fork"""
+    # A single thread keeps loading (and a one-time export) from starting
+    # torch's OpenMP pool in the master; forked children can't use its threads
+    _set_torch_threads(1)
+
+    from app import app
+    from services.yolo_service import YoloService
+
+    YoloService.preload(Config.warmup_models() or ['default'])
+    # Move everything loaded so far out of the garbage collector's reach, so
+    # collections in the workers don't write to (and un-share) those pages
+    gc.freeze()
+    return app
+
+
+def post_fork(server, worker):
+    _set_torch_threads(Config.prefork_torch_threads())
+    from services.admission import AdmissionController
+    # Requests waiting for a lane slot block one of this worker's threads
+    AdmissionController.get_instance().reserve_threads(Config.PREFORK_THREADS, Config.ADMISSION_RESERVED_THREADS)
+
+
+def post_worker_init(worker):
+    from services.model_warmup import ModelWarmup
+    # Each worker runs its own warm-up passes: lazy predictor setup and first-call
+    # kernel initialization happen per process
+    ModelWarmup.get_instance().start()
+
+
+class PreforkServer(BaseApplication):
+    """gunicorn application configured from Config instead of the command line"""
+
+    def __init__(self, loader=load_app):
+        self.loader = loader
+        super().__init__()
+
+    def load_config(self):
+        options = {
+            'bind': f'{Config.HOST}:{Config.PORT}',
+            'workers': Config.prefork_workers(),
+            'worker_class': 'gthread',
+            'threads': Config.PREFORK_THREADS,
+            'preload_app': True,
+            'max_requests': Config.PREFORK_MAX_REQUESTS,
+            'max_requests_jitter': Config.PREFORK_MAX_REQUESTS_JITTER,
+            'timeout': Config.PREFORK_TIMEOUT,
+            'graceful_timeout': Config.PREFORK_TIMEOUT,
+            'loglevel': 'debug' if Config.DEBUG else 'info',
+            'post_fork': post_fork,
+            'post_worker_init': post_worker_init
+        }
+        for key, value in options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.loader()
+
+
+def main():
+    if Config.INFERENCE_WORKERS > 0:
+        print(f"⚠️ INFERENCE_WORKERS={Config.INFERENCE_WORKERS}: every pre-forked worker starts its own "
+              f"inference processes with private model copies; set INFERENCE_WORKERS=0 to share weights")
+
+    print(f"\n{'='*60}")
+    print(f"🚀 Starting YOLOv12 Object Detection API Server (pre-fork)")
+    print(f"{'='*60}")
+    print(f"Local URL: http://{Config.HOST}:{Config.PORT}")
+    print(f"Workers: {Config.prefork_workers()} x {Config.PREFORK_THREADS} threads, "
+          f"{Config.prefork_torch_threads()} torch threads each (PID {os.getpid()} is the master)")
+    if Config.ADMISSION_ENABLED:
+        workers = Config.prefork_workers()
+        print(f"Admission lanes are per worker: up to {workers * Config.LANE_INTERACTIVE_CONCURRENCY} interactive and "
+              f"{workers * Config.LANE_BULK_CONCURRENCY} bulk requests run at once, "
+              f"{Config.ADMISSION_RESERVED_THREADS} threads per worker kept for interactive")
+    print(f"{'='*60}\n")
+
+    PreforkServer().run()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,212 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context, g
 from config import Config
 from services.yolo_service import YoloService
+from services.model_registry import UnknownModelError
 from services.image_service import ImageService
-from PIL import Image
+from services.result_encoder import ResultEncoder
+from services.result_cache import ResultCache
+from services.debug_capture import DebugCapture
+from services.panorama_service import PanoramaService
+from services.stage_timer import StageTimer
+from services.image_decoder import ImageDecoder
+from services.task_pool import TaskPool
+from services.url_fetcher import UrlFetcher, FetchError
+from services.grabcut_refiner import GrabCutRefiner
+from services.admission import AdmissionController, AdmissionRejected, DeadlineExceeded, ADMITTED_ENVIRON_KEY
+from services.request_coalescer import RequestCoalescer
 import io
+import json
+import time
 import traceback
-import os
+import zipfile
+import numpy as np
 
 detection_bp = Blueprint('detection', __name__)
 
+RESPONSE_FORMATS = ('json', 'columnar', 'binary')
+
+
+def _response_format():
+    """
+    Pick the response encoding for /detect and /detect/hybrid.
+    `?format=` wins over the Accept header; returns None for an unknown format.
+    """
+    fmt = request.args.get('format')
+    if fmt:
+        fmt = fmt.lower()
+        return fmt if fmt in RESPONSE_FORMATS else None
+
+    accept = request.headers.get('Accept', '')
+    if ResultEncoder.BINARY_MIMETYPE in accept:
+        return 'binary'
+    if ResultEncoder.COLUMNAR_MIMETYPE in accept:
+        return 'columnar'
+    return 'json'
+
+
+def _invalid_format_response():
+    return jsonify({
+        'error': 'Invalid format',
+        'message': f'format must be one of: {", ".join(RESPONSE_FORMATS)}'
+    }), 400
+
+
+def _requested_model(name=None, default='default'):
+    """
+    Model path for the request's `model` parameter (query param unless `name`
+    is given), or None for a model that is not configured or not a string.
+    """
+    if name is not None and not isinstance(name, str):
+        # JSON bodies (/detect/url) can carry numbers, lists, ... as the model
+        return None
+    name = name or request.args.get('model') or default
+    try:
+        return YoloService.registry().resolve(name)
+    except UnknownModelError:
+        return None
+
+
+def _invalid_model_response():
+    return jsonify({
+        'error': 'Invalid model',
+        'message': f'model must be one of: {", ".join(YoloService.registry().models)}'
+    }), 400
+
+
+@detection_bp.before_request
+def admit_request():
+    """
+    Hold a slot of the request's priority lane while it runs; requests wait
+    here in FIFO order and are dropped once their deadline has passed
+    """
+    controller = AdmissionController.get_instance()
+    # CORS preflights don't run any detection
+    if not controller.enabled or request.method == 'OPTIONS':
+        return None
+
+    admitted = request.environ.get(ADMITTED_ENVIRON_KEY)
+    if admitted is not None:
+        # AsyncGateway already waited for the slot and releases it when the
+        # response has been sent
+        StageTimer.record('queue', admitted['wait_ms'])
+        g.admission_deadline = admitted['deadline']
+        return None
+
+    lane = controller.lane_for(request.headers)
+    if lane is None:
+        return jsonify({
+            'error': 'Invalid priority',
+            'message': f'X-Priority must be one of: {", ".join(controller.lanes)}'
+        }), 400
+
+    try:
+        timeout = controller.timeout_for(lane, request.headers)
+    except ValueError:
+        return jsonify({
+            'error': 'Invalid timeout',
+            'message': 'X-Request-Timeout must be a finite number of seconds'
+        }), 400
+
+    deadline = time.monotonic() + timeout
+    try:
+        with StageTimer.stage('queue'):
+            controller.acquire(lane, deadline)
+    except AdmissionRejected as e:
+        return _admission_response(e)
+    g.admission_lane = lane
+    g.admission_deadline = deadline
+    return None
+
+
+@detection_bp.after_request
+def hold_admission_while_streaming(response):
+    # Flask tears the request down before a streamed body (/detect/batch) is
+    # produced; keep the slot until the server closes the stream instead
+    lane = g.get('admission_lane') if response.is_streamed else None
+    if lane is not None:
+        g.pop('admission_lane')
+        response.call_on_close(lambda: AdmissionController.get_instance().release(lane))
+    return response
+
+
+@detection_bp.teardown_request
+def release_admission(exc):
+    lane = g.pop('admission_lane', None)
+    if lane is not None:
+        AdmissionController.get_instance().release(lane)
+
+
+def _admission_response(e):
+    response = jsonify(e.response_body())
+    response.status_code = e.status_code
+    if e.retry_after is not None:
+        response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+
+def _columnar_response(fmt, meta, xyxy, conf, cls, names, corners=None):
+    """
+    Encode boxes as parallel arrays (columnar) or a packed float32 buffer (binary),
+    with the picture frame `corners` (indices, points) when given
+    """
+    if fmt == 'binary':
+        header = dict(meta, format='binary', classes=ResultEncoder.class_table(cls, names))
+        response = Response(ResultEncoder.pack_binary(header, xyxy, conf, cls, corners),
+                            mimetype=ResultEncoder.BINARY_MIMETYPE)
+    else:
+        body = dict(meta, format='columnar', **ResultEncoder.to_columnar(xyxy, conf, cls, names, corners))
+        response = Response(json.dumps(body, separators=(',', ':')),
+                            mimetype=ResultEncoder.COLUMNAR_MIMETYPE)
+    response.headers['Vary'] = 'Accept'
+    return response
+
+
+def _cached_response(endpoint, image_bytes, params, build_response, cacheable=True):
+    """
+    Serve a response from the result cache, or build it with `build_response()`
+    and cache it when it succeeded. Identical requests arriving while it is
+    being built wait for that build instead of repeating it (RequestCoalescer).
+    How the response was served is reported in `X-Cache`: HIT, MISS or COALESCED.
+
+    Args:
+        cacheable: False to only coalesce, e.g. when `image_bytes` does not
+                   identify the content
+    """
+    cache = ResultCache.get_instance()
+    use_cache = cacheable and cache.enabled
+    key = ResultCache.make_key(endpoint, image_bytes, params)
+    if use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            return _replayed_response(cached.body, cached.mimetype, 'HIT')
+
+    def build():
+        response = build_response()
+        if not isinstance(response, Response) or response.status_code != 200:
+            # Errors are not shared; waiting duplicates build their own
+            return response, None
+        body = response.get_data()
+        if use_cache:
+            cache.put(key, body, response.mimetype)
+            response.headers['X-Cache'] = 'MISS'
+        return response, (body, response.mimetype)
+
+    # Waiting for an identical request ends at this request's own deadline
+    response, coalesced = RequestCoalescer.get_instance().run(key, build, deadline=g.get('admission_deadline'))
+    if coalesced:
+        body, mimetype = response
+        return _replayed_response(body, mimetype, 'COALESCED')
+    return response
+
+
+def _replayed_response(body, mimetype, cache_status):
+    """A fresh response carrying an already encoded body"""
+    response = Response(body, mimetype=mimetype)
+    response.headers['X-Cache'] = cache_status
+    response.headers['Vary'] = 'Accept'
+    return response
+
+
 @detection_bp.route('/detect', methods=['POST'])
 def detect_objects():
     """
@@ -17,8 +215,10 @@ def detect_objects():
     Returns: JSON with detected objects
     """
     try:
-        # Check if image is in request
-        if 'image' not in request.files:
+        # Check if image is in request (parses the multipart body)
+        with StageTimer.stage('read'):
+            has_image = 'image' in request.files
+        if not has_image:
             return jsonify({
                 'error': 'No image provided',
                 'message': 'Please upload an image file with key "image"'
@@ -34,61 +234,26 @@ def detect_objects():
 
         # Get confidence threshold from query params if provided
         confidence = float(request.args.get('confidence', Config.CONFIDENCE_THRESHOLD))
+        response_format = _response_format()
+        if response_format is None:
+            return _invalid_format_response()
+        model = _requested_model()
+        if model is None:
+            return _invalid_model_response()
         
         # Read image
-        image_bytes = file.read()
-        image = Image.open(io.BytesIO(image_bytes))
-        
-        # Convert to RGB if necessary
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # Run inference
-        yolo_service = YoloService.get_instance()
-        results = yolo_service.detect(image, confidence=confidence)
-        
-        # Process results
-        detections = []
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                # Get box coordinates
-                x1, y1, x2, y2 = box.xyxy[0].tolist()
-                
-                # Get confidence and class
-                conf = float(box.conf[0])
-                cls = int(box.cls[0])
-                class_name = yolo_service.names[cls]
-                
-                detection = {
-                    'class': class_name,
-                    'class_id': cls,
-                    'confidence': round(conf, 4),
-                    'bbox': {
-                        'x1': round(x1, 2),
-                        'y1': round(y1, 2),
-                        'x2': round(x2, 2),
-                        'y2': round(y2, 2),
-                        'width': round(x2 - x1, 2),
-                        'height': round(y2 - y1, 2)
-                    }
-                }
-                detections.append(detection)
+        with StageTimer.stage('read'):
+            image_bytes = file.read()
+        DebugCapture.get_instance().capture('detect', image_bytes, {'confidence': confidence, 'model': model})
         
-        # Prepare response
-        response = {
-            'success': True,
-            'image_size': {
-                'width': image.width,
-                'height': image.height
-            },
-            'detections_count': len(detections),
-            'detections': detections,
-            'confidence_threshold': confidence
-        }
-        
-        return jsonify(response)
+        return _cached_response(
+            'detect', image_bytes,
+            {'confidence': confidence, 'format': response_format, 'model': model},
+            lambda: _detect_response(image_bytes, confidence, response_format, model)
+        )
     
+    except DeadlineExceeded as e:
+        return _admission_response(e)
     except Exception as e:
         error_trace = traceback.format_exc()
         print(f"Error during detection: {error_trace}")
@@ -99,64 +264,107 @@ def detect_objects():
         }), 500
 
 
+def _detect_response(image_bytes, confidence, response_format, model=None):
+    """Run /detect on raw image bytes and build the response"""
+    # Decode straight to (about) the model input size; boxes are scaled back
+    decoded = ImageDecoder.decode(image_bytes, target_size=Config.DECODE_TARGET_SIZE)
+
+    # Run inference
+    yolo_service = YoloService.get_instance(model)
+    with StageTimer.stage('inference'):
+        results = yolo_service.detect(decoded.frame.bgr, confidence=confidence)
+    
+    with StageTimer.stage('postprocess'):
+        xyxy, conf, cls = ResultEncoder.extract(results)
+        xyxy = decoded.to_original(xyxy)
+
+    if response_format != 'json':
+        meta = {
+            'success': True,
+            'image_size': {'width': decoded.width, 'height': decoded.height},
+            'confidence_threshold': confidence
+        }
+        with StageTimer.stage('serialize'):
+            return _columnar_response(response_format, meta, xyxy, conf, cls, yolo_service.names)
+
+    # Process results
+    with StageTimer.stage('postprocess'):
+        detections = ResultEncoder.to_detections(xyxy, conf, cls, yolo_service.names)
+
+    # Prepare response
+    response = {
+        'success': True,
+        'image_size': {
+            'width': decoded.width,
+            'height': decoded.height
+        },
+        'detections_count': len(detections),
+        'detections': detections,
+        'confidence_threshold': confidence
+    }
+
+    with StageTimer.stage('serialize'):
+        return jsonify(response)
+
+
 @detection_bp.route('/detect/url', methods=['POST'])
 def detect_from_url():
     """
-    Object detection from image URL
-    Accepts: JSON with 'url' field
-    Returns: JSON with detected objects
+    Object detection from image URL(s)
+    Accepts: JSON with 'url' field, or 'urls' list to detect on several images
+    Returns: JSON with detected objects (a result per URL for 'urls')
     """
     try:
         data = request.get_json()
         
-        if not data or 'url' not in data:
+        if not data or ('url' not in data and 'urls' not in data):
             return jsonify({
                 'error': 'No URL provided',
-                'message': 'Please provide image URL in JSON body with key "url"'
+                'message': 'Please provide image URL in JSON body with key "url" (or a list with key "urls")'
             }), 400
         
-        url = data['url']
         confidence = float(data.get('confidence', Config.CONFIDENCE_THRESHOLD))
+        model = _requested_model(data.get('model'))
+        if model is None:
+            return _invalid_model_response()
         
-        # Run inference directly on URL (YOLO supports this)
-        yolo_service = YoloService.get_instance()
-        results = yolo_service.detect(url, confidence=confidence)
+        if 'urls' in data:
+            urls = data['urls']
+            if not isinstance(urls, list) or not urls or len(urls) > Config.FETCH_MAX_URLS:
+                return jsonify({
+                    'error': 'Invalid urls',
+                    'message': f'urls must be a list of 1 to {Config.FETCH_MAX_URLS} image URLs'
+                }), 400
+            # Not cached: the same URLs may serve new content later. Only
+            # concurrent identical lists share one run
+            return _cached_response(
+                'detect/urls', b'',
+                {'confidence': confidence, 'model': model, 'urls': urls},
+                lambda: _urls_response(urls, confidence, model),
+                cacheable=False
+            )
         
-        # Process results (same as above)
-        detections = []
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                x1, y1, x2, y2 = box.xyxy[0].tolist()
-                conf = float(box.conf[0])
-                cls = int(box.cls[0])
-                class_name = yolo_service.names[cls]
-                
-                detection = {
-                    'class': class_name,
-                    'class_id': cls,
-                    'confidence': round(conf, 4),
-                    'bbox': {
-                        'x1': round(x1, 2),
-                        'y1': round(y1, 2),
-                        'x2': round(x2, 2),
-                        'y2': round(y2, 2),
-                        'width': round(x2 - x1, 2),
-                        'height': round(y2 - y1, 2)
-                    }
-                }
-                detections.append(detection)
+        url = data['url']
         
-        response = {
-            'success': True,
-            'url': url,
-            'detections_count': len(detections),
-            'detections': detections,
-            'confidence_threshold': confidence
-        }
+        # Download over the pooled session (size-capped, revalidated from the disk cache)
+        try:
+            with StageTimer.stage('read'):
+                image_bytes = UrlFetcher.get_instance().fetch(url)
+        except FetchError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e),
+                'message': 'Could not fetch the image URL'
+            }), e.status_code
         
-        return jsonify(response)
+        return _cached_response(
+            'detect/url', image_bytes,
+            {'confidence': confidence, 'model': model, 'url': url},
+            lambda: _url_response(url, image_bytes, confidence, model)
+        )
     
+    except DeadlineExceeded as e:
+        return _admission_response(e)
     except Exception as e:
         error_trace = traceback.format_exc()
         print(f"Error during detection from URL: {error_trace}")
@@ -167,6 +375,77 @@ def detect_from_url():
         }), 500
 
 
+def _url_response(url, image_bytes, confidence, model=None):
+    """Run /detect/url on downloaded image bytes and build the response"""
+    decoded = ImageDecoder.decode(image_bytes, target_size=Config.DECODE_TARGET_SIZE)
+    
+    yolo_service = YoloService.get_instance(model)
+    with StageTimer.stage('inference'):
+        results = yolo_service.detect(decoded.frame.bgr, confidence=confidence)
+    
+    with StageTimer.stage('postprocess'):
+        xyxy, conf, cls = ResultEncoder.extract(results)
+        detections = ResultEncoder.to_detections(decoded.to_original(xyxy), conf, cls, yolo_service.names)
+    
+    with StageTimer.stage('serialize'):
+        return jsonify({
+            'success': True,
+            'url': url,
+            'image_size': {
+                'width': decoded.width,
+                'height': decoded.height
+            },
+            'detections_count': len(detections),
+            'detections': detections,
+            'confidence_threshold': confidence
+        })
+
+
+def _urls_response(urls, confidence, model=None):
+    """Fetch several URLs concurrently, then detect on all of them in one batch"""
+    with StageTimer.stage('read'):
+        fetched = UrlFetcher.get_instance().fetch_many(urls)
+    
+    results = [None] * len(urls)
+    decoded_images = []
+    with StageTimer.stage('decode'):
+        for i, (url, data) in enumerate(zip(urls, fetched)):
+            if isinstance(data, FetchError):
+                results[i] = {'url': url, 'success': False, 'error': str(data), 'status': data.status_code}
+                continue
+            try:
+                decoded_images.append((i, ImageDecoder.decode(data, target_size=Config.DECODE_TARGET_SIZE)))
+            except Exception as e:
+                results[i] = {'url': url, 'success': False, 'error': str(e), 'status': 400}
+    
+    yolo_service = YoloService.get_instance(model)
+    if decoded_images:
+        with StageTimer.stage('inference'):
+            batch = yolo_service.detect_many([decoded.frame.bgr for _, decoded in decoded_images],
+                                             confidence=confidence)
+        
+        with StageTimer.stage('postprocess'):
+            for (i, decoded), result in zip(decoded_images, batch):
+                xyxy, conf, cls = ResultEncoder.extract([result])
+                detections = ResultEncoder.to_detections(decoded.to_original(xyxy), conf, cls, yolo_service.names)
+                results[i] = {
+                    'url': urls[i],
+                    'success': True,
+                    'image_size': {'width': decoded.width, 'height': decoded.height},
+                    'detections_count': len(detections),
+                    'detections': detections
+                }
+    
+    with StageTimer.stage('serialize'):
+        return jsonify({
+            'success': True,
+            'results': results,
+            'total': len(urls),
+            'failed': sum(1 for result in results if not result['success']),
+            'confidence_threshold': confidence
+        })
+
+
 @detection_bp.route('/detect/hybrid', methods=['POST'])
 def detect_hybrid():
     """
@@ -177,7 +456,8 @@ def detect_hybrid():
     try:
         # Check if image is in request
         try:
-            has_image = 'image' in request.files
+            with StageTimer.stage('read'):
+                has_image = 'image' in request.files
         except Exception as e:
             # Handle client disconnect during upload
             if 'ClientDisconnected' in str(type(e).__name__):
@@ -208,74 +488,34 @@ def detect_hybrid():
         detect_frames = request.args.get('detect_frames', 'true').lower() == 'true'
         min_frame_area = int(request.args.get('min_frame_area', 2000))
         max_frame_area = int(request.args.get('max_frame_area', 200000))
+        response_format = _response_format()
+        if response_format is None:
+            return _invalid_format_response()
+        model = _requested_model()
+        if model is None:
+            return _invalid_model_response()
         
         # Read image
-        image_bytes = file.read()
-        image = Image.open(io.BytesIO(image_bytes))
-        
-        # DEBUG: Save received image for inspection
-        debug_dir = 'debug_images'
-        os.makedirs(debug_dir, exist_ok=True)
-        debug_path = os.path.join(debug_dir, 'last_received.jpg')
-        image.save(debug_path)
-        print(f'🔍 DEBUG: Saved received image to {debug_path} ({image.size[0]}x{image.size[1]})')
-        
-        # Convert to RGB if necessary
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
+        with StageTimer.stage('read'):
+            image_bytes = file.read()
         
-        # Run YOLO inference
-        yolo_service = YoloService.get_instance()
-        results = yolo_service.detect(image, confidence=confidence)
-        
-        # Process YOLO results
-        detections = []
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                x1, y1, x2, y2 = box.xyxy[0].tolist()
-                conf = float(box.conf[0])
-                cls = int(box.cls[0])
-                class_name = yolo_service.names[cls]
-                
-                detection = {
-                    'class': class_name,
-                    'class_id': cls,
-                    'confidence': round(conf, 4),
-                    'bbox': {
-                        'x1': round(x1, 2),
-                        'y1': round(y1, 2),
-                        'x2': round(x2, 2),
-                        'y2': round(y2, 2),
-                        'width': round(x2 - x1, 2),
-                        'height': round(y2 - y1, 2)
-                    },
-                    'source': 'yolo'
-                }
-                detections.append(detection)
-        
-        # Detect picture frames if enabled
-        if detect_frames:
-            frame_detections = ImageService.detect_picture_frames(image, min_frame_area, max_frame_area)
-            for frame in frame_detections:
-                frame['source'] = 'opencv'
-                detections.append(frame)
-        
-        # Prepare response
-        response = {
-            'success': True,
-            'image_size': {
-                'width': image.width,
-                'height': image.height
-            },
-            'detections_count': len(detections),
-            'detections': detections,
-            'confidence_threshold': confidence,
-            'detection_method': 'hybrid (YOLO + OpenCV)'
+        params = {
+            'confidence': confidence,
+            'detect_frames': detect_frames,
+            'min_frame_area': min_frame_area,
+            'max_frame_area': max_frame_area,
+            'format': response_format,
+            'model': model
         }
-        
-        return jsonify(response)
+        DebugCapture.get_instance().capture('hybrid', image_bytes, params)
+        return _cached_response(
+            'detect/hybrid', image_bytes, params,
+            lambda: _hybrid_response(image_bytes, confidence, detect_frames,
+                                     min_frame_area, max_frame_area, response_format, model)
+        )
     
+    except DeadlineExceeded as e:
+        return _admission_response(e)
     except Exception as e:
         error_trace = traceback.format_exc()
         print(f"Error during hybrid detection: {error_trace}")
@@ -286,6 +526,99 @@ def detect_hybrid():
         }), 500
 
 
+def _frame_detections(decoded, min_frame_area, max_frame_area):
+    """
+    Picture frames of a decoded image in original-image pixels
+    (area limits are in original pixels too)
+
+    Returns:
+        (detections, elapsed_ms). The time is returned instead of recorded
+        because this may run on a pool thread without the request context.
+    """
+    started = time.perf_counter()
+    area_scale = decoded.scale[0] * decoded.scale[1]
+    frame_detections = ImageService.detect_picture_frames(
+        decoded.frame, min_frame_area / area_scale, max_frame_area / area_scale
+    )
+    decoded.scale_detections(frame_detections)
+    return frame_detections, (time.perf_counter() - started) * 1000
+
+
+def _hybrid_response(image_bytes, confidence, detect_frames, min_frame_area, max_frame_area, response_format,
+                     model=None):
+    """Run /detect/hybrid on raw image bytes and build the response"""
+    # Decode straight to (about) the model input size; boxes are scaled back
+    decoded = ImageDecoder.decode(image_bytes, target_size=Config.DECODE_TARGET_SIZE)
+
+    # Start picture frame detection on the shared pool so it overlaps inference
+    frames_future = None
+    if detect_frames and Config.HYBRID_PARALLEL:
+        frames_future = TaskPool.get_instance().submit(
+            _frame_detections, decoded, min_frame_area, max_frame_area
+        )
+
+    # Run YOLO inference
+    yolo_service = YoloService.get_instance(model)
+    with StageTimer.stage('inference'):
+        results = yolo_service.detect(decoded.frame.bgr, confidence=confidence)
+    
+    with StageTimer.stage('postprocess'):
+        xyxy, conf, cls = ResultEncoder.extract(results)
+        xyxy = decoded.to_original(xyxy)
+
+    # Detect picture frames if enabled
+    frame_detections = []
+    if frames_future is not None:
+        frame_detections, frames_ms = frames_future.result()
+        StageTimer.record('frames', frames_ms)
+    elif detect_frames:
+        frame_detections, frames_ms = _frame_detections(decoded, min_frame_area, max_frame_area)
+        StageTimer.record('frames', frames_ms)
+
+    if response_format != 'json':
+        # YOLO boxes come first, followed by the OpenCV frames
+        frame_xyxy, frame_conf, frame_cls, frame_names = ResultEncoder.from_detections(frame_detections)
+        meta = {
+            'success': True,
+            'image_size': {'width': decoded.width, 'height': decoded.height},
+            'confidence_threshold': confidence,
+            'detection_method': 'hybrid (YOLO + OpenCV)',
+            'yolo_count': len(conf)
+        }
+        with StageTimer.stage('serialize'):
+            return _columnar_response(
+                response_format, meta,
+                np.concatenate([xyxy, frame_xyxy]),
+                np.concatenate([conf, frame_conf]),
+                np.concatenate([cls, frame_cls]),
+                {**yolo_service.names, **frame_names},
+                corners=ResultEncoder.corners_of(frame_detections, first_index=len(conf))
+            )
+
+    # Process YOLO results
+    with StageTimer.stage('postprocess'):
+        detections = ResultEncoder.to_detections(xyxy, conf, cls, yolo_service.names, source='yolo')
+        for frame in frame_detections:
+            frame['source'] = 'opencv'
+            detections.append(frame)
+
+    # Prepare response
+    response = {
+        'success': True,
+        'image_size': {
+            'width': decoded.width,
+            'height': decoded.height
+        },
+        'detections_count': len(detections),
+        'detections': detections,
+        'confidence_threshold': confidence,
+        'detection_method': 'hybrid (YOLO + OpenCV)'
+    }
+
+    with StageTimer.stage('serialize'):
+        return jsonify(response)
+
+
 @detection_bp.route('/detect/segment', methods=['POST'])
 def detect_segment():
     """
@@ -294,8 +627,10 @@ def detect_segment():
     Returns: JSON with detected object polygon
     """
     try:
-        # Check if image is in request
-        if 'image' not in request.files:
+        # Check if image is in request (parses the multipart body)
+        with StageTimer.stage('read'):
+            has_image = 'image' in request.files
+        if not has_image:
             return jsonify({
                 'error': 'No image provided',
                 'message': 'Please upload an image file with key "image"'
@@ -310,208 +645,468 @@ def detect_segment():
                 'message': 'Please provide ROI JSON string with key "roi"'
             }), 400
             
-        import json
         roi = json.loads(roi_str)
         
         # Read image
-        image_bytes = file.read()
-        image = Image.open(io.BytesIO(image_bytes))
+        with StageTimer.stage('read'):
+            image_bytes = file.read()
         
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-            
-        # Crop image to ROI
-        # ROI: {x, y, width, height}
-        x = int(roi.get('x', 0))
-        y = int(roi.get('y', 0))
-        w = int(roi.get('width', image.width))
-        h = int(roi.get('height', image.height))
+        # Use a lower threshold for focused detection
+        confidence = float(request.args.get('confidence', 0.15))
+        model = _requested_model(default='seg')
+        if model is None:
+            return _invalid_model_response()
         
+        # The ROI is stored with the original upload instead of saving the crop
+        DebugCapture.get_instance().capture('segment', image_bytes, {'confidence': confidence, 'roi': roi, 'model': model})
+        
+        return _cached_response(
+            'detect/segment', image_bytes,
+            {'confidence': confidence, 'roi': roi, 'model': model},
+            lambda: _segment_response(image_bytes, roi, confidence, model)
+        )
+
+    except DeadlineExceeded as e:
+        return _admission_response(e)
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        print(f"Error during segment detection: {error_trace}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+
+def _segment_response(image_bytes, roi, confidence, model=None):
+    """Run /detect/segment on raw image bytes and build the response"""
+    # Full resolution: the ROI may be a small part of the capture
+    frame = ImageDecoder.decode(image_bytes).frame
+
+    # Crop image to ROI
+    # ROI: {x, y, width, height}
+    x = int(roi.get('x', 0))
+    y = int(roi.get('y', 0))
+    w = int(roi.get('width', frame.width))
+    h = int(roi.get('height', frame.height))
+
+
+    # Ensure bounds
+    x = max(0, x)
+    y = max(0, y)
+    w = min(w, frame.width - x)
+    h = min(h, frame.height - y)
+
+    print(f"✂️ Cropping to ROI: x={x}, y={y}, w={w}, h={h} (Image: {frame.width}x{frame.height})")
+
+    # A view into the decoded pixels; box crops below are views into this one
+    roi_frame = frame.crop(x, y, w, h)
+
+    # Run inference on crop
+    yolo_service = YoloService.segmentation_instance(model)
+    with StageTimer.stage('inference'):
+        results = yolo_service.detect(roi_frame.bgr, confidence=confidence)
+
+    # Process results
+    detections = []
+    for result in results:
+        with StageTimer.stage('postprocess'):
+            xyxy, conf, cls = ResultEncoder.extract([result])
+            boxed = ResultEncoder.to_detections(xyxy, conf, cls, yolo_service.names,
+                                                offset=(x, y), include_size=False)
+
+        # Check for masks (segmentation)
+        if result.masks:
+            with StageTimer.stage('postprocess'):
+                polygons = ResultEncoder.mask_polygons(result.masks.xy, xyxy, offset=(x, y),
+                                                       tolerance=Config.SEGMENT_SIMPLIFY_TOLERANCE)
+                for detection, polygon in zip(boxed, polygons):
+                    detection['polygon'] = polygon
+                    detections.append(detection)
+        else:
+            # Fallback: YOLO found a box but no mask.
+            # Use the box to run GrabCut/Segmentation on that specific area.
+            print("⚠️ YOLO detected object but no mask. Running refinement...")
+            # All boxes are refined together on the task pool within the time budget
+            with StageTimer.stage('grabcut'):
+                polygons = GrabCutRefiner.refine(roi_frame, xyxy)
+
+            for detection, polygon in zip(boxed, polygons):
+                if polygon:
+                    # Adjust polygon coordinates to full image
+                    detection['polygon'] = [{'x': point['x'] + x, 'y': point['y'] + y} for point in polygon]
+
+                # Without a polygon the plain box is returned
+                detections.append(detection)
+
+    # If no detections from YOLO, try generic segmentation
+    if not detections:
+        print("⚠️ No YOLO detections, trying generic segmentation...")
+        with StageTimer.stage('grabcut'):
+            generic_result = ImageService.segment_generic_object(roi_frame)
+
+        if generic_result:
+            print("✅ Generic segmentation successful")
+            # Adjust coordinates to full image
+            adjusted_polygon = []
+            for point in generic_result['polygon']:
+                adjusted_polygon.append({
+                    'x': point['x'] + x,
+                    'y': point['y'] + y
+                })
+
+            generic_result['polygon'] = adjusted_polygon
+
+            # Adjust bbox
+            bbox = generic_result['bbox']
+            generic_result['bbox'] = {
+                'x1': bbox['x1'] + x,
+                'y1': bbox['y1'] + y,
+                'x2': bbox['x2'] + x,
+                'y2': bbox['y2'] + y,
+                'width': bbox['width'],
+                'height': bbox['height']
+            }
 
-        # Ensure bounds
-        x = max(0, x)
-        y = max(0, y)
-        w = min(w, image.width - x)
-        h = min(h, image.height - y)
+            detections.append(generic_result)
+        else:
+            print("❌ Generic segmentation failed")
+
+    with StageTimer.stage('serialize'):
+        return jsonify({
+            'success': True,
+            'detections': detections,
+            'roi': roi
+        })
+
+
+@detection_bp.route('/detect/panorama', methods=['POST'])
+def detect_panorama():
+    """
+    Tiled detection on a full equirectangular VR360 panorama
+    Accepts: multipart/form-data with 'image' file
+    Returns: JSON with detections in pixel and ath/atv coordinates
+    """
+    try:
+        with StageTimer.stage('read'):
+            has_image = 'image' in request.files
+        if not has_image:
+            return jsonify({
+                'error': 'No image provided',
+                'message': 'Please upload an image file with key "image"'
+            }), 400
+
+        file = request.files['image']
         
-        print(f"✂️ Cropping to ROI: x={x}, y={y}, w={w}, h={h} (Image: {image.width}x{image.height})")
+        if file.filename == '':
+            return jsonify({
+                'error': 'Empty filename',
+                'message': 'Please select a valid image file'
+            }), 400
+
+        # Get parameters
+        confidence = float(request.args.get('confidence', Config.CONFIDENCE_THRESHOLD))
+        method = request.args.get('method', 'tiles').lower()
+        tile_size = int(request.args.get('tile_size', Config.PANORAMA_TILE_SIZE))
+        overlap = int(request.args.get('overlap', Config.PANORAMA_TILE_OVERLAP))
+        face_size = int(request.args.get('face_size', Config.CUBEMAP_FACE_SIZE))
         
-        cropped_image = image.crop((x, y, x + w, y + h))
+        if method not in ('tiles', 'cubemap'):
+            return jsonify({
+                'error': 'Invalid method',
+                'message': 'method must be "tiles" or "cubemap"'
+            }), 400
         
-        # DEBUG: Save cropped image
-        debug_dir = 'debug_images'
-        os.makedirs(debug_dir, exist_ok=True)
-        cropped_path = os.path.join(debug_dir, 'last_cropped.jpg')
-        cropped_image.save(cropped_path)
-        print(f"🔍 DEBUG: Saved cropped image to {cropped_path}")
+        if tile_size < 32 or overlap < 0 or overlap >= tile_size or face_size < 32:
+            return jsonify({
+                'error': 'Invalid tiling',
+                'message': 'tile_size and face_size must be >= 32 and 0 <= overlap < tile_size'
+            }), 400
         
-        # Run inference on crop
-        # Use a lower threshold for focused detection
-        confidence = float(request.args.get('confidence', 0.15)) 
-        yolo_service = YoloService.get_instance()
-        results = yolo_service.detect(cropped_image, confidence=confidence)
+        model = _requested_model()
+        if model is None:
+            return _invalid_model_response()
         
-        detections = []
-
-        # Process results
-        detections = []
-        for result in results:
-            # Check for masks (segmentation)
-            if result.masks:
-                for i, mask in enumerate(result.masks.xy):
-                    # ... (existing mask processing) ...
-                    polygon = []
-                    for point in mask:
-                        polygon.append({
-                            'x': float(point[0] + x),
-                            'y': float(point[1] + y)
-                        })
-                    
-                    box = result.boxes[i]
-                    cls = int(box.cls[0])
-                    conf = float(box.conf[0])
-                    class_name = yolo_service.names[cls]
-                    
-                    detections.append({
-                        'class': class_name,
-                        'class_id': cls,
-                        'confidence': round(conf, 4),
-                        'polygon': polygon,
-                        'bbox': {
-                            'x1': float(box.xyxy[0][0] + x),
-                            'y1': float(box.xyxy[0][1] + y),
-                            'x2': float(box.xyxy[0][2] + x),
-                            'y2': float(box.xyxy[0][3] + y)
-                        }
-                    })
-            else:
-                # Fallback: YOLO found a box but no mask.
-                # Use the box to run GrabCut/Segmentation on that specific area.
-                print("⚠️ YOLO detected object but no mask. Running refinement...")
-                boxes = result.boxes
-                for box in boxes:
-                    x1, y1, x2, y2 = box.xyxy[0].tolist()
-                    conf = float(box.conf[0])
-                    cls = int(box.cls[0])
-                    class_name = yolo_service.names[cls]
-                    
-
-                    # Crop to the detected box with padding to include full object
-                    box_x = int(x1)
-                    box_y = int(y1)
-                    box_w = int(x2 - x1)
-                    box_h = int(y2 - y1)
-                    
-                    # Add padding (20% of size)
-                    pad_w = int(box_w * 0.2)
-                    pad_h = int(box_h * 0.2)
-                    
-                    crop_x = box_x - pad_w
-                    crop_y = box_y - pad_h
-                    crop_w = box_w + (pad_w * 2)
-                    crop_h = box_h + (pad_h * 2)
-                    
-                    # Ensure valid crop
-                    crop_x = max(0, crop_x)
-                    crop_y = max(0, crop_y)
-                    crop_w = min(crop_w, cropped_image.width - crop_x)
-                    crop_h = min(crop_h, cropped_image.height - crop_y)
-                    
-
-                    if crop_w > 0 and crop_h > 0:
-                        obj_crop = cropped_image.crop((crop_x, crop_y, crop_x + crop_w, crop_y + crop_h))
-                        
-                        # Calculate relative box position for GrabCut
-                        # The object is at (pad_w, pad_h) inside the crop, with size (box_w, box_h)
-                        # We give it a slight margin inside the box to be safe
-                        gc_margin = 2
-                        gc_rect = (
-                            pad_w + gc_margin, 
-                            pad_h + gc_margin, 
-                            max(1, box_w - 2*gc_margin), 
-                            max(1, box_h - 2*gc_margin)
-                        )
-                        
-                        # Run generic segmentation on this crop
-                        refined = ImageService.segment_generic_object(obj_crop, grabcut_rect=gc_rect)
-                        
-                        if refined and refined.get('polygon'):
-                            # Adjust polygon coordinates to full image
-                            adjusted_polygon = []
-                            for point in refined['polygon']:
-                                adjusted_polygon.append({
-                                    'x': point['x'] + crop_x + x,
-                                    'y': point['y'] + crop_y + y
-                                })
-                            
-                            detections.append({
-                                'class': class_name,
-                                'class_id': cls,
-                                'confidence': round(conf, 4),
-                                'polygon': adjusted_polygon,
-                                'bbox': {
-                                    'x1': round(x1 + x, 2),
-                                    'y1': round(y1 + y, 2),
-                                    'x2': round(x2 + x, 2),
-                                    'y2': round(y2 + y, 2)
-                                }
-                            })
-                        else:
-                            # Fallback to box if refinement fails
-                            detections.append({
-                                'class': class_name,
-                                'class_id': cls,
-                                'confidence': round(conf, 4),
-                                'bbox': {
-                                    'x1': round(x1 + x, 2),
-                                    'y1': round(y1 + y, 2),
-                                    'x2': round(x2 + x, 2),
-                                    'y2': round(y2 + y, 2)
-                                }
-                            })
-
-        # If no detections from YOLO, try generic segmentation
-        if not detections:
-            print("⚠️ No YOLO detections, trying generic segmentation...")
-            generic_result = ImageService.segment_generic_object(cropped_image)
-            
-            if generic_result:
-                print("✅ Generic segmentation successful")
-                # Adjust coordinates to full image
-                adjusted_polygon = []
-                for point in generic_result['polygon']:
-                    adjusted_polygon.append({
-                        'x': point['x'] + x,
-                        'y': point['y'] + y
-                    })
-                
-                generic_result['polygon'] = adjusted_polygon
-                
-                # Adjust bbox
-                bbox = generic_result['bbox']
-                generic_result['bbox'] = {
-                    'x1': bbox['x1'] + x,
-                    'y1': bbox['y1'] + y,
-                    'x2': bbox['x2'] + x,
-                    'y2': bbox['y2'] + y,
-                    'width': bbox['width'],
-                    'height': bbox['height']
-                }
-                
-                detections.append(generic_result)
-            else:
-                print("❌ Generic segmentation failed")
+        # Read image
+        with StageTimer.stage('read'):
+            image_bytes = file.read()
+        if method == 'cubemap':
+            params = {'confidence': confidence, 'method': method, 'face_size': face_size}
+        else:
+            params = {'confidence': confidence, 'method': method, 'tile_size': tile_size, 'overlap': overlap}
+        params['model'] = model
+        DebugCapture.get_instance().capture('panorama', image_bytes, params)
+        
+        return _cached_response(
+            'detect/panorama', image_bytes, params,
+            lambda: _panorama_response(image_bytes, confidence, method, tile_size, overlap, face_size, model)
+        )
+    
+    except DeadlineExceeded as e:
+        return _admission_response(e)
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        print(f"Error during panorama detection: {error_trace}")
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'message': 'An error occurred during panorama detection'
+        }), 500
 
+
+def _panorama_response(image_bytes, confidence, method, tile_size, overlap, face_size, model=None):
+    """Run tiled or cubemap panorama detection on raw image bytes and build the response"""
+    # Full resolution: tiling exists to keep small objects visible
+    decoded = ImageDecoder.decode(image_bytes)
+    width, height = decoded.width, decoded.height
+    
+    yolo_service = YoloService.get_instance(model)
+    with StageTimer.stage('inference'):
+        if method == 'cubemap':
+            xyxy, conf, cls, tile_count = PanoramaService.detect_cubemap(
+                yolo_service, decoded.frame, confidence, face_size=face_size
+            )
+        else:
+            xyxy, conf, cls, tile_count = PanoramaService.detect_tiled(
+                yolo_service, decoded.frame, confidence, tile_size=tile_size, overlap=overlap
+            )
+    
+    with StageTimer.stage('postprocess'):
+        detections = ResultEncoder.to_detections(xyxy, conf, cls, yolo_service.names)
+        for detection, sphere in zip(detections, PanoramaService.to_spherical(xyxy, width, height)):
+            detection['sphere'] = sphere
+            detection['crosses_seam'] = detection['bbox']['x2'] > width
+    
+    with StageTimer.stage('serialize'):
         return jsonify({
             'success': True,
+            'image_size': {
+                'width': width,
+                'height': height
+            },
+            'tiles': tile_count,
+            'detections_count': len(detections),
             'detections': detections,
-            'roi': roi
+            'confidence_threshold': confidence,
+            'detection_method': f'panorama {method}'
         })
 
+
+STREAM_FORMATS = ('ndjson', 'sse')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp', '.gif', '.tif', '.tiff')
+
+
+def _batch_sources():
+    """
+    Collect (name, read_bytes) for every image in a multi-image request:
+    repeated 'images' files, and/or a zip under 'archive'
+
+    Upload bytes are read here, while the request files are still open;
+    zip members are only decompressed when the stream reaches them.
+
+    Returns:
+        (sources, None), or (None, error response) for an archive that is
+        not a zip or exceeds the archive limits
+    """
+    sources = []
+    for file in request.files.getlist('images'):
+        if file.filename:
+            sources.append((file.filename, (lambda data=file.read(): data)))
+
+    archive = request.files.get('archive')
+    if archive is not None and archive.filename:
+        try:
+            zf = zipfile.ZipFile(io.BytesIO(archive.read()))
+        except zipfile.BadZipFile:
+            return None, (jsonify({
+                'error': 'Invalid archive',
+                'message': 'archive must be a zip file'
+            }), 400)
+
+        members = [info for info in zf.infolist()
+                   if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS)]
+        error = _archive_limits_error(members)
+        if error is not None:
+            return None, error
+
+        member_max_bytes = int(Config.MAX_UPLOAD_MB * 1024 * 1024)
+        for info in members:
+            sources.append((info.filename, (lambda info=info: _read_member(zf, info, member_max_bytes))))
+
+    return sources, None
+
+
+def _archive_limits_error(members):
+    """
+    Error response for archive members whose declared sizes exceed the
+    limits, checked before anything is decompressed (a small zip can expand
+    to gigabytes)
+    """
+    if len(members) > Config.BATCH_ARCHIVE_MAX_IMAGES:
+        return jsonify({
+            'error': 'Too many images',
+            'message': f'archive may contain at most {Config.BATCH_ARCHIVE_MAX_IMAGES} images'
+        }), 400
+
+    for info in members:
+        if info.file_size > Config.MAX_UPLOAD_MB * 1024 * 1024:
+            return jsonify({
+                'success': False,
+                'error': 'File too large',
+                'message': f'{info.filename} expands beyond the {Config.MAX_UPLOAD_MB:g}MB per-image limit'
+            }), 413
+
+    if sum(info.file_size for info in members) > Config.BATCH_ARCHIVE_MAX_MB * 1024 * 1024:
+        return jsonify({
+            'success': False,
+            'error': 'File too large',
+            'message': f'archive expands beyond the {Config.BATCH_ARCHIVE_MAX_MB:g}MB limit'
+        }), 413
+    return None
+
+
+def _read_member(zf, info, max_bytes):
+    """Decompress one archive member, never more than `max_bytes` whatever its header claims"""
+    with zf.open(info) as member:
+        data = member.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ValueError(f'Image expands beyond {max_bytes / (1024 * 1024):g}MB')
+    return data
+
+
+def _stream_event(stream_format, event, payload):
+    data = json.dumps(payload, separators=(',', ':'))
+    if stream_format == 'sse':
+        return f'event: {event}\ndata: {data}\n\n'
+    return data + '\n'
+
+
+@detection_bp.route('/detect/batch', methods=['POST'])
+def detect_batch():
+    """
+    Multi-image detection with streamed results
+    Accepts: multipart/form-data with several 'images' files and/or a zip 'archive'
+    Returns: NDJSON (default) or server-sent events, one result per image as it finishes
+    """
+    try:
+        if not request.files.getlist('images') and 'archive' not in request.files:
+            return jsonify({
+                'error': 'No images provided',
+                'message': 'Please upload image files with key "images" or a zip file with key "archive"'
+            }), 400
+
+        confidence = float(request.args.get('confidence', Config.CONFIDENCE_THRESHOLD))
+        stream_format = request.args.get('format')
+        if not stream_format:
+            stream_format = 'sse' if 'text/event-stream' in request.headers.get('Accept', '') else 'ndjson'
+        stream_format = stream_format.lower()
+        
+        if stream_format not in STREAM_FORMATS:
+            return jsonify({
+                'error': 'Invalid format',
+                'message': f'format must be one of: {", ".join(STREAM_FORMATS)}'
+            }), 400
+        
+        model = _requested_model()
+        if model is None:
+            return _invalid_model_response()
+        
+        sources, error = _batch_sources()
+        if error is not None:
+            return error
+    
+    except DeadlineExceeded as e:
+        return _admission_response(e)
     except Exception as e:
         error_trace = traceback.format_exc()
-        print(f"Error during segment detection: {error_trace}")
+        print(f"Error during batch detection: {error_trace}")
         return jsonify({
             'success': False,
-            'error': str(e)
+            'error': str(e),
+            'message': 'An error occurred during batch detection'
         }), 500
+
+    mimetype = 'text/event-stream' if stream_format == 'sse' else 'application/x-ndjson'
+    response = Response(
+        stream_with_context(_batch_events(sources, confidence, stream_format, model)),
+        mimetype=mimetype
+    )
+    # Keep proxies (ngrok) from buffering the stream
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _batch_events(sources, confidence, stream_format, model=None):
+    """Decode images in chunks, run each chunk as one batch and emit a result per image"""
+    # The admission deadline bounds the wait for a slot. Once results stream
+    # out the client is reading them, so the batch runs to the end
+    g.pop('admission_deadline', None)
+    started = time.perf_counter()
+    yolo_service = YoloService.get_instance(model)
+    chunk_size = max(1, Config.BATCH_MAX_SIZE)
+    index = 0
+    failed = 0
+
+    def run_chunk(chunk):
+        """
+        chunk: list of (index, name, DecodedImage). Returns (events, failed):
+        a result per image, or an error per image when the chunk's detection fails
+        """
+        try:
+            results = yolo_service.detect_many([decoded.frame.bgr for _, _, decoded in chunk], confidence=confidence)
+            events = []
+            for (i, name, decoded), result in zip(chunk, results):
+                xyxy, conf, cls = ResultEncoder.extract([result])
+                detections = ResultEncoder.to_detections(decoded.to_original(xyxy), conf, cls, yolo_service.names)
+                events.append(_stream_event(stream_format, 'result', {
+                    'index': i,
+                    'name': name,
+                    'success': True,
+                    'image_size': {'width': decoded.width, 'height': decoded.height},
+                    'detections_count': len(detections),
+                    'detections': detections
+                }))
+            return events, 0
+        except Exception as e:
+            print(f"Error during batch detection: {traceback.format_exc()}")
+            return [
+                _stream_event(stream_format, 'error', {'index': i, 'name': name, 'success': False, 'error': str(e)})
+                for i, name, _ in chunk
+            ], len(chunk)
+
+    chunk = []
+    try:
+        for name, read_bytes in sources:
+            try:
+                decoded = ImageDecoder.decode(read_bytes(), target_size=Config.DECODE_TARGET_SIZE)
+                chunk.append((index, name, decoded))
+            except Exception as e:
+                failed += 1
+                yield _stream_event(stream_format, 'error', {
+                    'index': index, 'name': name, 'success': False, 'error': str(e)
+                })
+            index += 1
+
+            if len(chunk) >= chunk_size:
+                events, chunk_failed = run_chunk(chunk)
+                failed += chunk_failed
+                yield from events
+                chunk = []
+    except Exception as e:
+        # Listing the sources failed; 'total' counts the images reached
+        print(f"Error during batch detection: {traceback.format_exc()}")
+        yield _stream_event(stream_format, 'error', {'success': False, 'error': str(e)})
+
+    if chunk:
+        events, chunk_failed = run_chunk(chunk)
+        failed += chunk_failed
+        yield from events
+
+    yield _stream_event(stream_format, 'done', {
+        'done': True,
+        'total': index,
+        'failed': failed,
+        'confidence_threshold': confidence,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+    })
@@ -1,25 +1,102 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request, Response
 from config import Config
 from services.yolo_service import YoloService
+from services.model_registry import UnknownModelError
+from services.result_cache import ResultCache
+from services.debug_capture import DebugCapture
+from services.metrics import Metrics
+from services.url_fetcher import UrlFetcher
+from services.async_gateway import AsyncGateway
+from services.admission import AdmissionController
+from services.request_coalescer import RequestCoalescer
+from services.model_warmup import ModelWarmup
 
 general_bp = Blueprint('general', __name__)
 
 @general_bp.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (liveness: the process is serving; see /ready for the models)"""
     return jsonify({
         'status': 'healthy',
+        'ready': ModelWarmup.get_instance().ready,
         'model': Config.YOLO_MODEL_PATH,
-        'confidence_threshold': Config.CONFIDENCE_THRESHOLD
+        'models': YoloService.registry().stats(),
+        'confidence_threshold': Config.CONFIDENCE_THRESHOLD,
+        'result_cache': ResultCache.get_instance().stats(),
+        'coalescing': RequestCoalescer.get_instance().stats(),
+        'debug_capture': DebugCapture.get_instance().stats(),
+        'url_fetch': UrlFetcher.get_instance().stats(),
+        'admission': AdmissionController.get_instance().stats(),
+        'async_gateway': AsyncGateway.current().stats() if AsyncGateway.current() else None
     })
 
+@general_bp.route('/ready', methods=['GET'])
+def readiness():
+    """Readiness probe: 200 once the models are loaded and warmed, 503 before"""
+    # Launchers that import the app without starting warm-up get it on the first probe
+    warmup = ModelWarmup.get_instance().start()
+    return jsonify(warmup.status()), 200 if warmup.ready else 503
+
+@general_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Request and per-stage latency histograms in Prometheus text format"""
+    registry = Metrics.get_instance()
+    if not registry.enabled:
+        return jsonify({
+            'error': 'Metrics disabled',
+            'message': 'Set METRICS_ENABLED=True to collect metrics'
+        }), 404
+
+    cache = ResultCache.get_instance().stats()
+    capture = DebugCapture.get_instance().stats()
+    coalescing = RequestCoalescer.get_instance().stats()
+    counters = {
+        'yolo_result_cache_hits_total': ('Result cache hits', cache['hits']),
+        'yolo_result_cache_misses_total': ('Result cache misses', cache['misses']),
+        'yolo_result_cache_evictions_total': ('Result cache evictions', cache['evictions']),
+        'yolo_coalesced_requests_total': ('Requests answered by an identical request already in flight', coalescing['coalesced']),
+        'yolo_debug_captures_dropped_total': ('Debug captures dropped because the queue was full', capture['dropped'])
+    }
+    gateway = AsyncGateway.current()
+    if gateway is not None:
+        gateway_stats = gateway.stats()
+        counters['yolo_async_rejected_total'] = ('Requests rejected with 503 because the queue was full', gateway_stats['rejected'])
+        counters['yolo_async_upload_timeouts_total'] = ('Uploads not received within ASYNC_BODY_TIMEOUT', gateway_stats['upload_timeouts'])
+    admission = AdmissionController.get_instance()
+    lanes = admission.stats()['lanes']
+
+    def per_lane(field):
+        return [({'lane': name}, lane[field]) for name, lane in lanes.items()]
+
+    counters['yolo_lane_admitted_total'] = ('Requests admitted, by priority lane', per_lane('admitted'))
+    counters['yolo_lane_rejected_total'] = ('Requests rejected with 503 because the lane queue was full', per_lane('rejected'))
+    counters['yolo_lane_expired_total'] = ('Requests dropped because their deadline passed in the queue', per_lane('expired'))
+    gauges = {
+        'yolo_lane_queue_depth': ('Requests waiting for a slot, by priority lane', per_lane('queued')),
+        'yolo_lane_active': ('Requests holding a slot, by priority lane', per_lane('active'))
+    }
+    histograms = {
+        'yolo_lane_wait_seconds': ('Time spent waiting for a slot, by priority lane', admission.wait_histograms())
+    }
+    body = registry.render(counters, gauges, histograms)
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
 @general_bp.route('/classes', methods=['GET'])
 def get_classes():
-    """Get list of classes the model can detect"""
-    yolo_service = YoloService.get_instance()
+    """Get list of classes the model (?model=, default: the detection model) can detect"""
+    registry = YoloService.registry()
+    try:
+        yolo_service = registry.get(request.args.get('model'))
+    except UnknownModelError:
+        return jsonify({
+            'error': 'Invalid model',
+            'message': f'model must be one of: {", ".join(registry.models)}'
+        }), 400
     return jsonify({
+        'model': yolo_service.model_path,
         'classes': yolo_service.names,
-        'total_classes': len(yolo_service.names)
+        'total_classes': len(yolo_service.names),
+        'loaded_models': [service.model_path for service in registry.loaded()]
     })
 
 @general_bp.route('/', methods=['GET'])
@@ -33,13 +110,23 @@ def index():
                 'method': 'GET',
                 'description': 'Health check endpoint'
             },
+            '/ready': {
+                'method': 'GET',
+                'description': 'Readiness probe: 200 when models are loaded and warmed, 503 while loading/warming'
+            },
+            '/metrics': {
+                'method': 'GET',
+                'description': 'Prometheus metrics: request and per-stage latency histograms per endpoint'
+            },
             '/detect': {
                 'method': 'POST',
                 'description': 'Detect objects in uploaded image',
                 'content_type': 'multipart/form-data',
                 'parameters': {
                     'image': 'Image file (required)',
-                    'confidence': 'Confidence threshold (optional, query param)'
+                    'confidence': 'Confidence threshold (optional, query param)',
+                    'model': 'Model name from /health models.available (optional, query param, default: default)',
+                    'format': 'Response format: json, columnar or binary (optional, query param or Accept header)'
                 }
             },
             '/detect/url': {
@@ -48,12 +135,16 @@ def index():
                 'content_type': 'application/json',
                 'parameters': {
                     'url': 'Image URL (required)',
-                    'confidence': 'Confidence threshold (optional)'
+                    'confidence': 'Confidence threshold (optional)',
+                    'model': 'Model name (optional)'
                 }
             },
             '/classes': {
                 'method': 'GET',
-                'description': 'Get list of detectable classes'
+                'description': 'Get list of detectable classes',
+                'parameters': {
+                    'model': 'Model name (optional, query param)'
+                }
             },
             '/detect/hybrid': {
                 'method': 'POST',
@@ -64,7 +155,9 @@ def index():
                     'confidence': 'Confidence threshold for YOLO (optional, query param)',
                     'detect_frames': 'Enable frame detection (optional, default: true)',
                     'min_frame_area': 'Minimum frame area in pixels (optional, default: 5000)',
-                    'max_frame_area': 'Maximum frame area in pixels (optional, default: 100000)'
+                    'max_frame_area': 'Maximum frame area in pixels (optional, default: 100000)',
+                    'model': 'Model name (optional, query param)',
+                    'format': 'Response format: json, columnar or binary (optional, query param or Accept header)'
                 }
             },
             '/detect/segment': {
@@ -74,7 +167,34 @@ def index():
                 'parameters': {
                     'image': 'Image file (required)',
                     'roi': 'ROI JSON string (required) {x, y, width, height}',
-                    'confidence': 'Confidence threshold (optional, query param)'
+                    'confidence': 'Confidence threshold (optional, query param)',
+                    'model': 'Model name (optional, query param, default: seg)'
+                }
+            },
+            '/detect/panorama': {
+                'method': 'POST',
+                'description': 'Tiled detection on a full equirectangular panorama',
+                'content_type': 'multipart/form-data',
+                'parameters': {
+                    'image': 'Equirectangular image file (required)',
+                    'confidence': 'Confidence threshold (optional, query param)',
+                    'method': 'tiles or cubemap (optional, default: tiles)',
+                    'tile_size': 'Tile size in pixels (optional, default: 640)',
+                    'overlap': 'Tile overlap in pixels (optional, default: 128)',
+                    'face_size': 'Cube face size in pixels for method=cubemap (optional, default: 640)',
+                    'model': 'Model name (optional, query param)'
+                }
+            },
+            '/detect/batch': {
+                'method': 'POST',
+                'description': 'Multi-image detection, results streamed per image as they finish',
+                'content_type': 'multipart/form-data',
+                'parameters': {
+                    'images': 'Image files (repeat the field for each image)',
+                    'archive': 'Zip file of images (optional, instead of or in addition to images)',
+                    'confidence': 'Confidence threshold (optional, query param)',
+                    'model': 'Model name (optional, query param)',
+                    'format': 'ndjson or sse (optional, query param or Accept: text/event-stream)'
                 }
             }
         }
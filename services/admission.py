@@ -0,0 +1,315 @@
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from flask import g, has_request_context
+from config import Config
+from services.metrics import Histogram
+
+# WSGI environ key under which AsyncGateway passes on requests it admitted
+ADMITTED_ENVIRON_KEY = 'yolo.admission'
+
+
+class AdmissionRejected(Exception):
+    """A request not admitted; `status_code` is the HTTP status to answer with"""
+
+    def __init__(self, message, status_code=503, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    def response_body(self):
+        """JSON body of the error response"""
+        return {
+            'success': False,
+            'error': str(self),
+            'message': 'Server busy, please retry later' if self.status_code == 503
+                       else 'Request dropped: its deadline passed before it could run'
+        }
+
+
+class DeadlineExceeded(AdmissionRejected):
+    """The request's deadline passed before its work ran; the client has given up"""
+
+    def __init__(self, message='Request deadline exceeded'):
+        super().__init__(message, status_code=504)
+
+
+class Lane:
+    """One priority lane: a concurrency cap, a bounded FIFO queue and a default deadline"""
+
+    def __init__(self, name, priority, max_concurrent, max_queue, timeout):
+        self.name = name
+        self.priority = priority  # lower runs first
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = deque()
+        self.admitted = 0
+        self.rejected = 0
+        self.expired = 0
+        self.wait_seconds = Histogram()
+
+
+class _Waiter:
+    """A request queued in a lane; `grant()` hands it a slot and wakes it"""
+
+    __slots__ = ('started', 'granted', '_wake')
+
+    def __init__(self, wake):
+        self.started = time.monotonic()
+        self.granted = False
+        self._wake = wake
+
+    def grant(self):
+        self.granted = True
+        self._wake()
+
+
+class AdmissionController:
+    """
+    Priority lanes in front of the detection endpoints.
+
+    Every detection request is assigned a lane (by API key, else by the
+    X-Priority header, else the default lane) and must hold one of the
+    lane's slots while it runs, so a bulk re-annotation job can only use
+    its own few slots. Lanes are strictly ordered: while a higher priority
+    lane has requests waiting, lower lanes admit nothing new, which keeps
+    interactive latency flat under bulk load. Requests wait in FIFO order
+    until their deadline (X-Request-Timeout seconds, else the lane's
+    timeout); past it the client has given up and the work is dropped with
+    504. A full lane queue answers 503 with Retry-After.
+
+    Waiting requests are woken by handing them a freed slot, so the same
+    queues serve threads blocked in acquire() (Flask server, prefork.py
+    workers) and coroutines in acquire_async() (AsyncGateway, which admits
+    requests before they take a pool thread). Lanes are per process: under
+    prefork.py every worker has its own.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(
+                        [
+                            Lane('interactive', 0, Config.LANE_INTERACTIVE_CONCURRENCY,
+                                 Config.LANE_INTERACTIVE_QUEUE, Config.LANE_INTERACTIVE_TIMEOUT),
+                            Lane('bulk', 1, Config.LANE_BULK_CONCURRENCY,
+                                 Config.LANE_BULK_QUEUE, Config.LANE_BULK_TIMEOUT)
+                        ],
+                        default_lane=Config.ADMISSION_DEFAULT_LANE,
+                        api_keys=Config.admission_api_keys(),
+                        enabled=Config.ADMISSION_ENABLED,
+                        retry_after=Config.ADMISSION_RETRY_AFTER
+                    )
+        return cls._instance
+
+    def __init__(self, lanes, default_lane='interactive', api_keys=None, enabled=True, retry_after=1):
+        """
+        Args:
+            lanes: Lane objects
+            default_lane: Lane for requests without API key or X-Priority
+            api_keys: {api_key: lane name}
+            enabled: False admits everything immediately
+            retry_after: Retry-After seconds for 503 responses
+        """
+        self.lanes = {lane.name: lane for lane in sorted(lanes, key=lambda lane: lane.priority)}
+        self.default_lane = default_lane
+        self.api_keys = dict(api_keys or {})
+        self.enabled = enabled
+        self.retry_after = retry_after
+        self.thread_limit = 0
+        self.reserved_threads = 0
+        self._top_priority = min(lane.priority for lane in lanes)
+        self._lock = threading.Lock()
+
+    def lane_for(self, headers):
+        """
+        Lane for a request's headers, or None for an unknown X-Priority.
+        A known API key decides the lane; the header cannot override it.
+        """
+        key = headers.get('X-API-Key')
+        if key and key in self.api_keys:
+            return self.lanes[self.api_keys[key]]
+        name = headers.get('X-Priority', '').strip().lower()
+        if not name:
+            return self.lanes[self.default_lane]
+        return self.lanes.get(name)
+
+    @staticmethod
+    def timeout_for(lane, headers):
+        """
+        Seconds the request may wait and run: the client's X-Request-Timeout,
+        capped by the lane's timeout
+
+        Raises:
+            ValueError: X-Request-Timeout is not a finite number
+        """
+        value = headers.get('X-Request-Timeout')
+        if not value:
+            return lane.timeout
+        timeout = float(value)
+        # nan and inf would give a deadline that never passes
+        if not math.isfinite(timeout):
+            raise ValueError(f'Non-finite timeout: {value}')
+        return min(timeout, lane.timeout)
+
+    def _grant(self):
+        """Hand free slots to waiters, highest lane first (call with _lock held)"""
+        for lane in self.lanes.values():
+            while lane.waiting and lane.active < lane.max_concurrent:
+                waiter = lane.waiting.popleft()
+                lane.active += 1
+                lane.admitted += 1
+                lane.wait_seconds.observe(time.monotonic() - waiter.started)
+                waiter.grant()
+            # Strict priority: lower lanes admit nothing while this one has a queue
+            if lane.waiting:
+                return
+
+    def _enqueue(self, lane, wake):
+        """Queue a waiter in `lane`, granting it at once if a slot is free"""
+        with self._lock:
+            if len(lane.waiting) >= lane.max_queue and lane.active >= lane.max_concurrent:
+                lane.rejected += 1
+                raise AdmissionRejected(f'The {lane.name} queue is full', 503, self.retry_after)
+            if (self.thread_limit and lane.priority > self._top_priority and
+                    self._lower_lane_threads() >= self.thread_limit - self.reserved_threads):
+                # Waiting would block a server thread kept free for the top lane
+                lane.rejected += 1
+                raise AdmissionRejected(f'The {lane.name} lane has no free server thread', 503, self.retry_after)
+            waiter = _Waiter(wake)
+            lane.waiting.append(waiter)
+            self._grant()
+            return waiter
+
+    def _lower_lane_threads(self):
+        return sum(lane.active + len(lane.waiting) for lane in self.lanes.values()
+                   if lane.priority > self._top_priority)
+
+    def _give_up(self, lane, waiter):
+        """
+        Remove a waiter that stopped waiting; False if it was granted a slot
+        meanwhile (the caller then holds that slot)
+        """
+        with self._lock:
+            if waiter.granted:
+                return False
+            lane.waiting.remove(waiter)
+            # Lower lanes may run now that this queue is shorter
+            self._grant()
+            return True
+
+    def _expired(self, lane, waiter):
+        with self._lock:
+            lane.expired += 1
+        return DeadlineExceeded(f'Deadline passed after {time.monotonic() - waiter.started:.1f}s '
+                                f'in the {lane.name} queue')
+
+    def acquire(self, lane, deadline):
+        """
+        Wait for a slot in `lane`, blocking the calling thread
+
+        Args:
+            lane: Lane from lane_for()
+            deadline: time.monotonic() after which the request is dropped
+
+        Raises:
+            AdmissionRejected: lane queue full (503)
+            DeadlineExceeded: no slot before the deadline (504)
+        """
+        if not self.enabled:
+            return
+        granted = threading.Event()
+        waiter = self._enqueue(lane, granted.set)
+        if granted.wait(max(0.0, deadline - time.monotonic())):
+            return
+        if self._give_up(lane, waiter):
+            raise self._expired(lane, waiter)
+
+    async def acquire_async(self, lane, deadline):
+        """
+        acquire() for an event loop: waiting holds no thread (AsyncGateway)
+        """
+        if not self.enabled:
+            return
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        waiter = self._enqueue(lane, wake)
+        try:
+            await asyncio.wait_for(asyncio.shield(granted), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            if self._give_up(lane, waiter):
+                raise self._expired(lane, waiter)
+        except BaseException:
+            # Cancelled (e.g. server shutdown): don't leak a granted slot
+            if not self._give_up(lane, waiter):
+                self.release(lane)
+            raise
+
+    def release(self, lane):
+        if not self.enabled:
+            return
+        with self._lock:
+            lane.active -= 1
+            self._grant()
+
+    def reserve_threads(self, thread_limit, reserved):
+        """
+        For servers with a fixed number of request threads (prefork.py's
+        gthread workers), where waiting here blocks one of them: lower lanes
+        may hold at most `thread_limit - reserved` threads (running or
+        waiting) and answer 503 + Retry-After beyond that, so queued bulk
+        requests can't take the threads interactive requests need
+        """
+        self.thread_limit = thread_limit
+        self.reserved_threads = reserved
+
+    @staticmethod
+    def check_deadline():
+        """
+        Raise DeadlineExceeded when the current request's deadline has passed
+        (no-op outside a request, e.g. warm-up or task pool threads)
+        """
+        if not has_request_context():
+            return
+        deadline = g.get('admission_deadline')
+        if deadline is not None and time.monotonic() > deadline:
+            raise DeadlineExceeded()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'default_lane': self.default_lane,
+                'lanes': {
+                    lane.name: {
+                        'priority': lane.priority,
+                        'active': lane.active,
+                        'queued': len(lane.waiting),
+                        'max_concurrent': lane.max_concurrent,
+                        'max_queue': lane.max_queue,
+                        'timeout_s': lane.timeout,
+                        'admitted': lane.admitted,
+                        'rejected': lane.rejected,
+                        'expired': lane.expired
+                    }
+                    for lane in self.lanes.values()
+                }
+            }
+
+    def wait_histograms(self):
+        """[(labels, Histogram snapshot)] of queue wait per lane, for /metrics"""
+        with self._lock:
+            return [({'lane': lane.name}, lane.wait_seconds.copy()) for lane in self.lanes.values()]
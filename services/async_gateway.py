@@ -0,0 +1,362 @@
+import asyncio
+import io
+import json
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.datastructures import EnvironHeaders
+from services.admission import AdmissionRejected, ADMITTED_ENVIRON_KEY
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class _ClientGone(Exception):
+    pass
+
+
+class AsyncGateway:
+    """
+    ASGI front end that serves the Flask app without a thread per connection.
+
+    Request bodies are received on the event loop, so a slow upload (e.g.
+    through ngrok) holds a cheap coroutine instead of a server thread. Only
+    a fully received request is handed to the unchanged Flask app (WSGI) on
+    a pool of `workers` threads, so every blueprint, route and response
+    format stays the same. Backpressure is explicit: when `workers` requests
+    are running and `queue_size` more are waiting for a thread, new requests
+    are answered at once with 503 and a Retry-After header instead of piling
+    up behind inference. Uploads that take longer than `body_timeout`
+    seconds get the same 408 as /detect/hybrid.
+
+    With an `admission` controller, requests under `admission_prefix` wait
+    for their priority lane's slot on the event loop, before taking a pool
+    thread: queued bulk requests hold no thread, so interactive requests
+    always find one.
+    """
+
+    _current = None
+
+    @classmethod
+    def current(cls):
+        """The gateway serving this process, or None under the Flask server"""
+        return cls._current
+
+    def __init__(self, wsgi_app, workers=8, queue_size=64, body_timeout=60.0,
+                 retry_after=1, max_body_bytes=0, on_startup=(), admission=None,
+                 admission_prefix='/detect'):
+        """
+        Args:
+            wsgi_app: WSGI application (the Flask app)
+            workers: Threads running requests through the WSGI app
+            queue_size: Received requests allowed to wait for a thread
+            body_timeout: Seconds allowed for receiving a request body
+            retry_after: Retry-After seconds sent with 503 responses
+            max_body_bytes: Reject larger bodies before reading them (0 = no limit)
+            on_startup: Callables run when the server starts (ASGI lifespan)
+            admission: AdmissionController to admit requests with before dispatch
+            admission_prefix: Paths admitted by `admission` (the detection endpoints)
+        """
+        self.wsgi_app = wsgi_app
+        self.workers = workers
+        self.queue_size = queue_size
+        self.body_timeout = body_timeout
+        self.retry_after = retry_after
+        self.max_body_bytes = max_body_bytes
+        self.on_startup = list(on_startup)
+        self.admission = admission
+        self.admission_prefix = admission_prefix
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='asgi-worker')
+
+        self._lock = threading.Lock()
+        self._dispatched = 0  # requests running or waiting for a pool thread
+        self._receiving = 0
+        self._admitting = 0
+        self.served = 0
+        self.rejected = 0
+        self.timed_out = 0
+        AsyncGateway._current = self
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                for callback in self.on_startup:
+                    callback()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self._executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _full(self):
+        return self._dispatched >= self.workers + self.queue_size
+
+    async def _http(self, scope, receive, send):
+        length = self._header(scope, b'content-length')
+        if self.max_body_bytes and length and length.isdigit() and int(length) > self.max_body_bytes:
+            await self._send_too_large(send)
+            return
+
+        # Shed load before spending bandwidth on a body that would be rejected
+        if self._full():
+            await self._send_busy(send)
+            return
+
+        with self._lock:
+            self._receiving += 1
+        try:
+            body = await asyncio.wait_for(self._read_body(receive), self.body_timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            await self._send_json(send, 408, {
+                'success': False,
+                'error': 'Upload timeout - image too large',
+                'message': 'Image upload timed out. Try with a smaller image or lower resolution.'
+            })
+            return
+        except _BodyTooLarge:
+            await self._send_too_large(send)
+            return
+        except _ClientGone:
+            return
+        finally:
+            with self._lock:
+                self._receiving -= 1
+
+        environ = self._environ(scope, body)
+        lane = None
+        if self._admits(environ):
+            try:
+                lane = await self._admit(environ)
+            except AdmissionRejected as e:
+                # Queue full (503) or deadline passed (504)
+                headers = [(b'retry-after', str(e.retry_after).encode('latin-1'))] if e.retry_after is not None else []
+                await self._send_json(send, e.status_code, e.response_body(), headers=headers)
+                return
+
+        try:
+            if self._full():
+                await self._send_busy(send)
+                return
+
+            with self._lock:
+                self._dispatched += 1
+            try:
+                await self._dispatch(environ, send)
+            finally:
+                with self._lock:
+                    self._dispatched -= 1
+                    self.served += 1
+        finally:
+            # Streamed responses (/detect/batch) hold their slot until the stream ends
+            if lane is not None:
+                self.admission.release(lane)
+
+    def _admits(self, environ):
+        if self.admission is None or not self.admission.enabled or environ['REQUEST_METHOD'] == 'OPTIONS':
+            return False
+        path = environ['PATH_INFO']
+        return path == self.admission_prefix or path.startswith(self.admission_prefix + '/')
+
+    async def _admit(self, environ):
+        """
+        Wait for a lane slot without holding a thread. Returns the lane, or
+        None for invalid admission headers (the app answers those with 400)
+        """
+        headers = EnvironHeaders(environ)
+        lane = self.admission.lane_for(headers)
+        if lane is None:
+            return None
+        try:
+            timeout = self.admission.timeout_for(lane, headers)
+        except ValueError:
+            return None
+
+        started = time.monotonic()
+        deadline = started + timeout
+        with self._lock:
+            self._admitting += 1
+        try:
+            await self.admission.acquire_async(lane, deadline)
+        finally:
+            with self._lock:
+                self._admitting -= 1
+        environ[ADMITTED_ENVIRON_KEY] = {'deadline': deadline, 'wait_ms': (time.monotonic() - started) * 1000}
+        return lane
+
+    async def _read_body(self, receive):
+        chunks = []
+        received = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                raise _ClientGone()
+            chunk = message.get('body', b'')
+            received += len(chunk)
+            if self.max_body_bytes and received > self.max_body_bytes:
+                raise _BodyTooLarge()
+            chunks.append(chunk)
+            if not message.get('more_body', False):
+                return b''.join(chunks)
+
+    async def _dispatch(self, environ, send):
+        """Run the WSGI app on the pool, forwarding its response as it is produced"""
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+
+        def emit(*event):
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+        loop.run_in_executor(self._executor, self._run_wsgi, environ, emit)
+
+        started = False
+        while True:
+            kind, *payload = await events.get()
+            if kind == 'start':
+                status, headers = payload
+                await send({
+                    'type': 'http.response.start',
+                    'status': status,
+                    'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+                })
+                started = True
+            elif kind == 'body':
+                # Streamed responses (/detect/batch) reach the client chunk by chunk
+                await send({'type': 'http.response.body', 'body': payload[0], 'more_body': True})
+            elif kind == 'error' and not started:
+                await self._send_json(send, 500, {
+                    'success': False,
+                    'error': payload[0],
+                    'message': 'Internal server error'
+                })
+                return
+            else:
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+                return
+
+    def _run_wsgi(self, environ, emit):
+        def start_response(status, headers, exc_info=None):
+            emit('start', int(status.split(' ', 1)[0]), headers)
+            return lambda data: emit('body', data)
+
+        try:
+            result = self.wsgi_app(environ, start_response)
+            try:
+                for chunk in result:
+                    if chunk:
+                        emit('body', chunk)
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+        except Exception as e:
+            print(f"❌ Error in request {environ['PATH_INFO']}: {traceback.format_exc()}")
+            emit('error', str(e))
+        else:
+            emit('end')
+
+    @staticmethod
+    def _header(scope, name):
+        for key, value in scope['headers']:
+            if key.lower() == name:
+                return value.decode('latin-1')
+        return None
+
+    @staticmethod
+    def _environ(scope, body):
+        """PEP 3333 environ for a buffered ASGI request"""
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        root_path = scope.get('root_path', '')
+        path = scope['path']
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+            'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope['query_string'].decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.input_terminated': True,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False
+        }
+        for key, value in scope['headers']:
+            name = key.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            # The body is already de-chunked and its length known
+            if name in ('CONTENT_LENGTH', 'TRANSFER_ENCODING'):
+                continue
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+                continue
+            name = 'HTTP_' + name
+            environ[name] = f'{environ[name]},{value}' if name in environ else value
+        return environ
+
+    async def _send_json(self, send, status, payload, headers=()):
+        body = json.dumps(payload).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode('latin-1')),
+                # Answered before Flask-CORS sees the request; the extension still needs to read it
+                (b'access-control-allow-origin', b'*'),
+                *headers
+            ]
+        })
+        await send({'type': 'http.response.body', 'body': body, 'more_body': False})
+
+    async def _send_busy(self, send):
+        with self._lock:
+            self.rejected += 1
+        await self._send_json(send, 503, {
+            'success': False,
+            'error': 'Server busy',
+            'message': f'Too many requests in progress. Retry in {self.retry_after}s.'
+        }, headers=[(b'retry-after', str(self.retry_after).encode('latin-1'))])
+
+    async def _send_too_large(self, send):
+        await self._send_json(send, 413, {
+            'success': False,
+            'error': 'File too large',
+            'message': f'Upload exceeds {self.max_body_bytes / (1024 * 1024):g}MB limit. Please use a smaller image or lower resolution.'
+        })
+
+    def stats(self):
+        with self._lock:
+            dispatched = self._dispatched
+            return {
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+                'running': min(dispatched, self.workers),
+                'queued': max(0, dispatched - self.workers),
+                'receiving': self._receiving,
+                'admitting': self._admitting,
+                'served': self.served,
+                'rejected': self.rejected,
+                'upload_timeouts': self.timed_out
+            }
@@ -0,0 +1,120 @@
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+from queue import Queue, Empty
+
+
+class _BatchItem:
+    __slots__ = ('source', 'confidence', 'kwargs', 'future')
+
+    def __init__(self, source, confidence, kwargs):
+        self.source = source
+        self.confidence = confidence
+        self.kwargs = kwargs
+        self.future = Future()
+
+    @property
+    def group_key(self):
+        # Only requests with identical predict arguments can share a forward pass
+        return (self.confidence, tuple(sorted(self.kwargs.items())))
+
+
+class BatchScheduler:
+    """
+    Dynamic micro-batching in front of the YOLO model.
+
+    Request threads submit single images; one worker thread collects them for
+    up to `max_wait_ms` or until `max_batch_size` images are queued, runs them
+    as one batched model call and hands every result back to its caller.
+    The worker is also the only thread touching the model on this path, so
+    concurrent requests no longer race on the shared YOLO instance.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=8, max_wait_ms=10.0):
+        """
+        Args:
+            predict_fn: Callable(sources, confidence, **kwargs) -> list of results,
+                        one result per source
+            max_batch_size: Maximum number of images per forward pass
+            max_wait_ms: Maximum time to wait for a batch to fill up
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name='yolo-batch-scheduler', daemon=True)
+        self._worker.start()
+
+    def submit(self, source, confidence=0.25, **kwargs):
+        """
+        Queue one image for inference and return a Future with its result
+
+        Raises:
+            RuntimeError: the scheduler is closed (its worker would never run the image)
+        """
+        item = _BatchItem(source, confidence, kwargs)
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError('Batch scheduler is closed')
+            self._queue.put(item)
+        return item.future
+
+    def detect(self, source, confidence=0.25, **kwargs):
+        """Blocking helper: submit one image and wait for its result"""
+        return self.submit(source, confidence, **kwargs).result()
+
+    def close(self):
+        """Stop the worker thread after the images already queued"""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+
+    def _collect(self):
+        """Block for the first item, then gather more until the batch is full or the wait expires"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            closing = None in batch
+            batch = [item for item in batch if item is not None]
+
+            groups = {}
+            for item in batch:
+                groups.setdefault(item.group_key, []).append(item)
+
+            for items in groups.values():
+                self._run_group(items)
+
+            if closing:
+                return
+
+    def _run_group(self, items):
+        head = items[0]
+        try:
+            results = self.predict_fn([item.source for item in items], head.confidence, **head.kwargs)
+            if len(results) != len(items):
+                raise RuntimeError(f"Model returned {len(results)} results for a batch of {len(items)} images")
+        except Exception as e:
+            print(f"Batched inference failed: {traceback.format_exc()}")
+            for item in items:
+                item.future.set_exception(e)
+            return
+
+        for item, result in zip(items, results):
+            item.future.set_result(result)
@@ -0,0 +1,163 @@
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+class CubemapProjector:
+    """
+    Equirectangular <-> cubemap projection with cached remap grids.
+
+    Coordinates follow the krpano convention used by the extension: ath
+    (yaw) 0 at the panorama center, positive to the right; atv (pitch)
+    positive looking down. The `cv2.remap` tables for a given panorama size
+    and face size are built once and reused, so cutting faces costs six
+    remaps per request.
+    """
+
+    FACES = ('front', 'right', 'back', 'left', 'up', 'down')
+
+    # Number of (panorama size, face size) remap tables kept in memory
+    MAX_CACHED_MAPS = 8
+
+    _maps = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _face_directions(face_index, u, v):
+        """
+        3D view directions for face coordinates u (right) and v (down) in [-1, 1].
+        World axes: X = right of the panorama center, Y = up, Z = forward.
+        """
+        one = np.ones_like(u)
+        face = CubemapProjector.FACES[face_index]
+        if face == 'front':
+            return u, -v, one
+        if face == 'right':
+            return one, -v, -u
+        if face == 'back':
+            return -u, -v, -one
+        if face == 'left':
+            return -one, -v, u
+        if face == 'up':
+            return u, one, v
+        return u, -one, -v
+
+    @staticmethod
+    def _directions_to_angles(x, y, z):
+        """Return (ath, atv) in degrees for direction vectors"""
+        ath = np.degrees(np.arctan2(x, z))
+        atv = -np.degrees(np.arctan2(y, np.hypot(x, z)))
+        return ath, atv
+
+    @classmethod
+    def get_maps(cls, width, height, face_size):
+        """Remap tables for the six faces of a `width` x `height` panorama, cached by size"""
+        key = (width, height, face_size)
+        with cls._lock:
+            maps = cls._maps.get(key)
+            if maps is not None:
+                cls._maps.move_to_end(key)
+                return maps
+
+        coords = (np.arange(face_size, dtype=np.float64) + 0.5) / face_size * 2.0 - 1.0
+        u, v = np.meshgrid(coords, coords)
+
+        maps = []
+        for face_index in range(len(cls.FACES)):
+            ath, atv = cls._directions_to_angles(*cls._face_directions(face_index, u, v))
+            map_x = ((ath + 180.0) / 360.0 * width - 0.5) % width
+            map_y = np.clip((atv + 90.0) / 180.0 * height - 0.5, 0, height - 1)
+            # Fixed-point maps make cv2.remap noticeably faster than float maps
+            maps.append(cv2.convertMaps(map_x.astype(np.float32), map_y.astype(np.float32), cv2.CV_16SC2))
+
+        with cls._lock:
+            cls._maps[key] = maps
+            while len(cls._maps) > cls.MAX_CACHED_MAPS:
+                cls._maps.popitem(last=False)
+        return maps
+
+    @classmethod
+    def to_faces(cls, image, face_size):
+        """
+        Cut an equirectangular image into six square cube faces
+
+        Args:
+            image: (H, W, C) numpy array
+            face_size: Edge length of each face in pixels
+
+        Returns:
+            List of six face arrays in FACES order
+        """
+        height, width = image.shape[:2]
+        return [
+            cv2.remap(image, map1, map2, cv2.INTER_LINEAR, borderMode=cv2.BORDER_WRAP)
+            for map1, map2 in cls.get_maps(width, height, face_size)
+        ]
+
+    @classmethod
+    def project_boxes(cls, face_indices, xyxy, face_size, width, height, samples=8):
+        """
+        Project face-space boxes back to equirectangular pixel boxes
+
+        Points along each box outline are mapped to ath/atv and the bounds of
+        the projected outline are taken. Boxes on the up/down faces that
+        contain the pole span every longitude.
+
+        Args:
+            face_indices: (N,) face index of each box
+            xyxy: (N, 4) boxes in face pixel coordinates
+            face_size: Face edge length in pixels
+            width, height: Panorama size
+            samples: Points per box edge
+
+        Returns:
+            (N, 4) equirectangular boxes; x1 is in [0, W) and x2 may exceed W
+            for boxes crossing the seam
+        """
+        if len(xyxy) == 0:
+            return np.zeros((0, 4))
+
+        t = np.linspace(0.0, 1.0, samples)
+        x1, y1, x2, y2 = (xyxy[:, i:i + 1] for i in range(4))
+        px = np.concatenate([x1 + (x2 - x1) * t, np.repeat(x2, samples, 1),
+                             x2 - (x2 - x1) * t, np.repeat(x1, samples, 1)], axis=1)
+        py = np.concatenate([np.repeat(y1, samples, 1), y1 + (y2 - y1) * t,
+                             np.repeat(y2, samples, 1), y2 - (y2 - y1) * t], axis=1)
+        u = px / face_size * 2.0 - 1.0
+        v = py / face_size * 2.0 - 1.0
+
+        ath = np.empty_like(u)
+        atv = np.empty_like(u)
+        for face_index in np.unique(face_indices):
+            rows = face_indices == face_index
+            ath[rows], atv[rows] = cls._directions_to_angles(
+                *cls._face_directions(int(face_index), u[rows], v[rows]))
+
+        # Unwrap longitudes around the first outline point so seam crossings stay contiguous
+        ath = ath[:, :1] + (ath - ath[:, :1] + 180.0) % 360.0 - 180.0
+        ath_min, ath_max = ath.min(axis=1), ath.max(axis=1)
+        atv_min, atv_max = atv.min(axis=1), atv.max(axis=1)
+
+        # A box around the pole on the up/down face covers all longitudes
+        center = face_size / 2.0
+        contains_pole = ((xyxy[:, 0] <= center) & (xyxy[:, 2] >= center) &
+                         (xyxy[:, 1] <= center) & (xyxy[:, 3] >= center))
+        up = contains_pole & (face_indices == cls.FACES.index('up'))
+        down = contains_pole & (face_indices == cls.FACES.index('down'))
+        ath_min[up | down], ath_max[up | down] = -180.0, 180.0
+        atv_min[up] = -90.0
+        atv_max[down] = 90.0
+
+        out = np.stack([
+            (ath_min + 180.0) / 360.0 * width,
+            (atv_min + 90.0) / 180.0 * height,
+            (ath_max + 180.0) / 360.0 * width,
+            (atv_max + 90.0) / 180.0 * height
+        ], axis=1)
+
+        shift = np.floor(out[:, 0] / width) * width
+        out[:, 0] -= shift
+        out[:, 2] -= shift
+        return out
@@ -0,0 +1,155 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from queue import Queue, Full
+from config import Config
+
+
+class DebugCapture:
+    """
+    Off-the-hot-path capture of uploaded images for debugging.
+
+    When enabled, a sampled fraction of requests hand their original upload
+    bytes (no re-encode) to a background writer thread through a bounded
+    queue; captures are dropped instead of blocking when the queue is full.
+    The writer keeps the capture directory under a file-count and size limit
+    by deleting the oldest captures first. Only files named like its own
+    captures are counted or deleted, so other files in the directory are
+    never touched.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    # Magic bytes -> file extension for the formats browsers upload
+    _SIGNATURES = (
+        (b'\xff\xd8\xff', 'jpg'),
+        (b'\x89PNG', 'png'),
+        (b'RIFF', 'webp'),
+        (b'GIF8', 'gif'),
+    )
+    # <timestamp>_<endpoint>_<seq>.<ext>, as written by _run
+    _CAPTURE_NAME = re.compile(r'^\d{8}-\d{6}_[a-z]+_\d{6,}\.(jpg|png|webp|gif|bin|json)$')
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(
+                        enabled=Config.DEBUG_CAPTURE_ENABLED,
+                        directory=Config.DEBUG_CAPTURE_DIR,
+                        sample_rate=Config.DEBUG_CAPTURE_SAMPLE_RATE,
+                        queue_size=Config.DEBUG_CAPTURE_QUEUE_SIZE,
+                        max_files=Config.DEBUG_CAPTURE_MAX_FILES,
+                        max_bytes=int(Config.DEBUG_CAPTURE_MAX_MB * 1024 * 1024)
+                    )
+        return cls._instance
+
+    def __init__(self, enabled=False, directory='debug_images', sample_rate=1.0,
+                 queue_size=32, max_files=200, max_bytes=200 * 1024 * 1024):
+        self.enabled = enabled
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.captured = 0
+        self.dropped = 0
+        self._seq = 0
+        self._stats_lock = threading.Lock()
+        self._queue = Queue(maxsize=queue_size)
+        self._files = deque()  # (path, size) oldest first
+        self._total_bytes = 0
+
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+            self._load_existing()
+            threading.Thread(target=self._run, name='debug-capture-writer', daemon=True).start()
+
+    def capture(self, endpoint, image_bytes, metadata=None):
+        """
+        Queue the raw upload of one request for writing (never blocks)
+
+        Args:
+            endpoint: Short endpoint name used in the file name (e.g. 'hybrid')
+            image_bytes: Original uploaded bytes
+            metadata: Optional JSON-serializable request details (ROI, params),
+                      written next to the image
+        """
+        if not self.enabled or random.random() >= self.sample_rate:
+            return
+
+        with self._stats_lock:
+            self._seq += 1
+            seq = self._seq
+
+        try:
+            self._queue.put_nowait((endpoint, seq, time.time(), image_bytes, metadata))
+        except Full:
+            with self._stats_lock:
+                self.dropped += 1
+
+    def _extension(self, image_bytes):
+        for signature, ext in self._SIGNATURES:
+            if image_bytes.startswith(signature):
+                return ext
+        return 'bin'
+
+    def _load_existing(self):
+        """Pick up captures left by a previous run so retention covers them too"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not self._CAPTURE_NAME.match(name):
+                continue
+            path = os.path.join(self.directory, name)
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(entries):
+            self._files.append((path, size))
+            self._total_bytes += size
+        self._enforce_retention()
+
+    def _run(self):
+        while True:
+            endpoint, seq, timestamp, image_bytes, metadata = self._queue.get()
+            try:
+                stem = time.strftime('%Y%m%d-%H%M%S', time.localtime(timestamp)) + f'_{endpoint}_{seq:06d}'
+                self._write(f'{stem}.{self._extension(image_bytes)}', image_bytes)
+                if metadata:
+                    self._write(f'{stem}.json', json.dumps(metadata, default=str).encode('utf-8'))
+                with self._stats_lock:
+                    self.captured += 1
+                self._enforce_retention()
+            except OSError as e:
+                print(f"⚠️ Debug capture write failed: {e}")
+
+    def _write(self, name, data):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        self._files.append((path, len(data)))
+        self._total_bytes += len(data)
+
+    def _enforce_retention(self):
+        while self._files and (len(self._files) > self.max_files or self._total_bytes > self.max_bytes):
+            path, size = self._files.popleft()
+            self._total_bytes -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'enabled': self.enabled,
+                'sample_rate': self.sample_rate,
+                'captured': self.captured,
+                'dropped': self.dropped,
+                'queued': self._queue.qsize()
+            }
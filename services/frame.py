@@ -0,0 +1,83 @@
+import cv2
+import numpy as np
+from PIL import Image
+
+
+class Frame:
+    """
+    One decoded image shared by every processing stage of a request.
+
+    Holds a single RGB uint8 array; the BGR (YOLO), grayscale (frame
+    detection) and LAB (GrabCut contrast enhancement) versions are computed
+    on first use and cached. `crop` returns a Frame backed by a view into
+    the parent's pixels, and reuses the parent's cached conversions by
+    slicing when they already exist.
+    """
+
+    __slots__ = ('rgb', '_parent', '_origin', '_bgr', '_gray', '_lab')
+
+    def __init__(self, rgb, parent=None, origin=(0, 0)):
+        self.rgb = rgb
+        self._parent = parent
+        self._origin = origin
+        self._bgr = None
+        self._gray = None
+        self._lab = None
+
+    @classmethod
+    def from_image(cls, image):
+        """Wrap a Frame, PIL image or numpy array (RGB, gray or RGBA) as a Frame"""
+        if isinstance(image, Frame):
+            return image
+        if isinstance(image, Image.Image):
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            return cls(np.asarray(image))
+
+        array = np.asarray(image)
+        if array.ndim == 2:
+            array = cv2.cvtColor(array, cv2.COLOR_GRAY2RGB)
+        elif array.shape[2] == 4:
+            array = cv2.cvtColor(array, cv2.COLOR_RGBA2RGB)
+        return cls(array)
+
+    @property
+    def width(self):
+        return self.rgb.shape[1]
+
+    @property
+    def height(self):
+        return self.rgb.shape[0]
+
+    def _derived(self, name, code):
+        cached = getattr(self, name)
+        if cached is not None:
+            return cached
+
+        parent_view = getattr(self._parent, name) if self._parent is not None else None
+        if parent_view is not None:
+            x, y = self._origin
+            cached = parent_view[y:y + self.height, x:x + self.width]
+        else:
+            cached = cv2.cvtColor(self.rgb, code)
+        setattr(self, name, cached)
+        return cached
+
+    @property
+    def bgr(self):
+        """BGR array, the channel order ultralytics expects for numpy input"""
+        return self._derived('_bgr', cv2.COLOR_RGB2BGR)
+
+    @property
+    def gray(self):
+        return self._derived('_gray', cv2.COLOR_RGB2GRAY)
+
+    @property
+    def lab(self):
+        return self._derived('_lab', cv2.COLOR_RGB2LAB)
+
+    def crop(self, x, y, w, h):
+        """Frame for the region (x, y, w, h), sharing pixels with this one"""
+        x, y = max(0, int(x)), max(0, int(y))
+        w, h = min(int(w), self.width - x), min(int(h), self.height - y)
+        return Frame(self.rgb[y:y + h, x:x + w], parent=self, origin=(x, y))
@@ -0,0 +1,119 @@
+import time
+from concurrent.futures import wait
+from config import Config
+from services.image_service import ImageService
+from services.task_pool import TaskPool
+
+
+class GrabCutRefiner:
+    """
+    Refines mask-less YOLO boxes into polygons with GrabCut, all boxes at once.
+
+    The CLAHE contrast enhancement is computed once for the whole ROI and
+    every box crop slices it. The per-box GrabCut runs go to the shared
+    TaskPool (OpenCV releases the GIL, so they run in parallel) and are
+    collected against a per-request time budget: boxes that are not done
+    by the deadline keep their plain bbox, so the endpoint's latency is
+    bounded by inference + budget however many objects are found.
+    """
+
+    # Padding around each box, as a fraction of its size, so GrabCut sees background
+    PADDING = 0.2
+    # Inset of the GrabCut rectangle inside the box
+    MARGIN = 2
+
+    @staticmethod
+    def _job(roi_frame, enhanced, box):
+        """Padded crop (x, y, w, h) and GrabCut rect for one xyxy box, or None if empty"""
+        x1, y1, x2, y2 = box
+        box_x, box_y = int(x1), int(y1)
+        box_w, box_h = int(x2 - x1), int(y2 - y1)
+
+        # Add padding (20% of size) to include the full object
+        pad_w = int(box_w * GrabCutRefiner.PADDING)
+        pad_h = int(box_h * GrabCutRefiner.PADDING)
+
+        crop_x = max(0, box_x - pad_w)
+        crop_y = max(0, box_y - pad_h)
+        crop_w = min(box_w + pad_w * 2, roi_frame.width - crop_x)
+        crop_h = min(box_h + pad_h * 2, roi_frame.height - crop_y)
+        if crop_w <= 0 or crop_h <= 0:
+            return None
+
+        # The object is at (pad_w, pad_h) inside the crop; keep a slight margin inside the box
+        margin = GrabCutRefiner.MARGIN
+        gc_rect = (
+            pad_w + margin,
+            pad_h + margin,
+            max(1, box_w - 2 * margin),
+            max(1, box_h - 2 * margin)
+        )
+        crop = (crop_x, crop_y, crop_w, crop_h)
+        return (
+            roi_frame.crop(*crop),
+            enhanced[crop_y:crop_y + crop_h, crop_x:crop_x + crop_w],
+            gc_rect,
+            crop
+        )
+
+    @staticmethod
+    def _segment(obj_crop, enhanced_crop, gc_rect, deadline):
+        # Jobs still queued when the budget ran out are skipped
+        if time.monotonic() >= deadline:
+            return None
+        return ImageService.segment_generic_object(obj_crop, grabcut_rect=gc_rect, enhanced=enhanced_crop)
+
+    @staticmethod
+    def refine(roi_frame, boxes, budget_ms=None):
+        """
+        Segment every box in the ROI within a time budget
+
+        Args:
+            roi_frame: Frame of the region the boxes were detected in
+            boxes: (N, 4) xyxy boxes in ROI coordinates
+            budget_ms: Time budget for all boxes (default Config.GRABCUT_BUDGET_MS,
+                       0 = no limit)
+
+        Returns:
+            List of N polygons ([{'x', 'y'}] in ROI coordinates) or None where
+            GrabCut failed or did not finish in time
+        """
+        budget_ms = Config.GRABCUT_BUDGET_MS if budget_ms is None else budget_ms
+        deadline = time.monotonic() + budget_ms / 1000.0 if budget_ms else float('inf')
+        polygons = [None] * len(boxes)
+        if not len(boxes):
+            return polygons
+
+        enhanced = ImageService.enhance_contrast(roi_frame)
+
+        pool = TaskPool.get_instance()
+        futures = {}
+        for i, box in enumerate(boxes):
+            job = GrabCutRefiner._job(roi_frame, enhanced, box)
+            if job is None:
+                continue
+            obj_crop, enhanced_crop, gc_rect, crop = job
+            future = pool.submit(GrabCutRefiner._segment, obj_crop, enhanced_crop, gc_rect, deadline)
+            futures[future] = (i, crop)
+
+        timeout = None if deadline == float('inf') else max(0.0, deadline - time.monotonic())
+        done, pending = wait(futures, timeout=timeout)
+        for future in pending:
+            future.cancel()
+        if pending:
+            print(f"⏱️ GrabCut budget of {budget_ms:g}ms exhausted, {len(pending)}/{len(futures)} boxes left unrefined")
+
+        for future in done:
+            i, (crop_x, crop_y, _, _) = futures[future]
+            try:
+                refined = future.result()
+            except Exception as e:
+                print(f"GrabCut failed: {e}")
+                continue
+            if refined and refined.get('polygon'):
+                polygons[i] = [
+                    {'x': point['x'] + crop_x, 'y': point['y'] + crop_y}
+                    for point in refined['polygon']
+                ]
+
+        return polygons
@@ -0,0 +1,92 @@
+import io
+import math
+import numpy as np
+from PIL import Image
+from services.frame import Frame
+from services.stage_timer import StageTimer
+
+
+class DecodedImage:
+    """
+    An uploaded image decoded to an RGB Frame, possibly at reduced resolution.
+
+    `width`/`height` are the size of the original upload; `frame` may be
+    smaller, with `scale` = original / decoded per axis. Coordinates found on
+    the decoded frame are mapped back with `to_original` or
+    `scale_detections`.
+    """
+
+    __slots__ = ('frame', 'width', 'height', 'scale')
+
+    def __init__(self, frame, original_size):
+        self.frame = frame
+        self.width, self.height = original_size
+        self.scale = (self.width / frame.width, self.height / frame.height)
+
+    @property
+    def reduced(self):
+        return (self.frame.width, self.frame.height) != (self.width, self.height)
+
+    def to_original(self, xyxy):
+        """Scale (N, 4) boxes from decoded to original pixel coordinates"""
+        if not self.reduced:
+            return xyxy
+        sx, sy = self.scale
+        return xyxy * np.array([sx, sy, sx, sy], dtype=np.float64)
+
+    def scale_detections(self, detections):
+        """Scale the 'bbox' (and 'corners') of detection dicts to original pixel coordinates (in place)"""
+        if not self.reduced:
+            return detections
+        sx, sy = self.scale
+        for detection in detections:
+            bbox = detection['bbox']
+            for key, factor in (('x1', sx), ('y1', sy), ('x2', sx), ('y2', sy), ('width', sx), ('height', sy)):
+                if key in bbox:
+                    bbox[key] = round(bbox[key] * factor, 2)
+            for point in detection.get('corners', ()):
+                point['x'] = round(point['x'] * sx, 2)
+                point['y'] = round(point['y'] * sy, 2)
+        return detections
+
+
+class ImageDecoder:
+    """
+    Decodes uploads straight to the resolution the model needs.
+
+    JPEGs are decoded with libjpeg DCT scaling (PIL draft mode) to the
+    smallest 1/2, 1/4 or 1/8 size whose long side is still at least
+    `target_size`, which is far cheaper in time and memory than decoding
+    a full-resolution capture only for YOLO to downscale it. Other formats
+    are decoded at full size.
+    """
+
+    @staticmethod
+    def decode(image_bytes, target_size=None):
+        """
+        Decode image bytes to an RGB DecodedImage
+
+        Args:
+            image_bytes: Encoded image
+            target_size: Minimum long side to keep (e.g. the model imgsz);
+                         None or 0 decodes at full resolution
+
+        Returns:
+            DecodedImage
+        """
+        with StageTimer.stage('decode'):
+            image = Image.open(io.BytesIO(image_bytes))
+            original_size = image.size
+
+            if target_size and image.format == 'JPEG' and max(original_size) > target_size:
+                ratio = target_size / max(original_size)
+                image.draft('RGB', (math.ceil(original_size[0] * ratio), math.ceil(original_size[1] * ratio)))
+            image.load()
+
+        with StageTimer.stage('convert'):
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            # Pixels leave PIL once; every later stage shares this array
+            frame = Frame(np.asarray(image))
+
+        return DecodedImage(frame, original_size)
@@ -1,133 +1,248 @@
 import cv2
 import numpy as np
-from PIL import Image
+from config import Config
+from services.frame import Frame
 
 class ImageService:
+    # Bounding box aspect ratio range accepted as a picture frame
+    FRAME_MIN_ASPECT = 0.3
+    FRAME_MAX_ASPECT = 3.0
+    # Full-resolution contours closer than this to a search window's border
+    # may differ from the full-image ones (blur, Canny and dilation reach)
+    WINDOW_MARGIN = 8
+
+    @staticmethod
+    def _edges(gray):
+        """Blurred Canny edges, dilated to close gaps"""
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        edges = cv2.Canny(blurred, 50, 150)
+        kernel = np.ones((3, 3), np.uint8)
+        return cv2.dilate(edges, kernel, iterations=2)
+
+    @staticmethod
+    def _order_corners(points):
+        """Order 4 points clockwise starting top-left"""
+        total = points.sum(axis=1)
+        diff = points[:, 1] - points[:, 0]
+        return np.array([
+            points[np.argmin(total)],
+            points[np.argmin(diff)],
+            points[np.argmax(total)],
+            points[np.argmax(diff)]
+        ], dtype=np.float64)
+
+    @staticmethod
+    def _quadrilateral(contour):
+        """Fit 4 corners to a contour: polygon approximation, else the minimum-area rectangle"""
+        perimeter = cv2.arcLength(contour, True)
+        for ratio in (0.02, 0.04, 0.06):
+            approx = cv2.approxPolyDP(contour, ratio * perimeter, True)
+            if len(approx) == 4:
+                return ImageService._order_corners(approx.reshape(4, 2).astype(np.float64))
+            if len(approx) < 4:
+                break
+        return ImageService._order_corners(cv2.boxPoints(cv2.minAreaRect(contour)).astype(np.float64))
+
+    @staticmethod
+    def _frame_detection(contour, min_area, max_area, width, height):
+        """Detection for a full-resolution contour that passes the frame checks, else None"""
+        # Filter by area
+        area = cv2.contourArea(contour)
+        if area < min_area or area > max_area:
+            return None
+
+        # Check if it's roughly rectangular (4 to 8 corners)
+        epsilon = 0.02 * cv2.arcLength(contour, True)
+        approx = cv2.approxPolyDP(contour, epsilon, True)
+        if not 4 <= len(approx) <= 8:
+            return None
+
+        # Filter frames by aspect ratio (not too thin)
+        x, y, w, h = cv2.boundingRect(contour)
+        aspect_ratio = float(w) / h if h > 0 else 0
+        if not ImageService.FRAME_MIN_ASPECT < aspect_ratio < ImageService.FRAME_MAX_ASPECT:
+            return None
+
+        # Calculate confidence based on how rectangular it is
+        # More sides = less rectangular = lower confidence
+        confidence = max(0.4, 1.0 - (len(approx) - 4) * 0.1)
+
+        # A fitted rectangle may reach past the image edge
+        corners = ImageService._quadrilateral(contour)
+        corners[:, 0] = np.clip(corners[:, 0], 0, width)
+        corners[:, 1] = np.clip(corners[:, 1], 0, height)
+
+        return {
+            'class': 'picture_frame',
+            'class_id': -1,  # Custom class
+            'confidence': round(confidence, 4),
+            'bbox': {
+                'x1': float(x),
+                'y1': float(y),
+                'x2': float(x + w),
+                'y2': float(y + h),
+                'width': float(w),
+                'height': float(h)
+            },
+            'corners': [{'x': float(cx), 'y': float(cy)} for cx, cy in corners]
+        }
+
+    @staticmethod
+    def _window_contours(gray, rect, pad):
+        """
+        Full-resolution contours of the objects inside a padded window around
+        `rect` (x, y, w, h), or None when an object overlapping `rect` runs
+        into the window border and the window must grow.
+
+        Edges near a window border can differ from the full-image edges, so
+        only contours clear of the border (or on the image border) are kept;
+        those are the same contours the full-image search finds.
+        """
+        height, width = gray.shape[:2]
+        x, y, w, h = rect
+        x0, y0 = max(0, int(x) - pad), max(0, int(y) - pad)
+        x1, y1 = min(width, int(np.ceil(x + w)) + pad), min(height, int(np.ceil(y + h)) + pad)
+
+        contours, _ = cv2.findContours(ImageService._edges(gray[y0:y1, x0:x1]),
+                                       cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE,
+                                       offset=(x0, y0))
+        margin = ImageService.WINDOW_MARGIN
+        inside = []
+        for contour in contours:
+            cx, cy, cw, ch = cv2.boundingRect(contour)
+            clear = ((x0 == 0 or cx - x0 >= margin) and (y0 == 0 or cy - y0 >= margin) and
+                     (x1 == width or x1 - (cx + cw) >= margin) and (y1 == height or y1 - (cy + ch) >= margin))
+            if clear:
+                inside.append(contour)
+            elif cx < x + w and x < cx + cw and cy < y + h and y < cy + ch:
+                return None
+        return inside
+
     @staticmethod
-    def detect_picture_frames(image, min_area=5000, max_area=100000):
+    def detect_picture_frames(image, min_area=5000, max_area=100000, max_size=None):
         """
         Detect rectangular picture frames using edge detection and contour analysis
+
+        With max_size, contours are first searched on a downscaled pyramid
+        level (long side <= max_size) to find where frames may be. Only
+        padded windows around those candidates are re-traced at full
+        resolution, and the frame checks run on the full-resolution
+        contours, so the frames found are the same as with max_size=0.
         
         Args:
-            image: PIL Image or numpy array
+            image: Frame, PIL Image or numpy array
             min_area: Minimum area for a valid frame (default 5000 pixels)
             max_area: Maximum area for a valid frame (default 100000 pixels)
+            max_size: Long side of the pyramid level used for contour search
+                      (default Config.FRAME_DETECT_MAX_SIZE, 0 = full resolution)
         
         Returns:
-            List of frame detections with bbox coordinates
+            List of frame detections with bbox coordinates and the frame's
+            four 'corners' (clockwise from top-left)
         """
-        # Convert PIL Image to numpy array if needed
-        if isinstance(image, Image.Image):
-            img_array = np.array(image)
-        else:
-            img_array = image
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
-        
-        # Apply Gaussian blur to reduce noise
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-        
-        # Apply Canny edge detection
-        edges = cv2.Canny(blurred, 50, 150)
-        
-        # Dilate edges to close gaps
-        kernel = np.ones((3, 3), np.uint8)
-        dilated = cv2.dilate(edges, kernel, iterations=2)
-        
-        # Find contours
-        contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
+        # Grayscale is cached on the frame and shared with other stages
+        gray = Frame.from_image(image).gray
+        height, width = gray.shape[:2]
+        max_size = Config.FRAME_DETECT_MAX_SIZE if max_size is None else max_size
+
+        # Halve the image until it fits max_size
+        level = gray
+        factor = 1
+        while max_size and max(level.shape[:2]) > max_size and min(level.shape[:2]) >= 64:
+            level = cv2.pyrDown(level)
+            factor *= 2
+
+        contours, _ = cv2.findContours(ImageService._edges(level), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return []
+
+        if factor == 1:
+            return [detection for detection in
+                    (ImageService._frame_detection(c, min_area, max_area, width, height) for c in contours)
+                    if detection is not None]
+
+        # Candidates in full-resolution units. A contour's area can be far below
+        # its bounding box (open outlines), so only the box area bounds it; the
+        # limits are loose because coarse outlines are a few pixels off
+        rects = np.array([cv2.boundingRect(c) for c in contours], dtype=np.float64) * factor
+        slack = 2 * factor
+        aspect = (rects[:, 2] + slack) / np.maximum(rects[:, 3] - slack, 1.0)
+        inverse = (rects[:, 3] + slack) / np.maximum(rects[:, 2] - slack, 1.0)
+        candidates = np.flatnonzero(
+            ((rects[:, 2] + slack) * (rects[:, 3] + slack) >= min_area) &
+            (aspect > ImageService.FRAME_MIN_ASPECT) & (inverse > 1.0 / ImageService.FRAME_MAX_ASPECT)
+        )
+
         frame_detections = []
-        
-        for contour in contours:
-            # Calculate contour area
-            area = cv2.contourArea(contour)
-            
-            # Filter by area
-            if area < min_area or area > max_area:
-                continue
-            
-            # Approximate contour to polygon
-            epsilon = 0.02 * cv2.arcLength(contour, True)
-            approx = cv2.approxPolyDP(contour, epsilon, True)
-            
-            # Check if it's roughly rectangular (4 corners)
-            if len(approx) >= 4 and len(approx) <= 8:
-                # Get bounding rectangle
-                x, y, w, h = cv2.boundingRect(contour)
-                
-                # Calculate aspect ratio
-                aspect_ratio = float(w) / h if h > 0 else 0
-                
-                # Filter frames: aspect ratio between 0.3 and 3.0 (not too thin)
-                if 0.3 < aspect_ratio < 3.0:
-                    # Calculate confidence based on how rectangular it is
-                    # More sides = less rectangular = lower confidence
-                    confidence = max(0.4, 1.0 - (len(approx) - 4) * 0.1)
-                    
-                    detection = {
-                        'class': 'picture_frame',
-                        'class_id': -1,  # Custom class
-                        'confidence': round(confidence, 4),
-                        'bbox': {
-                            'x1': float(x),
-                            'y1': float(y),
-                            'x2': float(x + w),
-                            'y2': float(y + h),
-                            'width': float(w),
-                            'height': float(h)
-                        }
-                    }
+        seen = set()
+        for i in candidates:
+            rect = rects[i]
+            pad = int(max(rect[2], rect[3]) * 0.05) + ImageService.WINDOW_MARGIN + 2 * factor
+            window = ImageService._window_contours(gray, rect, pad)
+            while window is None:
+                # Part of the object lies outside the window
+                pad *= 2
+                window = ImageService._window_contours(gray, rect, pad)
+
+            for contour in window:
+                key = cv2.boundingRect(contour) + (len(contour),)
+                if key in seen:
+                    # Found from an overlapping candidate's window already
+                    continue
+                seen.add(key)
+                detection = ImageService._frame_detection(contour, min_area, max_area, width, height)
+                if detection is not None:
                     frame_detections.append(detection)
-        
 
         return frame_detections
 
 
     @staticmethod
-    def segment_generic_object(image, grabcut_rect=None):
+    def enhance_contrast(image):
+        """
+        CLAHE on the L channel, so dark objects separate better in GrabCut
+        
+        Args:
+            image: Frame, PIL Image or numpy array
+            
+        Returns:
+            Enhanced RGB numpy array
+        """
+        # LAB is cached on the frame (sliced from the ROI when it was converted there)
+        l, a, b = cv2.split(Frame.from_image(image).lab)
+        
+        # Apply CLAHE to L-channel
+        clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
+        cl = clahe.apply(l)
+        
+        # Merge and convert back to RGB
+        limg = cv2.merge((cl,a,b))
+        return cv2.cvtColor(limg, cv2.COLOR_LAB2RGB)
+
+    @staticmethod
+    def segment_generic_object(image, grabcut_rect=None, enhanced=None):
         """
         Segment the most prominent object in the image using GrabCut and contours.
         Useful when YOLO fails to detect a specific class.
         
         Args:
-            image: PIL Image or numpy array
+            image: Frame, PIL Image or numpy array
             grabcut_rect: Optional (x, y, w, h) tuple for GrabCut initialization. 
                           If None, uses the whole image with a small margin.
+            enhanced: Optional contrast-enhanced RGB array of the same region
+                      (from enhance_contrast), computed here when omitted
             
         Returns:
             Dictionary with 'polygon' and 'bbox' or None if failed
         """
-        # Convert PIL Image to numpy array if needed
-        if isinstance(image, Image.Image):
-            img_array = np.array(image)
-        else:
-            img_array = image
-            
-        # Ensure RGB
-        if len(img_array.shape) == 2:
-            img_array = cv2.cvtColor(img_array, cv2.COLOR_GRAY2RGB)
-        elif img_array.shape[2] == 4:
-            img_array = cv2.cvtColor(img_array, cv2.COLOR_RGBA2RGB)
+        # Wrap as a Frame (RGB, no copy for Frames and RGB arrays)
+        frame = Frame.from_image(image)
+        img_array = frame.rgb
             
         height, width = img_array.shape[:2]
         
         # Pre-processing: Enhance contrast if image is dark
-        # Convert to LAB color space
-        lab = cv2.cvtColor(img_array, cv2.COLOR_RGB2LAB)
-        l, a, b = cv2.split(lab)
-        
-        # Apply CLAHE to L-channel
-        clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
-        cl = clahe.apply(l)
-        
-        # Merge and convert back to RGB
-        limg = cv2.merge((cl,a,b))
-        enhanced_img = cv2.cvtColor(limg, cv2.COLOR_LAB2RGB)
-        
-        # Use enhanced image for processing
-        processing_img = enhanced_img
+        processing_img = ImageService.enhance_contrast(frame) if enhanced is None else enhanced
         
         # 1. Try GrabCut initialized with a center rectangle
         mask = np.zeros(img_array.shape[:2], np.uint8)
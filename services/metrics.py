@@ -0,0 +1,168 @@
+import bisect
+import threading
+from config import Config
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense (values in seconds)"""
+
+    # Upper bounds in seconds; a +Inf bucket is implied
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def copy(self):
+        snapshot = Histogram()
+        snapshot.counts = list(self.counts)
+        snapshot.sum = self.sum
+        snapshot.count = self.count
+        return snapshot
+
+    def cumulative(self):
+        """(le label, cumulative count) pairs including +Inf"""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.BUCKETS + (float('inf'),), self.counts):
+            total += count
+            pairs.append(('+Inf' if bound == float('inf') else f'{bound:g}', total))
+        return pairs
+
+
+class Metrics:
+    """
+    In-process request and stage metrics, exposed in Prometheus text format.
+
+    Every finished request adds its total duration and the per-stage
+    timings collected by StageTimer to histograms labelled by endpoint
+    (the route rule, not the raw path) and stage, plus a request counter
+    by endpoint and status code. Rendering takes a snapshot under a lock,
+    so scraping does not block request handling for long.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(enabled=Config.METRICS_ENABLED)
+        return cls._instance
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._requests = {}         # (endpoint, method, status) -> count
+        self._request_seconds = {}  # endpoint -> Histogram
+        self._stage_seconds = {}    # (endpoint, stage) -> Histogram
+
+    def observe_request(self, endpoint, method, status, timings):
+        """
+        Record one finished request
+
+        Args:
+            endpoint: Route rule (e.g. '/detect/hybrid')
+            method: HTTP method
+            status: Response status code
+            timings: Stage -> milliseconds from StageTimer, with 'total'
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            key = (endpoint, method, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+            for stage, duration_ms in timings.items():
+                if stage == 'total':
+                    histogram = self._request_seconds.get(endpoint)
+                    if histogram is None:
+                        histogram = self._request_seconds[endpoint] = Histogram()
+                else:
+                    histogram = self._stage_seconds.get((endpoint, stage))
+                    if histogram is None:
+                        histogram = self._stage_seconds[(endpoint, stage)] = Histogram()
+                histogram.observe(duration_ms / 1000.0)
+
+    @staticmethod
+    def _labels(**labels):
+        def escape(value):
+            return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+    @staticmethod
+    def _histogram_lines(name, histogram, labels):
+        lines = []
+        for le, count in histogram.cumulative():
+            lines.append(f'{name}_bucket{Metrics._labels(**labels, le=le)} {count}')
+        lines.append(f'{name}_sum{Metrics._labels(**labels)} {histogram.sum:.6f}')
+        lines.append(f'{name}_count{Metrics._labels(**labels)} {histogram.count}')
+        return lines
+
+    def render(self, extra_counters=None, extra_gauges=None, extra_histograms=None):
+        """
+        Prometheus text exposition of all metrics
+
+        Args:
+            extra_counters: Optional {name: (help, value)} counters to append
+                            (e.g. result cache hits); value may also be a
+                            list of (labels dict, value)
+            extra_gauges: Same for gauges (e.g. queue depth per lane)
+            extra_histograms: Optional {name: (help, [(labels dict, Histogram)])}
+        """
+        with self._lock:
+            requests = dict(self._requests)
+            request_seconds = {k: self._copy(h) for k, h in self._request_seconds.items()}
+            stage_seconds = {k: self._copy(h) for k, h in self._stage_seconds.items()}
+
+        lines = [
+            '# HELP yolo_requests_total Requests handled, by endpoint, method and status',
+            '# TYPE yolo_requests_total counter'
+        ]
+        for (endpoint, method, status), count in sorted(requests.items()):
+            lines.append(f'yolo_requests_total{self._labels(endpoint=endpoint, method=method, status=status)} {count}')
+
+        lines += [
+            '# HELP yolo_request_duration_seconds Server-side request duration',
+            '# TYPE yolo_request_duration_seconds histogram'
+        ]
+        for endpoint, histogram in sorted(request_seconds.items()):
+            lines += self._histogram_lines('yolo_request_duration_seconds', histogram, {'endpoint': endpoint})
+
+        lines += [
+            '# HELP yolo_stage_duration_seconds Time spent per processing stage',
+            '# TYPE yolo_stage_duration_seconds histogram'
+        ]
+        for (endpoint, stage), histogram in sorted(stage_seconds.items()):
+            lines += self._histogram_lines('yolo_stage_duration_seconds', histogram,
+                                           {'endpoint': endpoint, 'stage': stage})
+
+        for kind, extras in (('counter', extra_counters), ('gauge', extra_gauges)):
+            for name, (help_text, value) in (extras or {}).items():
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+                if isinstance(value, list):
+                    lines += [f'{name}{self._labels(**labels)} {v}' for labels, v in value]
+                else:
+                    lines.append(f'{name} {value}')
+
+        for name, (help_text, histograms) in (extra_histograms or {}).items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+            for labels, histogram in histograms:
+                lines += self._histogram_lines(name, histogram, labels)
+
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _copy(histogram):
+        return histogram.copy()
@@ -0,0 +1,126 @@
+import glob
+import hashlib
+import os
+import shutil
+import threading
+from config import Config
+
+
+class ModelExporter:
+    """
+    Serves `.pt` weights through an exported ONNX or OpenVINO model.
+
+    The export runs once: artifacts are cached in Config.EXPORT_DIR under a
+    name built from the weights' stem, a hash of the weights file and the
+    export input size, so changed weights get a fresh export on the next
+    start and stale artifacts for the same weights name are removed. The
+    exported model is loaded through ultralytics' YOLO class like the `.pt`
+    file, so callers keep the same predict interface. If the export fails
+    (e.g. onnx/openvino not installed), the PyTorch model is served.
+    """
+
+    BACKENDS = ('pytorch', 'onnx', 'openvino')
+    ARTIFACT_SUFFIX = {'onnx': '.onnx', 'openvino': '_openvino_model'}
+
+    # Exports are CPU- and memory-heavy; run one at a time
+    _export_lock = threading.Lock()
+
+    @staticmethod
+    def _yolo(model_path, task=None):
+        # Imported on first load: ultralytics pulls in torch, which takes
+        # seconds and would otherwise delay binding the server port
+        from ultralytics import YOLO
+        return YOLO(model_path, task=task)
+
+    @staticmethod
+    def weights_hash(path):
+        """Short SHA-256 of a weights file"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()[:16]
+
+    @staticmethod
+    def artifact_path(weights_path, backend, imgsz, export_dir=None):
+        """Cache location of the export of `weights_path` for a backend and input size"""
+        stem = os.path.splitext(os.path.basename(weights_path))[0]
+        name = f'{stem}-{ModelExporter.weights_hash(weights_path)}-{imgsz}{ModelExporter.ARTIFACT_SUFFIX[backend]}'
+        return os.path.join(export_dir or Config.EXPORT_DIR, name)
+
+    @staticmethod
+    def load(model_path, backend=None, imgsz=None):
+        """
+        Load a model for serving through the configured backend
+
+        Args:
+            model_path: Weights path or name (downloaded by ultralytics if needed)
+            backend: 'pytorch', 'onnx' or 'openvino' (default Config.YOLO_BACKEND)
+            imgsz: Export input size (default Config.EXPORT_IMGSZ)
+
+        Returns:
+            (model, served_path): the YOLO model and the file or directory it
+            was loaded from (the `.pt` path for PyTorch)
+        """
+        backend = backend or Config.YOLO_BACKEND
+        imgsz = imgsz or Config.EXPORT_IMGSZ
+
+        model = ModelExporter._yolo(model_path)
+        if backend == 'pytorch':
+            return model, model_path
+
+        # Names like 'yolov8n.pt' are resolved (downloaded) by ultralytics
+        weights_path = getattr(model, 'ckpt_path', None) or model_path
+        if not str(weights_path).endswith('.pt') or not os.path.isfile(weights_path):
+            print(f"⚠️ {model_path} is not a local .pt file, serving it without {backend} export")
+            return model, model_path
+
+        target = ModelExporter.artifact_path(weights_path, backend, imgsz)
+        with ModelExporter._export_lock:
+            if not os.path.exists(target):
+                try:
+                    ModelExporter._export(model, target, backend, imgsz)
+                except Exception as e:
+                    print(f"⚠️ {backend} export of {model_path} failed, serving PyTorch: {e}")
+                    return model, model_path
+
+        print(f"Serving {model_path} through {backend}: {target}")
+        return ModelExporter._yolo(target, task=model.task), target
+
+    @staticmethod
+    def _export(model, target, backend, imgsz):
+        print(f"📦 Exporting {model.ckpt_path} to {backend} (imgsz={imgsz}), one-time...")
+        # Dynamic axes: the batch scheduler and panorama tiles send batches and other sizes
+        exported = model.export(format=backend, imgsz=imgsz, dynamic=True)
+
+        os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+        # Move into place under a temporary name so other processes never load a partial artifact
+        staging = f'{target}.{os.getpid()}.tmp'
+        ModelExporter._remove(staging)
+        shutil.move(str(exported), staging)
+        try:
+            os.replace(staging, target)
+        except OSError:
+            # Another process finished the same export first
+            ModelExporter._remove(staging)
+        ModelExporter._prune(target)
+        print(f"✅ Exported to {target}")
+
+    @staticmethod
+    def _prune(target):
+        """Remove exports of older versions of the same weights at the same input size"""
+        directory, name = os.path.split(target)
+        stem, _, rest = name.rpartition('-')
+        stem = stem.rpartition('-')[0]
+        pattern = os.path.join(directory, glob.escape(stem) + '-' + '?' * 16 + '-' + glob.escape(rest))
+        for path in glob.glob(pattern):
+            if path != target:
+                print(f"🗑️ Removing stale export {path}")
+                ModelExporter._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.exists(path):
+            os.remove(path)
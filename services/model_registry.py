@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+
+
+class UnknownModelError(ValueError):
+    """Raised for a `model=` value that is not a configured model"""
+
+
+class ModelRegistry:
+    """
+    Several models served from one process, loaded on first use.
+
+    Models are configured by name (Config.model_paths(), e.g. 'default',
+    'seg', 'large') and can be requested by name or by their configured
+    path; two names for the same path share one loaded instance. Loaded
+    models are kept in least-recently-used order, and when their estimated
+    resident memory exceeds `max_bytes` the least recently used ones are
+    closed until it fits (the model just requested always stays).
+    """
+
+    def __init__(self, factory, models, max_bytes=0):
+        """
+        Args:
+            factory: Callable(model_path) -> loaded model service; the
+                     service must provide `memory_bytes` and `close()`
+            models: {name: model_path}, must include 'default'
+            max_bytes: Memory cap for all loaded models (0 = unlimited)
+        """
+        self.factory = factory
+        self.models = dict(models)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._loaded = OrderedDict()  # model_path -> service, least recently used first
+        self._load_locks = {}         # model_path -> Lock, so each model loads once
+        self.loads = 0
+        self.evictions = 0
+
+    def resolve(self, model=None):
+        """Model path for a name or configured path; None means 'default'"""
+        if not model:
+            return self.models['default']
+        if model in self.models:
+            return self.models[model]
+        if model in self.models.values():
+            return model
+        raise UnknownModelError(f'Unknown model "{model}". Available: {", ".join(self.models)}')
+
+    def get(self, model=None):
+        """
+        Loaded service for a model name or path, loading it if needed
+
+        Raises:
+            UnknownModelError: model is not configured
+        """
+        path = self.resolve(model)
+        with self._lock:
+            service = self._loaded.get(path)
+            if service is not None:
+                self._loaded.move_to_end(path)
+                return service
+            load_lock = self._load_locks.setdefault(path, threading.Lock())
+
+        # Load outside the registry lock so requests for loaded models don't wait
+        with load_lock:
+            with self._lock:
+                service = self._loaded.get(path)
+                if service is not None:
+                    self._loaded.move_to_end(path)
+                    return service
+
+            service = self.factory(path)
+
+            with self._lock:
+                self._loaded[path] = service
+                self.loads += 1
+                evicted = self._evict()
+
+        for evicted_path, evicted_service in evicted:
+            print(f"♻️ Unloading model {evicted_path} (memory cap {self.max_bytes / (1024 * 1024):.0f}MB)")
+            evicted_service.close()
+        return service
+
+    def _evict(self):
+        """Pop least recently used models until under the cap (call with the lock held)"""
+        evicted = []
+        while self.max_bytes and len(self._loaded) > 1 and self._resident_bytes() > self.max_bytes:
+            evicted.append(self._loaded.popitem(last=False))
+            self.evictions += 1
+        return evicted
+
+    def _resident_bytes(self):
+        return sum(service.memory_bytes for service in self._loaded.values())
+
+    def loaded(self):
+        """Loaded services, least recently used first"""
+        with self._lock:
+            return list(self._loaded.values())
+
+    def stats(self):
+        with self._lock:
+            loaded = list(self._loaded.items())
+            loads, evictions = self.loads, self.evictions
+
+        return {
+            'available': dict(self.models),
+            'loaded': [
+                {
+                    'model': path,
+                    'names': [name for name, model_path in self.models.items() if model_path == path],
+                    'task': service.task,
+                    'memory_mb': round(service.memory_bytes / (1024 * 1024), 1)
+                }
+                for path, service in reversed(loaded)
+            ],
+            'memory_mb': round(sum(service.memory_bytes for _, service in loaded) / (1024 * 1024), 1),
+            'max_memory_mb': round(self.max_bytes / (1024 * 1024), 1),
+            'loads': loads,
+            'evictions': evictions
+        }
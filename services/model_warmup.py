@@ -0,0 +1,109 @@
+import threading
+import time
+import traceback
+import numpy as np
+from config import Config
+from services.yolo_service import YoloService
+
+
+class ModelWarmup:
+    """
+    Loads and warms the models in the background right after startup.
+
+    The server binds its port immediately; a daemon thread then loads every
+    model in Config.WARMUP_MODELS and runs a few dummy forward passes at each
+    warm-up input size, so the first real request does not pay for weight
+    loading, lazy predictor setup or first-call kernel initialization.
+    `status()` backs the /ready readiness probe: 'pending' -> 'loading' ->
+    'warming' -> 'ready' (or 'failed').
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(
+                        Config.warmup_models(),
+                        Config.warmup_sizes(),
+                        passes=Config.WARMUP_PASSES
+                    )
+        return cls._instance
+
+    def __init__(self, models, sizes, passes=2):
+        self.models = models
+        self.sizes = sizes
+        self.passes = passes
+        self.state = 'pending'
+        self.current = None
+        self.error = None
+        self.elapsed_s = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start warming in the background (once); returns self"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='model-warmup', daemon=True)
+                self._thread.start()
+        return self
+
+    @property
+    def ready(self):
+        return self.state == 'ready'
+
+    def wait(self, timeout=None):
+        """Block until warm-up has finished (or failed); returns True when ready"""
+        self.start()._thread.join(timeout)
+        return self.ready
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            self.state = 'loading'
+            services = []
+            for name in self.models:
+                self.current = name
+                service = YoloService.get_instance(name)
+                # 'seg' may be the detection model when no seg model is configured
+                if service not in services:
+                    services.append(service)
+
+            self.state = 'warming'
+            for service in services:
+                self.current = service.model_path
+                self._warm(service)
+
+            self.current = None
+            self.state = 'ready'
+            self.elapsed_s = round(time.perf_counter() - started, 2)
+            print(f"✅ Models ready in {self.elapsed_s}s: {', '.join(s.model_path for s in services)}")
+        except Exception as e:
+            self.error = str(e)
+            self.state = 'failed'
+            self.elapsed_s = round(time.perf_counter() - started, 2)
+            print(f"❌ Model warm-up failed: {traceback.format_exc()}")
+
+    def _warm(self, service):
+        # One frame per worker process so every copy of the model gets warmed
+        copies = service.pool.num_workers if service.pool is not None else 1
+        for size in self.sizes:
+            # Mid-gray like ultralytics' letterbox padding
+            frames = [np.full((size, size, 3), 114, dtype=np.uint8)] * copies
+            for _ in range(self.passes):
+                service.detect_many(frames, confidence=Config.CONFIDENCE_THRESHOLD, imgsz=size)
+
+    def status(self):
+        return {
+            'status': self.state,
+            'ready': self.ready,
+            'current': self.current,
+            'models': list(self.models),
+            'sizes': list(self.sizes),
+            'elapsed_s': self.elapsed_s,
+            'error': self.error
+        }
@@ -0,0 +1,276 @@
+import numpy as np
+from config import Config
+from services.frame import Frame
+from services.cubemap_projector import CubemapProjector
+
+
+class PanoramaService:
+    """
+    Detection on full equirectangular VR360 panoramas.
+
+    The panorama is cut into overlapping model-sized tiles so small objects
+    are not lost to the model's input downscale. Tiles wrap around the
+    horizontal 0/360° seam, all tiles go through the model in batches, and
+    duplicates from overlapping tiles are merged with class-aware NMS.
+
+    Alternatively the panorama is reprojected to six cube faces, which avoids
+    the equirectangular distortion near the poles (see `detect_cubemap`).
+    """
+
+    # Boxes closer than this to an inner tile edge are treated as cut off
+    EDGE_MARGIN = 2
+
+    @staticmethod
+    def tile_origins(width, height, tile_size, overlap):
+        """
+        Top-left corners of the tiles covering the panorama
+
+        Horizontally the last tile runs past the right edge by at least
+        `overlap` pixels, wrapping onto the left edge. Vertically tiles stay
+        inside the image.
+
+        Returns:
+            (origins, tile_w, tile_h) with origins a list of (x, y)
+        """
+        stride = max(1, tile_size - overlap)
+        tile_w = min(tile_size, width)
+        tile_h = min(tile_size, height)
+
+        xs = list(range(0, width, stride)) if width > tile_size else [0]
+
+        if height > tile_size:
+            ys = list(range(0, height - tile_size + 1, stride))
+            if ys[-1] != height - tile_size:
+                ys.append(height - tile_size)
+        else:
+            ys = [0]
+
+        return [(x, y) for y in ys for x in xs], tile_w, tile_h
+
+    @staticmethod
+    def _box_data(result):
+        """(N, 6+) numpy array of [x1, y1, x2, y2, (track_id,) conf, cls]"""
+        data = result.boxes.data
+        return data.cpu().numpy() if hasattr(data, 'cpu') else np.asarray(data)
+
+    @staticmethod
+    def _tile(bgr, x, y, tile_w, tile_h):
+        """
+        Tile with its top-left corner at (x, y). Columns past the right edge
+        wrap onto the left edge; only such seam tiles are copied, the others
+        are views of `bgr`.
+        """
+        rows = bgr[y:y + tile_h]
+        width = rows.shape[1]
+        if x + tile_w <= width:
+            return rows[:, x:x + tile_w]
+        return np.concatenate([rows[:, x:], rows[:, :x + tile_w - width]], axis=1)
+
+    @staticmethod
+    def nms(xyxy, scores, cls, iou_threshold=0.5, ios_threshold=0.8, rank=None):
+        """
+        Greedy class-aware NMS
+
+        A box is suppressed by a higher ranked box of the same class when their
+        IoU exceeds `iou_threshold`, or when most of the smaller box lies inside
+        the other (intersection over smaller area above `ios_threshold`), which
+        catches partial boxes cut by tile borders.
+
+        Args:
+            xyxy, scores, cls: Box arrays
+            rank: Optional ordering score (defaults to `scores`)
+
+        Returns:
+            Array of kept indices
+        """
+        if len(scores) == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        x1, y1, x2, y2 = xyxy[:, 0], xyxy[:, 1], xyxy[:, 2], xyxy[:, 3]
+        areas = np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0)
+        order = np.argsort(-(scores if rank is None else rank), kind='stable')
+
+        keep = []
+        while order.size:
+            i = order[0]
+            keep.append(i)
+            rest = order[1:]
+
+            iw = np.maximum(0.0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]))
+            ih = np.maximum(0.0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
+            inter = iw * ih
+            iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+            ios = inter / np.maximum(np.minimum(areas[i], areas[rest]), 1e-9)
+
+            duplicate = (cls[rest] == cls[i]) & ((iou > iou_threshold) | (ios > ios_threshold))
+            order = rest[~duplicate]
+
+        return np.array(keep, dtype=np.int64)
+
+    @staticmethod
+    def to_spherical(xyxy, width, height):
+        """
+        Convert equirectangular pixel boxes to krpano-style angles
+
+        ath (yaw) is -180..180 with 0 at the panorama center; atv (pitch) is
+        -90 (up) .. 90 (down). ath_max may be smaller than ath_min for boxes
+        that cross the seam.
+
+        Returns:
+            List of {'ath', 'atv', 'ath_min', 'ath_max', 'atv_min', 'atv_max'} dicts
+        """
+        if len(xyxy) == 0:
+            return []
+
+        def wrap(ath):
+            return (ath + 180.0) % 360.0 - 180.0
+
+        ath_min = wrap(xyxy[:, 0] / width * 360.0 - 180.0)
+        ath_max = wrap(xyxy[:, 2] / width * 360.0 - 180.0)
+        ath = wrap((xyxy[:, 0] + xyxy[:, 2]) / 2 / width * 360.0 - 180.0)
+        atv_min = xyxy[:, 1] / height * 180.0 - 90.0
+        atv_max = xyxy[:, 3] / height * 180.0 - 90.0
+        atv = (atv_min + atv_max) / 2
+
+        columns = np.round(np.stack([ath, atv, ath_min, ath_max, atv_min, atv_max], axis=1), 3).tolist()
+        keys = ('ath', 'atv', 'ath_min', 'ath_max', 'atv_min', 'atv_max')
+        return [dict(zip(keys, row)) for row in columns]
+
+    @staticmethod
+    def detect_tiled(yolo_service, image, confidence,
+                     tile_size=None, overlap=None, max_batch=None):
+        """
+        Run tiled detection over an equirectangular panorama
+
+        Args:
+            yolo_service: YoloService instance
+            image: Frame (or RGB numpy array) of the panorama
+            confidence: Confidence threshold
+            tile_size: Tile edge in pixels (default Config.PANORAMA_TILE_SIZE)
+            overlap: Tile overlap in pixels (default Config.PANORAMA_TILE_OVERLAP)
+            max_batch: Tiles per forward pass (default Config.PANORAMA_MAX_BATCH)
+
+        Returns:
+            (xyxy, conf, cls, tile_count). x coordinates are in [0, W); a box
+            crossing the seam keeps x2 > W.
+        """
+        tile_size = tile_size or Config.PANORAMA_TILE_SIZE
+        overlap = Config.PANORAMA_TILE_OVERLAP if overlap is None else overlap
+        max_batch = max_batch or Config.PANORAMA_MAX_BATCH
+
+        frame = Frame.from_image(image)
+        height, width = frame.height, frame.width
+        origins, tile_w, tile_h = PanoramaService.tile_origins(width, height, tile_size, overlap)
+        wraps = width > tile_size
+
+        # ultralytics expects BGR arrays; seam tiles wrap onto the left edge
+        bgr = frame.bgr
+        tiles = [PanoramaService._tile(bgr, x, y, tile_w, tile_h) for x, y in origins]
+
+        boxes, scores, classes, ranks = [], [], [], []
+        for start in range(0, len(tiles), max_batch):
+            results = yolo_service.predict(tiles[start:start + max_batch], confidence=confidence, imgsz=tile_size)
+            for (x0, y0), result in zip(origins[start:start + max_batch], results):
+                data = PanoramaService._box_data(result)
+                if len(data) == 0:
+                    continue
+                local = data[:, :4].astype(np.float64)
+
+                # Boxes touching an inner tile border are probably cut off;
+                # rank them below complete boxes so NMS keeps the full one
+                m = PanoramaService.EDGE_MARGIN
+                cut = (local[:, 0] < m) | (local[:, 2] > tile_w - m)
+                if y0 > 0:
+                    cut |= local[:, 1] < m
+                if y0 + tile_h < height:
+                    cut |= local[:, 3] > tile_h - m
+
+                boxes.append(local + np.array([x0, y0, x0, y0], dtype=np.float64))
+                scores.append(data[:, -2].astype(np.float64))
+                classes.append(data[:, -1].astype(np.int64))
+                ranks.append(np.where(cut, 0.5, 1.0) * data[:, -2])
+
+        if not boxes:
+            return np.zeros((0, 4)), np.zeros(0), np.zeros(0, dtype=np.int64), len(tiles)
+
+        xyxy = np.concatenate(boxes)
+        conf = np.concatenate(scores)
+        cls = np.concatenate(classes)
+        rank = np.concatenate(ranks)
+
+        if wraps:
+            # Boxes entirely inside the left overlap band are also seen by the
+            # seam tile past the right edge; move them there so NMS can merge them
+            in_band = xyxy[:, 2] <= overlap
+            xyxy[in_band, 0] += width
+            xyxy[in_band, 2] += width
+
+        keep = PanoramaService.nms(xyxy, conf, cls, rank=rank)
+        xyxy, conf, cls = xyxy[keep], conf[keep], cls[keep]
+
+        if wraps:
+            past_seam = xyxy[:, 0] >= width
+            xyxy[past_seam, 0] -= width
+            xyxy[past_seam, 2] -= width
+
+        xyxy[:, 1] = np.clip(xyxy[:, 1], 0, height)
+        xyxy[:, 3] = np.clip(xyxy[:, 3], 0, height)
+        return xyxy, conf, cls, len(tiles)
+
+    @staticmethod
+    def detect_cubemap(yolo_service, image, confidence, face_size=None):
+        """
+        Run detection on the six cube faces of an equirectangular panorama
+
+        The faces are cut with cached remap grids, run as one batch, and the
+        detections are projected back to equirectangular pixels and merged
+        with class-aware NMS.
+
+        Args:
+            yolo_service: YoloService instance
+            image: Frame (or RGB numpy array) of the panorama
+            confidence: Confidence threshold
+            face_size: Cube face edge in pixels (default Config.CUBEMAP_FACE_SIZE)
+
+        Returns:
+            (xyxy, conf, cls, face_count) in the same layout as `detect_tiled`
+        """
+        face_size = face_size or Config.CUBEMAP_FACE_SIZE
+        frame = Frame.from_image(image)
+        height, width = frame.height, frame.width
+
+        faces = CubemapProjector.to_faces(frame.bgr, face_size)
+        results = yolo_service.predict(faces, confidence=confidence, imgsz=face_size)
+
+        boxes, scores, classes, face_indices, ranks = [], [], [], [], []
+        for face_index, result in enumerate(results):
+            data = PanoramaService._box_data(result)
+            if len(data) == 0:
+                continue
+            local = data[:, :4].astype(np.float64)
+
+            # Objects cut by a face border also appear on the neighbouring face
+            m = PanoramaService.EDGE_MARGIN
+            cut = ((local[:, 0] < m) | (local[:, 1] < m) |
+                   (local[:, 2] > face_size - m) | (local[:, 3] > face_size - m))
+
+            boxes.append(local)
+            scores.append(data[:, -2].astype(np.float64))
+            classes.append(data[:, -1].astype(np.int64))
+            face_indices.append(np.full(len(data), face_index))
+            ranks.append(np.where(cut, 0.5, 1.0) * data[:, -2])
+
+        if not boxes:
+            return np.zeros((0, 4)), np.zeros(0), np.zeros(0, dtype=np.int64), len(faces)
+
+        xyxy = CubemapProjector.project_boxes(np.concatenate(face_indices), np.concatenate(boxes),
+                                              face_size, width, height)
+        conf = np.concatenate(scores)
+        cls = np.concatenate(classes)
+
+        keep = PanoramaService.nms(xyxy, conf, cls, rank=np.concatenate(ranks))
+        xyxy, conf, cls = xyxy[keep], conf[keep], cls[keep]
+
+        xyxy[:, 1] = np.clip(xyxy[:, 1], 0, height)
+        xyxy[:, 3] = np.clip(xyxy[:, 3], 0, height)
+        return xyxy, conf, cls, len(faces)
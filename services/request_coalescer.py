@@ -0,0 +1,138 @@
+import threading
+import time
+from config import Config
+from services.admission import DeadlineExceeded
+
+
+class _Flight:
+    __slots__ = ('changed', 'done', 'shared', 'leading', 'waiters')
+
+    def __init__(self, lock):
+        self.changed = threading.Condition(lock)
+        self.done = False
+        self.shared = None
+        self.leading = True
+        self.waiters = 0
+
+
+class RequestCoalescer:
+    """
+    Single-flight deduplication of identical in-flight requests.
+
+    The first request for a key (image hash + endpoint + parameters, the
+    result cache key) becomes the leader and does the work; identical
+    requests arriving while it runs wait for it and are answered from its
+    result instead of repeating decode and inference. Only results the
+    leader marks as shareable are handed out: if the leader fails (e.g. its
+    own deadline passed) or produced an error response, one waiter takes
+    over as the new leader and does the work for the others, so one
+    client's problem never becomes another's and the retry doesn't
+    stampede. Waiters give up with DeadlineExceeded at their own deadline.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(enabled=Config.COALESCE_ENABLED)
+        return cls._instance
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.takeovers = 0
+        self.expired = 0
+
+    def run(self, key, work, deadline=None):
+        """
+        Run `work` once for concurrent calls with the same key
+
+        Args:
+            key: Identity of the request
+            work: Callable() -> (result, shared); `result` goes to the caller
+                  that ran it, `shared` (None if not shareable) to the callers
+                  that waited for it
+            deadline: time.monotonic() after which a waiting caller gives up
+                      (None = wait as long as the work runs)
+
+        Returns:
+            (value, coalesced): `result` and False for the caller that ran
+            `work`, `shared` and True for callers answered by another's run
+
+        Raises:
+            DeadlineExceeded: the deadline passed while waiting for another's run
+        """
+        if not self.enabled:
+            return work()[0], False
+
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight(self._lock)
+                self.leaders += 1
+            else:
+                shared = self._wait(key, flight, deadline)
+                if shared is not None:
+                    return shared, True
+
+        # Leading: a new flight, or taken over from a leader that failed
+        shared = None
+        try:
+            result, shared = work()
+            return result, False
+        finally:
+            with self._lock:
+                if shared is not None:
+                    flight.done = True
+                    flight.shared = shared
+                else:
+                    # Hand the work to one of the waiters
+                    flight.leading = False
+                if flight.done or not flight.waiters:
+                    del self._flights[key]
+                flight.changed.notify_all()
+
+    def _wait(self, key, flight, deadline):
+        """
+        Wait (with _lock held) until the flight's result is shared, returning
+        it, or until its leader gave up, returning None after taking over
+        """
+        flight.waiters += 1
+        try:
+            while True:
+                if flight.done:
+                    self.coalesced += 1
+                    return flight.shared
+                if not flight.leading:
+                    flight.leading = True
+                    self.takeovers += 1
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self.expired += 1
+                    raise DeadlineExceeded('Deadline passed while waiting for an identical request')
+                flight.changed.wait(remaining)
+        finally:
+            flight.waiters -= 1
+            # The last waiter leaving a flight nobody leads
+            if not flight.leading and not flight.done and not flight.waiters and self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'in_flight': len(self._flights),
+                'waiting': sum(flight.waiters for flight in self._flights.values()),
+                'leaders': self.leaders,
+                'coalesced': self.coalesced,
+                'takeovers': self.takeovers,
+                'expired': self.expired
+            }
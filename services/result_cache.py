@@ -0,0 +1,128 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+
+
+class CachedResponse:
+    __slots__ = ('body', 'mimetype', 'expires_at')
+
+    def __init__(self, body, mimetype, expires_at):
+        self.body = body
+        self.mimetype = mimetype
+        self.expires_at = expires_at
+
+
+class ResultCache:
+    """
+    LRU cache of encoded detection responses.
+
+    Entries are keyed by a hash of the uploaded image bytes plus the endpoint
+    and its parameters, and hold the final response body, so a repeated
+    capture of the same view skips decoding, inference and serialization.
+    Memory is bounded by entry count and total body size; entries can also
+    expire after a TTL.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(
+                        max_entries=Config.RESULT_CACHE_MAX_ENTRIES,
+                        max_bytes=int(Config.RESULT_CACHE_MAX_MB * 1024 * 1024),
+                        ttl=Config.RESULT_CACHE_TTL
+                    )
+        return cls._instance
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, ttl=0):
+        """
+        Args:
+            max_entries: Maximum number of cached responses (0 disables the cache)
+            max_bytes: Maximum total size of cached bodies
+            ttl: Seconds an entry stays valid (0 = no expiry)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    @staticmethod
+    def make_key(endpoint, image_bytes, params):
+        """Hash of the image content, endpoint name and request parameters"""
+        digest = hashlib.blake2b(image_bytes, digest_size=16)
+        digest.update(endpoint.encode('utf-8'))
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the CachedResponse for `key` or None, counting the hit or miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body, mimetype):
+        if not self.enabled or len(body) > self.max_bytes:
+            return
+
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CachedResponse(body, mimetype, expires_at)
+            self._size += len(body)
+
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._size -= len(entry.body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'size_bytes': self._size,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
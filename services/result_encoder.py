@@ -0,0 +1,251 @@
+import json
+import struct
+
+import cv2
+import numpy as np
+
+
+class ResultEncoder:
+    """
+    Turns YOLO results into the API's detection dicts in bulk.
+
+    Boxes are pulled out of each result as one array instead of touching
+    `box.xyxy`, `box.conf` and `box.cls` per detection; offsets, rounding and
+    width/height are computed vectorized and converted with a single
+    `tolist()` per column. Segmentation masks are simplified with a
+    tolerance relative to each object's size (`mask_polygons`).
+
+    Besides the default per-detection dicts, results can be encoded in a
+    compact columnar form (parallel arrays plus a class-name table) or as a
+    packed binary float32 buffer; see `to_columnar` and `pack_binary`. Both
+    carry the 'corners' of picture frames next to their boxes.
+    """
+
+    COLUMNAR_MIMETYPE = 'application/vnd.yolo.columnar+json'
+    BINARY_MIMETYPE = 'application/octet-stream'
+
+    @staticmethod
+    def _to_numpy(data):
+        if hasattr(data, 'cpu'):
+            data = data.cpu().numpy()
+        return np.asarray(data, dtype=np.float64)
+
+    @staticmethod
+    def extract(results):
+        """
+        Collect the boxes of every result into three arrays
+
+        Args:
+            results: Iterable of ultralytics Results
+
+        Returns:
+            (xyxy, conf, cls) as (N, 4) float64, (N,) float64 and (N,) int64 arrays
+        """
+        chunks = []
+        for result in results:
+            boxes = result.boxes
+            if boxes is None or len(boxes) == 0:
+                continue
+            # boxes.data is [x1, y1, x2, y2, (track_id,) conf, cls]
+            chunks.append(ResultEncoder._to_numpy(boxes.data))
+
+        if not chunks:
+            return np.zeros((0, 4)), np.zeros(0), np.zeros(0, dtype=np.int64)
+
+        data = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+        return data[:, :4], data[:, -2], data[:, -1].astype(np.int64)
+
+    @staticmethod
+    def to_detections(xyxy, conf, cls, names, offset=(0, 0), source=None, include_size=True):
+        """
+        Build detection dicts from box arrays
+
+        Args:
+            xyxy, conf, cls: Arrays as returned by `extract`
+            names: Class id -> name mapping of the model
+            offset: (x, y) added to every coordinate (e.g. ROI origin)
+            source: Optional value for a 'source' key on every detection
+            include_size: Add 'width' and 'height' to each bbox
+
+        Returns:
+            List of detection dicts
+        """
+        if len(conf) == 0:
+            return []
+
+        shifted = xyxy + np.array([offset[0], offset[1], offset[0], offset[1]], dtype=np.float64)
+        if include_size:
+            shifted = np.hstack([shifted, xyxy[:, 2:4] - xyxy[:, 0:2]])
+        coords = np.round(shifted, 2).tolist()
+        confidences = np.round(conf, 4).tolist()
+        class_ids = cls.tolist()
+        keys = ('x1', 'y1', 'x2', 'y2', 'width', 'height') if include_size else ('x1', 'y1', 'x2', 'y2')
+
+        detections = [
+            {
+                'class': names[class_id],
+                'class_id': class_id,
+                'confidence': score,
+                'bbox': dict(zip(keys, box))
+            }
+            for box, score, class_id in zip(coords, confidences, class_ids)
+        ]
+
+        if source is not None:
+            for detection in detections:
+                detection['source'] = source
+
+        return detections
+
+    @staticmethod
+    def mask_polygons(segments, xyxy, offset=(0, 0), tolerance=0.0):
+        """
+        Simplify segmentation mask outlines and convert them to point lists
+
+        Args:
+            segments: Per-mask (N, 2) outline arrays (e.g. `result.masks.xy`)
+            xyxy: (M, 4) boxes of the same detections
+            offset: (x, y) added to every point
+            tolerance: Douglas-Peucker tolerance as a fraction of each box's
+                       diagonal (0 keeps every outline point)
+
+        Returns:
+            List of [{'x', 'y'}] polygons, one per mask
+        """
+        # Tolerances for all masks at once, relative to object size
+        epsilons = np.hypot(xyxy[:, 2] - xyxy[:, 0], xyxy[:, 3] - xyxy[:, 1]) * tolerance
+        offset = np.asarray(offset, dtype=np.float32)
+
+        polygons = []
+        for segment, epsilon in zip(segments, epsilons.tolist()):
+            points = np.asarray(segment, dtype=np.float32).reshape(-1, 2)
+            if epsilon > 0 and len(points) > 3:
+                simplified = cv2.approxPolyDP(points.reshape(-1, 1, 2), epsilon, True).reshape(-1, 2)
+                if len(simplified) >= 3:
+                    points = simplified
+            points = np.round(points + offset, 2).tolist()
+            polygons.append([{'x': px, 'y': py} for px, py in points])
+        return polygons
+
+    @staticmethod
+    def from_detections(detections):
+        """
+        Convert detection dicts (e.g. OpenCV picture frames) back to box arrays
+
+        Returns:
+            (xyxy, conf, cls, names) where names maps the class ids found to their names
+        """
+        if not detections:
+            return np.zeros((0, 4)), np.zeros(0), np.zeros(0, dtype=np.int64), {}
+
+        xyxy = np.array([[d['bbox']['x1'], d['bbox']['y1'], d['bbox']['x2'], d['bbox']['y2']]
+                         for d in detections], dtype=np.float64)
+        conf = np.array([d['confidence'] for d in detections], dtype=np.float64)
+        cls = np.array([d['class_id'] for d in detections], dtype=np.int64)
+        names = {d['class_id']: d['class'] for d in detections}
+        return xyxy, conf, cls, names
+
+    @staticmethod
+    def corners_of(detections, first_index=0):
+        """
+        Collect the 'corners' quadrilaterals of detection dicts (picture frames)
+
+        Args:
+            detections: Detection dicts, some with 'corners' (four {'x', 'y'} points)
+            first_index: Position of detections[0] in the encoded box arrays
+
+        Returns:
+            (indices, points): (K,) int64 box positions and (K, 4, 2) float64 corners
+        """
+        indices = [first_index + i for i, d in enumerate(detections) if d.get('corners')]
+        points = [[[p['x'], p['y']] for p in d['corners']] for d in detections if d.get('corners')]
+        return np.array(indices, dtype=np.int64), np.array(points, dtype=np.float64).reshape(-1, 4, 2)
+
+    @staticmethod
+    def to_columnar(xyxy, conf, cls, names, corners=None):
+        """
+        Build the columnar representation of a set of boxes
+
+        Args:
+            corners: Optional (indices, points) from `corners_of`
+
+        Returns:
+            Dict with 'boxes' (flat [x1, y1, x2, y2, ...]), 'scores', 'class_ids'
+            and 'classes', a table of the class ids present -> name; with
+            corners, 'corners' holds the box 'indices' that have them and their
+            'points' (flat [x, y] * 4 per box, clockwise from top-left)
+        """
+        columnar = {
+            'detections_count': len(conf),
+            'boxes': np.round(xyxy, 2).ravel().tolist(),
+            'scores': np.round(conf, 4).tolist(),
+            'class_ids': cls.tolist(),
+            'classes': ResultEncoder.class_table(cls, names)
+        }
+        if corners is not None and len(corners[0]):
+            indices, points = corners
+            columnar['corners'] = {
+                'indices': indices.tolist(),
+                'points': np.round(points, 2).ravel().tolist()
+            }
+        return columnar
+
+    @staticmethod
+    def class_table(cls, names):
+        """Map of the class ids present in `cls` (as strings) to their names"""
+        return {str(class_id): names[class_id] for class_id in np.unique(cls).tolist()}
+
+    @staticmethod
+    def pack_binary(header, xyxy, conf, cls, corners=None):
+        """
+        Pack boxes into a binary payload
+
+        Layout (little endian):
+            uint32  header length in bytes (N)
+            N bytes UTF-8 JSON header, space padded to a multiple of 4
+            float32 [count, 6] rows of x1, y1, x2, y2, score, class_id
+            float32 [corners_count, 9] rows of box index, then x, y of the
+                    four corners clockwise from top-left
+
+        Args:
+            header: JSON-serializable metadata; 'detections_count' and
+                    'corners_count' are added
+            xyxy, conf, cls: Box arrays
+            corners: Optional (indices, points) from `corners_of`
+
+        Returns:
+            bytes
+        """
+        rows = np.empty((len(conf), 6), dtype='<f4')
+        rows[:, :4] = xyxy
+        rows[:, 4] = conf
+        rows[:, 5] = cls
+
+        indices, points = corners if corners is not None else ResultEncoder.corners_of([])
+        corner_rows = np.empty((len(indices), 9), dtype='<f4')
+        corner_rows[:, 0] = indices
+        corner_rows[:, 1:] = points.reshape(-1, 8)
+
+        header = dict(header, detections_count=len(conf), corners_count=len(indices))
+        header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        header_bytes += b' ' * (-len(header_bytes) % 4)
+        return struct.pack('<I', len(header_bytes)) + header_bytes + rows.tobytes() + corner_rows.tobytes()
+
+    @staticmethod
+    def unpack_binary(payload):
+        """
+        Inverse of `pack_binary` (for Python clients and tests)
+
+        Returns:
+            (header, xyxy, conf, cls, (indices, points))
+        """
+        header_length, = struct.unpack_from('<I', payload)
+        header = json.loads(payload[4:4 + header_length])
+        count = header['detections_count']
+        rows = np.frombuffer(payload, dtype='<f4', count=count * 6, offset=4 + header_length).reshape(count, 6)
+        corners_count = header.get('corners_count', 0)
+        corner_rows = np.frombuffer(payload, dtype='<f4', count=corners_count * 9,
+                                    offset=4 + header_length + rows.nbytes).reshape(corners_count, 9)
+        return (header, rows[:, :4].astype(np.float64), rows[:, 4].astype(np.float64),
+                rows[:, 5].astype(np.int64),
+                (corner_rows[:, 0].astype(np.int64), corner_rows[:, 1:].astype(np.float64).reshape(-1, 4, 2)))
@@ -0,0 +1,74 @@
+import time
+from contextlib import contextmanager
+from flask import g, has_request_context
+
+
+class StageTimer:
+    """
+    Per-request timing of processing stages (decode, inference, ...).
+
+    Durations are accumulated on `flask.g` for the current request, so the
+    same stage entered twice (e.g. inference per ROI) adds up. Outside a
+    request context timing is a no-op. The collected timings can be sent
+    back to the client as a `Server-Timing` header.
+    """
+
+    @staticmethod
+    def start():
+        """Mark the start of the request (call from before_request)"""
+        g.request_started = time.perf_counter()
+        g.stage_timings = {}
+
+    @staticmethod
+    @contextmanager
+    def stage(name):
+        """Time the enclosed block as stage `name`"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            StageTimer.record(name, (time.perf_counter() - started) * 1000)
+
+    @staticmethod
+    def record(name, duration_ms):
+        if not has_request_context():
+            return
+        timings = g.setdefault('stage_timings', {})
+        timings[name] = timings.get(name, 0.0) + duration_ms
+
+    @staticmethod
+    def timings(state=None):
+        """
+        Stage -> milliseconds for the current request, plus 'total' when started
+
+        Args:
+            state: A captured `flask.g` (g._get_current_object()), to read the
+                   timings of a streamed response after its context has ended
+        """
+        if state is None:
+            if not has_request_context():
+                return {}
+            state = g
+        timings = dict(state.get('stage_timings', {}))
+        started = state.get('request_started')
+        if started is not None:
+            timings['total'] = (time.perf_counter() - started) * 1000
+        return timings
+
+    @staticmethod
+    def server_timing_header(timings):
+        """Format timings as a Server-Timing header value"""
+        return ', '.join(f'{name};dur={duration:.2f}' for name, duration in timings.items())
+
+    @staticmethod
+    def parse_server_timing(header):
+        """Parse a Server-Timing header back into {stage: milliseconds}"""
+        timings = {}
+        for metric in (header or '').split(','):
+            parts = [part.strip() for part in metric.split(';')]
+            if not parts[0]:
+                continue
+            for param in parts[1:]:
+                if param.startswith('dur='):
+                    timings[parts[0]] = float(param[4:])
+        return timings
@@ -0,0 +1,35 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+
+
+class TaskPool:
+    """
+    Shared thread pool for CPU-side work that can overlap model inference.
+
+    OpenCV (and torch) release the GIL for most of their work, so running
+    e.g. picture-frame detection on a pool thread while the request thread
+    waits for YOLO brings latency down to the slower of the two stages.
+    One pool is shared by all requests so concurrent requests cannot
+    oversubscribe the CPU with threads.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(Config.TASK_POOL_WORKERS or min(8, os.cpu_count() or 4))
+        return cls._instance
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='task-pool')
+
+    def submit(self, fn, *args, **kwargs):
+        """Run `fn(*args, **kwargs)` on the pool, returning a Future"""
+        return self._executor.submit(fn, *args, **kwargs)
@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from config import Config
+
+
+class FetchError(Exception):
+    """A URL that could not be fetched; `status_code` is the HTTP status to answer with"""
+
+    def __init__(self, message, status_code=502):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class UrlFetcher:
+    """
+    Downloads images for /detect/url over a pooled HTTP session.
+
+    One `requests.Session` with a sized connection pool is shared by all
+    requests, so repeated fetches from the same host (scene tiles) reuse
+    keep-alive connections. Bodies are streamed and abandoned as soon as
+    they exceed `max_bytes` or the download has taken longer than `timeout`
+    in total (the requests timeout only bounds each socket read, so a slow
+    trickle would otherwise never time out). Responses carrying an ETag or Last-Modified
+    header are kept in an on-disk LRU cache and revalidated with a
+    conditional request, so an unchanged image costs a 304 instead of a
+    full download. `fetch_many` downloads several URLs concurrently.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    CHUNK_SIZE = 64 * 1024
+
+    @classmethod
+    def get_instance(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(
+                        timeout=Config.FETCH_TIMEOUT,
+                        max_bytes=int(Config.FETCH_MAX_MB * 1024 * 1024),
+                        pool_size=Config.FETCH_POOL_SIZE,
+                        cache_dir=Config.FETCH_CACHE_DIR,
+                        cache_max_bytes=int(Config.FETCH_CACHE_MAX_MB * 1024 * 1024)
+                    )
+        return cls._instance
+
+    def __init__(self, timeout=10.0, max_bytes=20 * 1024 * 1024, pool_size=16,
+                 cache_dir='url_cache', cache_max_bytes=256 * 1024 * 1024):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['User-Agent'] = 'vr360-yolo-api'
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='url-fetch')
+
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> body size in bytes, for the cache size limit
+        self.revalidated = 0
+        self.downloads = 0
+        if self.cache_enabled:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._load_index()
+
+    @property
+    def cache_enabled(self):
+        return bool(self.cache_dir) and self.cache_max_bytes > 0
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + '.bin', base + '.json'
+
+    def _load_index(self):
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.bin'):
+                self._entries[name[:-4]] = os.path.getsize(os.path.join(self.cache_dir, name))
+
+    def _read_cached(self, key):
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def _touch(self, key):
+        # Access time for the LRU order is the body file's mtime
+        try:
+            os.utime(self._paths(key)[0])
+        except OSError:
+            pass
+
+    def _store(self, key, url, body, headers):
+        body_path, meta_path = self._paths(key)
+        meta = {
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'content_type': headers.get('Content-Type')
+        }
+        try:
+            # Body first: a meta file without its body is never read as a hit
+            tmp_path = f'{body_path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, body_path)
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+        except OSError as e:
+            print(f"⚠️ URL cache write failed: {e}")
+            return
+
+        with self._lock:
+            self._entries[key] = len(body)
+            self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until under the size limit (call with the lock held)"""
+        total = sum(self._entries.values())
+        if total <= self.cache_max_bytes:
+            return
+
+        def last_used(key):
+            try:
+                return os.path.getmtime(self._paths(key)[0])
+            except OSError:
+                return 0.0
+
+        for key in sorted(self._entries, key=last_used):
+            if total <= self.cache_max_bytes:
+                break
+            total -= self._entries.pop(key)
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def fetch(self, url):
+        """
+        Download an image
+
+        Args:
+            url: http(s) URL (any other value is rejected)
+
+        Returns:
+            Body bytes
+
+        Raises:
+            FetchError: invalid or non-string URL (400), too large (413), timeout (504) or
+                        an unreachable / failing upstream (502)
+        """
+        if not isinstance(url, str):
+            # JSON bodies can list numbers, objects, ... as urls
+            raise FetchError(f'Invalid URL: {url!r} is not a string', 400)
+        if urlparse(url).scheme not in ('http', 'https'):
+            raise FetchError(f'Unsupported URL: {url}', 400)
+
+        deadline = time.monotonic() + self.timeout
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        meta = body = None
+        headers = {}
+        if self.cache_enabled and key in self._entries:
+            meta, body = self._read_cached(key)
+            if meta is not None:
+                if meta.get('etag'):
+                    headers['If-None-Match'] = meta['etag']
+                if meta.get('last_modified'):
+                    headers['If-Modified-Since'] = meta['last_modified']
+
+        try:
+            with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+                if response.status_code == 304 and body is not None:
+                    self._touch(key)
+                    with self._lock:
+                        self.revalidated += 1
+                    return body
+                if response.status_code != 200:
+                    raise FetchError(f'Upstream returned HTTP {response.status_code} for {url}', 502)
+
+                length = response.headers.get('Content-Length')
+                if length and length.isdigit() and int(length) > self.max_bytes:
+                    raise FetchError(f'Image exceeds {self.max_bytes / (1024 * 1024):g}MB limit', 413)
+
+                chunks = []
+                received = 0
+                while True:
+                    if time.monotonic() > deadline:
+                        raise FetchError(f'Timed out fetching {url}', 504)
+                    # read1: whatever has arrived (up to a chunk), so the
+                    # deadline is checked after every socket read
+                    chunk = response.raw.read1(self.CHUNK_SIZE, decode_content=True)
+                    if not chunk:
+                        break
+                    received += len(chunk)
+                    if received > self.max_bytes:
+                        raise FetchError(f'Image exceeds {self.max_bytes / (1024 * 1024):g}MB limit', 413)
+                    chunks.append(chunk)
+                data = b''.join(chunks)
+                response_headers = response.headers
+        except requests.Timeout:
+            raise FetchError(f'Timed out fetching {url}', 504)
+        except requests.RequestException as e:
+            raise FetchError(f'Could not fetch {url}: {e}', 502)
+
+        with self._lock:
+            self.downloads += 1
+        if self.cache_enabled and (response_headers.get('ETag') or response_headers.get('Last-Modified')):
+            self._store(key, url, data, response_headers)
+        return data
+
+    def fetch_many(self, urls):
+        """
+        Download several URLs concurrently
+
+        Returns:
+            One entry per URL, in order: body bytes or the FetchError raised
+        """
+        def fetch_one(url):
+            try:
+                return self.fetch(url)
+            except FetchError as e:
+                return e
+
+        return list(self._executor.map(fetch_one, urls))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'cache_enabled': self.cache_enabled,
+                'cache_entries': len(self._entries),
+                'cache_size_bytes': sum(self._entries.values()),
+                'cache_max_bytes': self.cache_max_bytes,
+                'revalidated': self.revalidated,
+                'downloads': self.downloads
+            }
@@ -0,0 +1,261 @@
+import atexit
+import itertools
+import multiprocessing as mp
+import os
+import threading
+import traceback
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from multiprocessing import shared_memory
+from queue import Empty
+
+import numpy as np
+from PIL import Image
+
+
+def _worker_main(model_path, task_queue, result_queue, max_batch_size, torch_threads):
+    """
+    Inference worker process entry point.
+
+    Each task references a shared-memory block holding one BGR frame. The
+    worker drains up to `max_batch_size` queued tasks, runs them as one
+    batched forward pass and returns every result as a compact (N, 6)
+    float32 array of [x1, y1, x2, y2, conf, cls].
+    """
+    import torch
+    from ultralytics import YOLO
+
+    torch.set_num_threads(max(1, torch_threads))
+    # The pool only serves detection models; exported ONNX/OpenVINO paths need the task given
+    model = YOLO(model_path, task='detect')
+    print(f"Inference worker {os.getpid()} loaded {model_path}")
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        tasks = [task]
+        while len(tasks) < max_batch_size:
+            try:
+                extra = task_queue.get_nowait()
+            except Empty:
+                break
+            if extra is None:
+                # Put the shutdown sentinel back for after this batch
+                task_queue.put(None)
+                break
+            tasks.append(extra)
+
+        groups = {}
+        for t in tasks:
+            groups.setdefault((t['confidence'], tuple(sorted(t['kwargs'].items()))), []).append(t)
+
+        for group in groups.values():
+            _run_group(model, group, result_queue)
+
+
+def _detect(model, tasks, blocks):
+    """
+    Run one batch on the tasks' shared-memory frames and return the packed
+    boxes. The frame views and Results (which keep a reference to their input
+    frame) are locals here, so they are gone before the caller detaches `blocks`.
+    """
+    frames = []
+    for t in tasks:
+        shm = shared_memory.SharedMemory(name=t['shm_name'])
+        blocks.append(shm)
+        frames.append(np.ndarray(t['shape'], dtype=np.uint8, buffer=shm.buf))
+
+    head = tasks[0]
+    results = model(frames, conf=head['confidence'], verbose=False, **head['kwargs'])
+    return [r.boxes.data.cpu().numpy().astype(np.float32) for r in results]
+
+
+def _run_group(model, tasks, result_queue):
+    blocks = []
+    try:
+        packed = _detect(model, tasks, blocks)
+        for t, boxes in zip(tasks, packed):
+            result_queue.put((t['task_id'], boxes, None))
+    except Exception:
+        error = traceback.format_exc()
+        for t in tasks:
+            result_queue.put((t['task_id'], None, error))
+    finally:
+        for shm in blocks:
+            shm.close()
+
+
+class InferencePool:
+    """
+    Pool of inference processes, each holding its own copy of the YOLO model.
+
+    Decoded frames are copied once into a `multiprocessing.shared_memory`
+    block (converted to BGR on the way, matching what ultralytics does for PIL
+    input) so only a small task descriptor is pickled. Workers reply with
+    packed box arrays that are turned back into `Results` objects here, so
+    callers see the same interface as an in-process `model(...)` call.
+    Only boxes are returned; segmentation models stay in-process.
+    """
+
+    def __init__(self, model_path, names, num_workers, max_batch_size=8, timeout=60.0, torch_threads=None):
+        self.model_path = model_path
+        self.names = names
+        self.num_workers = num_workers
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.timeout = timeout
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // num_workers)
+
+        self._ctx = mp.get_context('spawn')
+        self._task_queue = self._ctx.Queue()
+        self._result_queue = self._ctx.Queue()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._ids = itertools.count()
+        self._closed = False
+        self._close_lock = threading.Lock()
+
+        self._workers = [self._start_worker() for _ in range(num_workers)]
+        self._dispatcher = threading.Thread(target=self._dispatch, name='inference-pool-dispatcher', daemon=True)
+        self._dispatcher.start()
+        atexit.register(self.close)
+
+    def _start_worker(self):
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(self.model_path, self._task_queue, self._result_queue, self.max_batch_size, self.torch_threads),
+            daemon=True
+        )
+        process.start()
+        return process
+
+    def _dispatch(self):
+        """Route worker replies to the waiting futures and respawn dead workers"""
+        while not self._closed:
+            try:
+                task_id, boxes, error = self._result_queue.get(timeout=1.0)
+            except Empty:
+                self._respawn_dead_workers()
+                continue
+            except (EOFError, OSError):
+                break
+
+            with self._pending_lock:
+                future = self._pending.pop(task_id, None)
+            if future is None:
+                continue
+            if error:
+                future.set_exception(RuntimeError(f"Inference worker failed:\n{error}"))
+            else:
+                future.set_result(boxes)
+
+    def _respawn_dead_workers(self):
+        for i, process in enumerate(self._workers):
+            if not process.is_alive() and not self._closed:
+                print(f"⚠️ Inference worker {process.pid} exited ({process.exitcode}), restarting")
+                self._workers[i] = self._start_worker()
+
+    @staticmethod
+    def _to_bgr_array(source):
+        # ndarray input is passed through untouched, exactly as ultralytics treats it
+        if isinstance(source, Image.Image):
+            if source.mode != 'RGB':
+                source = source.convert('RGB')
+            return np.asarray(source)[:, :, ::-1]
+        return source
+
+    def _submit(self, source, confidence, kwargs):
+        """Copy one frame into shared memory and queue it; returns (future, shm, frame)"""
+        frame = self._to_bgr_array(source)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, frame.nbytes))
+        try:
+            shared = np.ndarray(frame.shape, dtype=np.uint8, buffer=shm.buf)
+            shared[...] = frame
+            del shared
+
+            task_id = next(self._ids)
+            future = Future()
+            future.task_id = task_id
+            with self._close_lock:
+                # Queued behind the workers' stop signals, it would never be answered
+                if self._closed:
+                    raise RuntimeError('Inference pool is closed')
+                with self._pending_lock:
+                    self._pending[task_id] = future
+                self._task_queue.put({
+                    'task_id': task_id,
+                    'shm_name': shm.name,
+                    'shape': frame.shape,
+                    'confidence': confidence,
+                    'kwargs': kwargs
+                })
+        except Exception:
+            shm.close()
+            shm.unlink()
+            raise
+        return future, shm, frame
+
+    def _collect(self, future, shm, frame):
+        """Wait for a submitted frame and release its shared memory"""
+        from ultralytics.engine.results import Results
+
+        try:
+            boxes = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            with self._pending_lock:
+                self._pending.pop(future.task_id, None)
+            raise TimeoutError(f"Inference worker did not answer within {self.timeout}s")
+        finally:
+            shm.close()
+            shm.unlink()
+
+        return Results(frame, path='', names=self.names, boxes=boxes)
+
+    def detect(self, source, confidence=0.25, **kwargs):
+        """Run one image through the pool and return an ultralytics `Results`"""
+        return self._collect(*self._submit(source, confidence, kwargs))
+
+    def detect_many(self, sources, confidence=0.25, **kwargs):
+        """Queue several images at once so idle workers pick them up in parallel"""
+        submitted = []
+        try:
+            for source in sources:
+                submitted.append(self._submit(source, confidence, kwargs))
+        except Exception:
+            for future, shm, frame in submitted:
+                with self._pending_lock:
+                    self._pending.pop(future.task_id, None)
+                shm.close()
+                shm.unlink()
+            raise
+
+        results = []
+        error = None
+        for item in submitted:
+            # Collect everything even after a failure so no shared memory leaks
+            try:
+                results.append(self._collect(*item))
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+        return results
+
+    def close(self):
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            for _ in self._workers:
+                self._task_queue.put(None)
+        for process in self._workers:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+        # The dispatcher has stopped: fail anything still waiting instead of
+        # letting it run into the timeout
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(RuntimeError('Inference pool is closed'))
@@ -1,28 +1,214 @@
-from ultralytics import YOLO
 from config import Config
+from services.batch_scheduler import BatchScheduler
+from services.worker_pool import InferencePool
+from services.model_registry import ModelRegistry
+from services.model_exporter import ModelExporter
+from services.admission import AdmissionController
+from contextlib import contextmanager
+from PIL import Image
+import numpy as np
+import os
 import threading
 
 class YoloService:
-    _instance = None
+    """
+    One loaded YOLO model with its batching / worker-pool front end.
+
+    Instances are owned by a ModelRegistry: models are configured by name
+    (Config.model_paths()), loaded on first request and unloaded least
+    recently used first when MODEL_MEMORY_MB is exceeded. `get_instance()`
+    without arguments is the default detection model.
+    """
+
+    _registry = None
     _lock = threading.Lock()
-    model = None
+    # model_path -> (model, served_path) loaded by preload() before workers fork
+    _preloaded = {}
 
     @classmethod
-    def get_instance(cls):
-        if cls._instance is None:
+    def registry(cls):
+        if cls._registry is None:
             with cls._lock:
-                if cls._instance is None:
-                    cls._instance = cls()
-        return cls._instance
-
-    def __init__(self):
-        if YoloService.model is None:
-            print(f"Loading YOLO model from: {Config.YOLO_MODEL_PATH}")
-            YoloService.model = YOLO(Config.YOLO_MODEL_PATH)
+                if cls._registry is None:
+                    cls._registry = ModelRegistry(
+                        cls, Config.model_paths(),
+                        max_bytes=int(Config.MODEL_MEMORY_MB * 1024 * 1024)
+                    )
+        return cls._registry
+
+    @classmethod
+    def get_instance(cls, model=None):
+        """
+        Loaded service for a model name or configured path (None = 'default')
+
+        Raises:
+            UnknownModelError: model is not configured
+        """
+        return cls.registry().get(model)
+
+    @classmethod
+    def segmentation_instance(cls, model=None):
+        """The model /detect/segment runs unless the request picks one"""
+        return cls.get_instance(model or 'seg')
+
+    @classmethod
+    def preload(cls, models):
+        """
+        Load model weights in a pre-fork master process (prefork.py).
+
+        Only the weights are loaded: no batcher thread or worker processes,
+        which would not survive fork(). PyTorch models are fused here, as
+        ultralytics otherwise does on the first prediction, so forked
+        workers keep sharing the weight pages copy-on-write instead of each
+        writing a fused copy. Workers build their services on first use.
+
+        Args:
+            models: Model names or configured paths
+        """
+        for name in models:
+            path = cls.registry().resolve(name)
+            if path in cls._preloaded:
+                continue
+            print(f"Preloading YOLO model: {path}")
+            model, served_path = ModelExporter.load(path)
+            if served_path == path and hasattr(model, 'fuse'):
+                model.fuse()
+            cls._preloaded[path] = (model, served_path)
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        if model_path in self._preloaded:
+            # Weights loaded by the pre-fork master, shared copy-on-write
+            self.model, self.served_path = self._preloaded[model_path]
+        else:
+            print(f"Loading YOLO model from: {model_path}")
+            # PyTorch weights, or their cached ONNX/OpenVINO export (Config.YOLO_BACKEND)
+            self.model, self.served_path = ModelExporter.load(model_path)
             print("Model loaded successfully!")
 
+        # The ultralytics predictor is not thread-safe; serialize direct calls
+        # with the batch scheduler's worker
+        self._predict_lock = threading.Lock()
+        # Calls in flight; an unloaded model shuts its batcher/workers down when they finish
+        self._state_lock = threading.Lock()
+        self._active = 0
+        self._closed = False
+        self.pool = None
+        self.scheduler = None
+        if Config.INFERENCE_WORKERS > 0 and self.model.task == 'detect':
+            self.pool = InferencePool(
+                self.served_path,
+                self.names,
+                num_workers=Config.INFERENCE_WORKERS,
+                max_batch_size=Config.BATCH_MAX_SIZE,
+                timeout=Config.INFERENCE_TIMEOUT,
+                torch_threads=Config.INFERENCE_WORKER_THREADS
+            )
+        elif Config.BATCH_MAX_SIZE > 1:
+            self.scheduler = BatchScheduler(
+                self.predict,
+                max_batch_size=Config.BATCH_MAX_SIZE,
+                max_wait_ms=Config.BATCH_MAX_WAIT_MS
+            )
+        self.memory_bytes = self._estimate_memory()
+
+    def _estimate_memory(self):
+        """Resident size of the weights (parameters + buffers), per loaded copy"""
+        try:
+            module = self.model.model
+            tensors = list(module.parameters()) + list(module.buffers())
+            size = sum(t.numel() * t.element_size() for t in tensors)
+        except (AttributeError, TypeError):
+            # Exported / non-torch models: fall back to the size on disk
+            size = self._disk_size(self.served_path)
+        # Every inference worker process holds its own copy
+        return size * (1 + (self.pool.num_workers if self.pool is not None else 0))
+
+    @staticmethod
+    def _disk_size(path):
+        if os.path.isfile(path):
+            return os.path.getsize(path)
+        return sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(path) for name in names
+        )
+
+    @property
+    def task(self):
+        return self.model.task
+
+    @contextmanager
+    def _in_use(self):
+        """
+        Count a call in flight and yield the (pool, scheduler) it may use,
+        taken under the same lock as close(): (None, None) once closed, so the
+        call runs predict() directly instead of reaching a stopped front end
+        """
+        with self._state_lock:
+            self._active += 1
+            front_end = (None, None) if self._closed else (self.pool, self.scheduler)
+        try:
+            yield front_end
+        finally:
+            with self._state_lock:
+                self._active -= 1
+                release = self._closed and self._active == 0
+            if release:
+                self._release()
+
+    def close(self):
+        """
+        Unload: stop the batcher and worker processes once in-flight calls finish.
+        Requests still holding this instance fall back to direct predict calls.
+        """
+        with self._state_lock:
+            self._closed = True
+            release = self._active == 0
+        if release:
+            self._release()
+
+    def _release(self):
+        pool, scheduler = self.pool, self.scheduler
+        self.pool = None
+        self.scheduler = None
+        if pool is not None:
+            pool.close()
+        if scheduler is not None:
+            scheduler.close()
+
     def detect(self, source, confidence=0.25, **kwargs):
-        return self.model(source, conf=confidence, verbose=False, **kwargs)
+        # Decoded single images go through the worker pool or the micro-batcher;
+        # URLs, paths and explicit lists are passed to the model as-is
+        AdmissionController.check_deadline()
+        with self._in_use() as (pool, scheduler):
+            if pool is not None and isinstance(source, (Image.Image, np.ndarray)):
+                return [pool.detect(source, confidence=confidence, **kwargs)]
+            if scheduler is not None and isinstance(source, (Image.Image, np.ndarray)):
+                return [scheduler.detect(source, confidence=confidence, **kwargs)]
+            return self.predict(source, confidence=confidence, **kwargs)
+
+    def detect_many(self, sources, confidence=0.25, **kwargs):
+        """
+        Detect on a list of decoded images, returning one result per image.
+        The images are handed to the worker pool or micro-batcher together so
+        they share forward passes with each other and with concurrent requests.
+        Raises DeadlineExceeded when the request's client has already given up.
+        """
+        AdmissionController.check_deadline()
+        with self._in_use() as (pool, scheduler):
+            if pool is not None:
+                return pool.detect_many(sources, confidence=confidence, **kwargs)
+            if scheduler is not None:
+                futures = [scheduler.submit(source, confidence=confidence, **kwargs) for source in sources]
+                return [future.result() for future in futures]
+            return self.predict(list(sources), confidence=confidence, **kwargs)
+
+    def predict(self, source, confidence=0.25, **kwargs):
+        """Run the model directly, bypassing the batch scheduler"""
+        # Panorama tiles run in several predict calls; stop once the client has given up
+        AdmissionController.check_deadline()
+        with self._predict_lock:
+            return self.model(source, conf=confidence, verbose=False, **kwargs)
 
     @property
     def names(self):
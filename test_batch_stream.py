@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test the streamed /detect/batch endpoint with a stub model standing in for
+the YOLO weights (no ultralytics needed)
+
+    python test_batch_stream.py
+    python -m pytest test_batch_stream.py
+"""
+
+import io
+import json
+import time
+
+import cv2
+import numpy as np
+
+from config import Config
+
+# app validates the configuration on import; no tunnel for the test client
+Config.USE_NGROK = False
+
+from app import app
+from services.yolo_service import YoloService
+
+
+class StubResult:
+    boxes = None
+
+
+class StubModel:
+    """Answers every image with no boxes after `delay` seconds per call; call number `fail_call` raises"""
+
+    task = 'detect'
+    names = {0: 'person'}
+
+    def __init__(self, delay=0.0, fail_call=None):
+        self.delay = delay
+        self.fail_call = fail_call
+        self.calls = 0
+
+    def __call__(self, source, conf=0.25, verbose=False, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.calls == self.fail_call:
+            raise RuntimeError('stub inference failure')
+        return [StubResult() for _ in (source if isinstance(source, list) else [source])]
+
+
+def _use_model(model, batch_size):
+    """Serve `model` as the default model, in batches of `batch_size` images"""
+    Config.INFERENCE_WORKERS = 0
+    Config.BATCH_MAX_SIZE = batch_size
+    YoloService._registry = None
+    path = YoloService.registry().resolve(None)
+    YoloService._preloaded[path] = (model, path)
+
+
+def _post_batch(count, headers=None):
+    image = cv2.imencode('.jpg', np.full((48, 64, 3), 128, np.uint8))[1].tobytes()
+    response = app.test_client().post(
+        '/detect/batch',
+        data={'images': [(io.BytesIO(image), f'{i}.jpg') for i in range(count)]},
+        content_type='multipart/form-data',
+        headers=headers or {}
+    )
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+
+
+def test_stream_outlives_deadline():
+    """A batch that streams longer than its X-Request-Timeout still reports every image"""
+    print("\n" + "="*60)
+    print("Testing a batch streamed past its deadline")
+    print("="*60)
+
+    _use_model(StubModel(delay=0.4), batch_size=2)
+    started = time.monotonic()
+    events = _post_batch(8, headers={'X-Request-Timeout': '1'})
+    elapsed = time.monotonic() - started
+
+    assert elapsed > 1, f'the stream took {elapsed:.1f}s, shorter than the 1s deadline'
+    results = [event for event in events if 'index' in event]
+    assert [event['index'] for event in results] == list(range(8))
+    assert all(event['success'] for event in results), results
+    assert events[-1]['done'] and events[-1]['total'] == 8 and events[-1]['failed'] == 0
+
+    print(f"✓ 8 results streamed over {elapsed:.1f}s with a 1s deadline")
+
+
+def test_failed_chunk():
+    """A chunk whose detection raises reports each of its images; later chunks still run"""
+    print("\n" + "="*60)
+    print("Testing a batch with a failing chunk")
+    print("="*60)
+
+    _use_model(StubModel(fail_call=2), batch_size=3)
+    events = _post_batch(8)
+
+    by_index = {event['index']: event for event in events if 'index' in event}
+    assert sorted(by_index) == list(range(8)), by_index
+    failed = [i for i, event in by_index.items() if not event['success']]
+    assert failed == [3, 4, 5], failed
+    assert all('stub inference failure' in by_index[i]['error'] for i in failed)
+    assert events[-1]['done'] and events[-1]['total'] == 8 and events[-1]['failed'] == 3
+
+    print("✓ Images 3-5 reported as errors, 0-2 and 6-7 detected")
+
+
+if __name__ == "__main__":
+    test_stream_outlives_deadline()
+    test_failed_chunk()
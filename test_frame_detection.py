@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test that the pyramid picture frame search finds the same frames as the
+full-resolution search, on the load test's synthetic captures
+
+    python test_frame_detection.py
+    python -m pytest test_frame_detection.py
+"""
+
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'benchmarks'))
+
+from load_test import synthetic_image
+from services.frame import Frame
+from services.image_service import ImageService
+
+SIZES = ((1920, 1080), (3840, 2160))
+SEEDS = range(20)
+PYRAMID_SIZES = (320, 640)
+
+
+def _frames(rgb, max_size, **area):
+    detections = ImageService.detect_picture_frames(Frame(rgb), max_size=max_size, **area)
+    return sorted(detections, key=lambda d: (d['bbox']['x1'], d['bbox']['y1'], d['bbox']['x2'], d['bbox']['y2']))
+
+
+def test_pyramid_parity():
+    """Same frames (bbox, corners and confidence) as max_size=0 on every synthetic capture"""
+    print("\n" + "="*60)
+    print("Testing pyramid frame search parity")
+    print("="*60)
+
+    compared = 0
+    frames = 0
+    for width, height in SIZES:
+        scale = (width / 1280) ** 2
+        for seed in SEEDS:
+            rgb = cv2.cvtColor(cv2.imdecode(np.frombuffer(synthetic_image(width, height, seed), np.uint8),
+                                            cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB)
+            # The defaults, and area limits scaled like the hybrid endpoint's
+            for area in ({}, {'min_area': 2000 * scale, 'max_area': 200000 * scale}):
+                expected = _frames(rgb, 0, **area)
+                frames += len(expected)
+                for max_size in PYRAMID_SIZES:
+                    found = _frames(rgb, max_size, **area)
+                    assert found == expected, \
+                        f'{width}x{height} seed {seed} max_size {max_size} {area}: {len(found)} frames, expected {len(expected)}'
+                    compared += 1
+
+    print(f"✓ {compared} comparisons, {frames} full-resolution frames matched")
+
+
+def test_corners_inside_image():
+    """Corners and bboxes stay within the image"""
+    for width, height in SIZES:
+        for seed in SEEDS:
+            rgb = cv2.cvtColor(cv2.imdecode(np.frombuffer(synthetic_image(width, height, seed), np.uint8),
+                                            cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB)
+            for detection in _frames(rgb, 640, min_area=1000, max_area=width * height):
+                bbox = detection['bbox']
+                assert 0 <= bbox['x1'] <= bbox['x2'] <= width and 0 <= bbox['y1'] <= bbox['y2'] <= height
+                for corner in detection['corners']:
+                    assert 0 <= corner['x'] <= width and 0 <= corner['y'] <= height
+
+    print("✓ Corners inside the image")
+
+
+if __name__ == "__main__":
+    test_pyramid_parity()
+    test_corners_inside_image()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test that the columnar and binary response formats carry the same boxes
+as the JSON response, picture frame corners included
+
+    python test_result_encoder.py
+    python -m pytest test_result_encoder.py
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'benchmarks'))
+
+from load_test import synthetic_image
+from services.frame import Frame
+from services.image_service import ImageService
+from services.result_encoder import ResultEncoder
+
+YOLO_NAMES = {0: 'person', 56: 'chair'}
+
+
+def _hybrid_detections(seed):
+    """A /detect/hybrid style result: two YOLO boxes, then the OpenCV frames of a synthetic capture"""
+    rgb = cv2.cvtColor(cv2.imdecode(np.frombuffer(synthetic_image(1280, 720, seed), np.uint8),
+                                    cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB)
+    frames = ImageService.detect_picture_frames(Frame(rgb))
+    yolo = [
+        {'class': 'person', 'class_id': 0, 'confidence': 0.9123,
+         'bbox': {'x1': 10.5, 'y1': 20.25, 'x2': 110.0, 'y2': 220.75}},
+        {'class': 'chair', 'class_id': 56, 'confidence': 0.4567,
+         'bbox': {'x1': 300.0, 'y1': 400.0, 'x2': 350.5, 'y2': 480.0}},
+    ]
+    return yolo, frames
+
+
+def _encode(yolo, frames):
+    """Box arrays and corners the way the hybrid route builds them"""
+    xyxy, conf, cls, _ = ResultEncoder.from_detections(yolo)
+    frame_xyxy, frame_conf, frame_cls, frame_names = ResultEncoder.from_detections(frames)
+    return (
+        np.concatenate([xyxy, frame_xyxy]),
+        np.concatenate([conf, frame_conf]),
+        np.concatenate([cls, frame_cls]),
+        {**YOLO_NAMES, **frame_names},
+        ResultEncoder.corners_of(frames, first_index=len(conf))
+    )
+
+
+def _expand(boxes, scores, class_ids, classes, indices, points):
+    """Per-detection dicts from the columns, like expandColumnarDetections in extension/api/yolo.js"""
+    detections = [
+        {'class': classes[str(int(c))], 'class_id': int(c), 'confidence': float(s),
+         'bbox': dict(zip(('x1', 'y1', 'x2', 'y2'), map(float, b)))}
+        for b, s, c in zip(boxes, scores, class_ids)
+    ]
+    for i, quad in zip(indices, points):
+        detections[int(i)]['corners'] = [{'x': float(x), 'y': float(y)} for x, y in quad]
+    return detections
+
+
+def _assert_same(decoded, expected, tolerance):
+    assert len(decoded) == len(expected)
+    for got, want in zip(decoded, expected):
+        assert got['class'] == want['class'] and got['class_id'] == want['class_id']
+        assert abs(got['confidence'] - want['confidence']) <= tolerance
+        for key in ('x1', 'y1', 'x2', 'y2'):
+            assert abs(got['bbox'][key] - want['bbox'][key]) <= tolerance
+        assert ('corners' in got) == ('corners' in want)
+        for got_point, want_point in zip(got.get('corners', ()), want.get('corners', ())):
+            assert abs(got_point['x'] - want_point['x']) <= tolerance
+            assert abs(got_point['y'] - want_point['y']) <= tolerance
+
+
+def test_columnar_round_trip():
+    """Columnar bodies decode to the JSON detections, corners on the frames"""
+    print("\n" + "="*60)
+    print("Testing columnar round trip")
+    print("="*60)
+
+    frames_seen = 0
+    for seed in range(5):
+        yolo, frames = _hybrid_detections(seed)
+        xyxy, conf, cls, names, corners = _encode(yolo, frames)
+        body = json.loads(json.dumps(ResultEncoder.to_columnar(xyxy, conf, cls, names, corners)))
+
+        if frames:
+            assert body['corners']['indices'] == list(range(len(yolo), len(yolo) + len(frames)))
+        else:
+            assert 'corners' not in body
+        indices = body.get('corners', {}).get('indices', [])
+        points = np.array(body.get('corners', {}).get('points', []), dtype=np.float64).reshape(-1, 4, 2)
+        decoded = _expand(np.array(body['boxes']).reshape(-1, 4), body['scores'], body['class_ids'],
+                          body['classes'], indices, points)
+        _assert_same(decoded, yolo + frames, tolerance=0.01)
+        frames_seen += len(frames)
+
+    assert frames_seen, 'synthetic captures should contain picture frames'
+    print(f"✓ {frames_seen} frames kept their corners")
+
+
+def test_binary_round_trip():
+    """Binary payloads decode to the JSON detections, corners on the frames"""
+    print("\n" + "="*60)
+    print("Testing binary round trip")
+    print("="*60)
+
+    frames_seen = 0
+    for seed in range(5):
+        yolo, frames = _hybrid_detections(seed)
+        xyxy, conf, cls, names, corners = _encode(yolo, frames)
+        header = {'success': True, 'yolo_count': len(yolo), 'classes': ResultEncoder.class_table(cls, names)}
+        payload = ResultEncoder.pack_binary(header, xyxy, conf, cls, corners)
+
+        header, boxes, scores, class_ids, (indices, points) = ResultEncoder.unpack_binary(payload)
+        assert header['corners_count'] == len(frames)
+        header_length = int.from_bytes(payload[:4], 'little')
+        assert len(payload) == 4 + header_length + 24 * len(scores) + 36 * len(indices)
+        decoded = _expand(boxes, scores, class_ids, header['classes'], indices, points)
+        # float32 keeps about 7 significant digits of a 4K coordinate
+        _assert_same(decoded, yolo + frames, tolerance=1e-3)
+        frames_seen += len(frames)
+
+    assert frames_seen, 'synthetic captures should contain picture frames'
+    print(f"✓ {frames_seen} frames kept their corners")
+
+
+def test_binary_without_corners():
+    """Plain /detect payloads keep the original layout, with corners_count 0"""
+    xyxy, conf, cls, names = ResultEncoder.from_detections(_hybrid_detections(0)[0])
+    payload = ResultEncoder.pack_binary({}, xyxy, conf, cls)
+    header_length = int.from_bytes(payload[:4], 'little')
+    assert len(payload) == 4 + header_length + 24 * len(conf)
+    header, boxes, _, _, (indices, _) = ResultEncoder.unpack_binary(payload)
+    assert header['corners_count'] == 0 and len(indices) == 0 and len(boxes) == len(conf)
+
+    print("✓ Binary layout unchanged without corners")
+
+
+if __name__ == "__main__":
+    test_columnar_round_trip()
+    test_binary_round_trip()
+    test_binary_without_corners()
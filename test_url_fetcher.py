@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test UrlFetcher against a local HTTP server: conditional-request
+revalidation (304), the size cap and the total download deadline
+
+    python test_url_fetcher.py
+    python -m pytest test_url_fetcher.py
+"""
+
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from services.url_fetcher import UrlFetcher, FetchError
+
+IMAGE = bytes(range(256)) * 64  # 16KB
+ETAG = '"v1"'
+MAX_BYTES = 64 * 1024
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    full_downloads = 0
+
+    def do_GET(self):
+        try:
+            if self.path == '/image':
+                if self.headers.get('If-None-Match') == ETAG:
+                    self.send_response(304)
+                    self.send_header('ETag', ETAG)
+                    self.end_headers()
+                    return
+                StubHandler.full_downloads += 1
+                self._send_body(IMAGE, {'ETag': ETAG, 'Content-Length': str(len(IMAGE))})
+            elif self.path == '/large':
+                # Honest Content-Length over the cap: rejected before the body
+                self._send_body(b'\0' * (MAX_BYTES + 1), {'Content-Length': str(MAX_BYTES + 1)})
+            elif self.path == '/large-unsized':
+                # No Content-Length: only the streamed byte count can catch it
+                self._send_body(b'\0' * (4 * MAX_BYTES), {})
+            elif self.path == '/trickle':
+                # A byte every 50ms: each read is well within the socket timeout
+                self.send_response(200)
+                self.send_header('Content-Type', 'image/jpeg')
+                self.end_headers()
+                for _ in range(200):
+                    self.wfile.write(b'\0')
+                    self.wfile.flush()
+                    time.sleep(0.05)
+            else:
+                self.send_response(404)
+                self.end_headers()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send_body(self, body, headers):
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def _expect_error(fetcher, url, status_code):
+    try:
+        fetcher.fetch(url)
+    except FetchError as e:
+        assert e.status_code == status_code, f'{url}: HTTP {e.status_code}, expected {status_code}'
+        return
+    raise AssertionError(f'{url}: fetched, expected HTTP {status_code}')
+
+
+def test_revalidation():
+    """A cached ETag is revalidated: the second fetch is a 304 served from disk"""
+    print("\n" + "="*60)
+    print("Testing URL cache revalidation")
+    print("="*60)
+
+    server, base = _serve()
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            fetcher = UrlFetcher(timeout=5, max_bytes=MAX_BYTES, pool_size=2, cache_dir=cache_dir)
+            StubHandler.full_downloads = 0
+
+            assert fetcher.fetch(f'{base}/image') == IMAGE
+            assert fetcher.fetch(f'{base}/image') == IMAGE
+            stats = fetcher.stats()
+            assert StubHandler.full_downloads == 1
+            assert stats['downloads'] == 1 and stats['revalidated'] == 1 and stats['cache_entries'] == 1
+
+            # A fresh fetcher finds the entry on disk and revalidates it too
+            reloaded = UrlFetcher(timeout=5, max_bytes=MAX_BYTES, pool_size=2, cache_dir=cache_dir)
+            assert reloaded.fetch(f'{base}/image') == IMAGE
+            assert StubHandler.full_downloads == 1 and reloaded.stats()['revalidated'] == 1
+    finally:
+        server.shutdown()
+
+    print("✓ Unchanged image answered with 304 from the cache")
+
+
+def test_size_cap():
+    """Bodies over max_bytes are rejected, with or without a Content-Length"""
+    server, base = _serve()
+    try:
+        fetcher = UrlFetcher(timeout=5, max_bytes=MAX_BYTES, pool_size=2, cache_dir='')
+        _expect_error(fetcher, f'{base}/large', 413)
+        _expect_error(fetcher, f'{base}/large-unsized', 413)
+        _expect_error(fetcher, f'{base}/missing', 502)
+    finally:
+        server.shutdown()
+
+    print("✓ Oversized downloads rejected with 413")
+
+
+def test_invalid_urls():
+    """Non-string and non-http(s) entries fail on their own with 400; the rest are fetched"""
+    server, base = _serve()
+    try:
+        fetcher = UrlFetcher(timeout=5, max_bytes=MAX_BYTES, pool_size=2, cache_dir='')
+        results = fetcher.fetch_many([123, f'{base}/image', {'url': f'{base}/image'}, 'ftp://example.com/a.jpg', None])
+        assert results[1] == IMAGE
+        for i in (0, 2, 3, 4):
+            assert isinstance(results[i], FetchError) and results[i].status_code == 400, results[i]
+    finally:
+        server.shutdown()
+
+    print("✓ Invalid URLs rejected with 400")
+
+
+def test_total_deadline():
+    """A server trickling bytes faster than the read timeout still times out"""
+    server, base = _serve()
+    try:
+        fetcher = UrlFetcher(timeout=1, max_bytes=MAX_BYTES, pool_size=2, cache_dir='')
+        started = time.monotonic()
+        _expect_error(fetcher, f'{base}/trickle', 504)
+        elapsed = time.monotonic() - started
+        assert elapsed < 2, f'gave up after {elapsed:.1f}s, timeout is 1s'
+    finally:
+        server.shutdown()
+
+    print(f"✓ Trickling download abandoned after {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    test_revalidation()
+    test_size_cap()
+    test_invalid_urls()
+    test_total_deadline()